@@ -0,0 +1,232 @@
+# aggregates.py
+"""
+Inkrementelle Spielerstatistik über gleitende Fenster (Standard: letzte 10, 25, 100 Kämpfe + gesamt).
+Pro Spieler und Gruppe (Kategorie aus game_modes, "ladder+ranked", "all") werden
+laufende Summen gehalten: Siege/Niederlagen, Kronen, Trophäen-Änderung, Deckwechsel und
+Kartennutzung. Deckwechsel zählen nur innerhalb einer Kategorie (ein 2v2- oder Draft-Deck
+ist kein Wechsel des Ladder-Decks); "all" und "ladder+ranked" übernehmen nur die aus
+Ladder/Ranked. Ein neuer Kampf addiert sich in jedes Fenster, der herausfallende wird
+abgezogen (Ringpuffer) – Abfragen lesen nur fertige Werte, unabhängig von der Historientiefe.
+
+Befüllung:
+- RollingAggregates(store) hängt sich an HistoryStore.ingest_battlelog (nur neue Kämpfe)
+- ein Spieler, der noch nicht im Speicher ist, wird beim ersten get() einmalig aus dem
+  Store nachgeladen; danach geht es nur noch inkrementell weiter
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import game_modes
+from cr_api import _norm_tag
+from deck_bits import card_key
+from history_store import _split_sides
+
+WINDOWS: Tuple[int, ...] = (10, 25, 100)
+ALL = "all"
+LADDER_GROUP = "ladder+ranked"
+MAX_PLAYERS = 1000  # LRU über Spieler – ältere werden bei Bedarf neu aus dem Store geladen
+TOP_CARDS = 8
+
+# (battle_time, Ergebnis +1/0/-1, Kronen für, Kronen gegen, Karten-Keys, Trophäen-Änderung)
+Entry = Tuple[str, int, int, int, FrozenSet[str], int]
+
+
+def group_for(modes: FrozenSet[str]) -> str:
+    """Passende Aggregat-Gruppe für einen Modus-Filter (wie in ui.MODE_FILTERS)."""
+    if modes == game_modes.LADDER_CATEGORIES:
+        return LADDER_GROUP
+    if len(modes) == 1:
+        return next(iter(modes))
+    return ALL if set(modes) >= set(game_modes.CATEGORIES) else LADDER_GROUP
+
+
+def _groups(category: str) -> Tuple[str, ...]:
+    if category in game_modes.LADDER_CATEGORIES:
+        return ALL, category, LADDER_GROUP
+    return ALL, category
+
+
+def _entry_from_battle(b: Dict[str, Any], pt: str) -> Optional[Entry]:
+    own, other = _split_sides(b, pt)
+    if own is None:
+        return None
+    me = next(p for p in own if _norm_tag(p.get("tag")) == pt)
+    cf = int(me.get("crowns") or 0)
+    ca = max((int(p.get("crowns") or 0) for p in other), default=0)
+    cards = frozenset(k for k in map(card_key, me.get("cards") or []) if k is not None)
+    return b.get("battleTime") or "", (cf > ca) - (cf < ca), cf, ca, cards, int(me.get("trophyChange") or 0)
+
+
+def _entry_from_row(r: Dict[str, Any]) -> Entry:
+    cf, ca = int(r.get("crowns_for") or 0), int(r.get("crowns_against") or 0)
+    return r["battle_time"], (cf > ca) - (cf < ca), cf, ca, frozenset(r.get("cards") or ()), int(r.get("trophy_change") or 0)
+
+
+class _Window:
+    """Laufende Summen über ein Fenster (size=None: gesamt)."""
+
+    __slots__ = ("size", "battles", "wins", "losses", "crowns_for", "crowns_against", "trophy_change", "deck_changes", "cards")
+
+    def __init__(self, size: Optional[int]):
+        self.size = size
+        self.battles = self.wins = self.losses = 0
+        self.crowns_for = self.crowns_against = self.trophy_change = self.deck_changes = 0
+        self.cards: Dict[str, int] = {}
+
+    def apply(self, e: Entry, changed: bool, sign: int) -> None:
+        _, result, cf, ca, cards, dt = e
+        self.battles += sign
+        self.wins += sign * (result > 0)
+        self.losses += sign * (result < 0)
+        self.crowns_for += sign * cf
+        self.crowns_against += sign * ca
+        self.trophy_change += sign * dt
+        self.deck_changes += sign * changed
+        for k in cards:
+            n = self.cards.get(k, 0) + sign
+            if n:
+                self.cards[k] = n
+            else:
+                del self.cards[k]
+
+    def snapshot(self) -> Dict[str, Any]:
+        decided = self.wins + self.losses
+        return {
+            "battles": self.battles,
+            "wins": self.wins,
+            "losses": self.losses,
+            "winrate": self.wins / decided if decided else 0.0,
+            "crowns_for": self.crowns_for,
+            "crowns_against": self.crowns_against,
+            "trophy_change": self.trophy_change,
+            "deck_changes": self.deck_changes,
+            "top_cards": heapq.nlargest(TOP_CARDS, self.cards.items(), key=lambda kv: kv[1]),
+        }
+
+
+class _Group:
+    """Kämpfe einer Gruppe (älteste zuerst eingespielt) im Ringpuffer + Fenster-Summen."""
+
+    __slots__ = ("windows", "total", "ring", "changed", "count", "deck_events")
+
+    def __init__(self, windows: Tuple[int, ...]):
+        cap = max(windows)
+        self.windows = [_Window(w) for w in windows]
+        self.total = _Window(None)
+        self.ring: List[Optional[Entry]] = [None] * cap
+        self.changed: List[bool] = [False] * cap
+        self.count = 0
+        self.deck_events: List[Tuple[str, FrozenSet[str]]] = []  # (battle_time, neues Deck), letzte 20
+
+    def push(self, e: Entry, changed: bool) -> None:
+        if changed:
+            self.deck_events.append((e[0], e[4]))
+            del self.deck_events[:-20]
+        cap = len(self.ring)
+        for win in self.windows:
+            win.apply(e, changed, 1)
+            if self.count >= win.size:  # ältester Kampf fällt aus diesem Fenster
+                i = (self.count - win.size) % cap
+                win.apply(self.ring[i], self.changed[i], -1)
+        self.total.apply(e, changed, 1)
+        i = self.count % cap
+        self.ring[i] = e
+        self.changed[i] = changed
+        self.count += 1
+
+    def snapshot(self) -> Dict[Any, Dict[str, Any]]:
+        out: Dict[Any, Dict[str, Any]] = {w.size: w.snapshot() for w in self.windows}
+        out[ALL] = self.total.snapshot()
+        out[ALL]["deck_events"] = list(self.deck_events)
+        return out
+
+
+class _Player:
+    __slots__ = ("last_time", "groups", "last_cards")
+
+    def __init__(self):
+        self.last_time = ""
+        self.groups: Dict[str, _Group] = {}
+        self.last_cards: Dict[str, FrozenSet[str]] = {}  # Kategorie → zuletzt gespieltes Deck
+
+
+class RollingAggregates:
+    """
+    store: optionaler HistoryStore – neue Kämpfe kommen über dessen Listener herein,
+    unbekannte Spieler werden beim ersten get() aus ihm nachgeladen.
+    Ohne Store: Kämpfe per add(tag, battles) selbst einspielen.
+    """
+
+    def __init__(self, store: Any = None, windows: Iterable[int] = WINDOWS, max_players: int = MAX_PLAYERS):
+        self.store = store
+        self.windows = tuple(sorted(set(windows)))
+        self.max_players = max_players
+        self._lock = threading.Lock()
+        self._players: "OrderedDict[str, _Player]" = OrderedDict()
+        if store is not None:
+            store.add_listener(self._on_ingest)
+
+    # ---- Einspielen ----
+    def add(self, player_tag: str, battles: Iterable[Dict[str, Any]]) -> int:
+        """Kämpfe (beliebige Reihenfolge) übernehmen; schon gezählte werden übersprungen."""
+        pt = _norm_tag(player_tag)
+        with self._lock:
+            p = self._player(pt, create=True)
+            return self._push_battles(p, pt, battles)
+
+    def _on_ingest(self, pt: str, added: List[Dict[str, Any]]) -> None:
+        # Spieler noch nicht geladen → kommt beim ersten get() vollständig aus dem Store
+        with self._lock:
+            p = self._players.get(pt)
+            if p is not None:
+                self._push_battles(p, pt, added)
+
+    def _push_battles(self, p: _Player, pt: str, battles: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        for b in sorted(battles, key=lambda b: b.get("battleTime") or ""):
+            if (b.get("battleTime") or "") <= p.last_time:
+                continue
+            e = _entry_from_battle(b, pt)
+            if e is not None:
+                self._push(p, e, game_modes.classify(b))
+                n += 1
+        return n
+
+    def _push(self, p: _Player, e: Entry, category: str) -> None:
+        p.last_time = e[0]
+        cards = e[4]
+        last = p.last_cards.get(category)
+        changed = bool(cards) and bool(last) and cards != last
+        if cards:
+            p.last_cards[category] = cards
+        ladder = category in game_modes.LADDER_CATEGORIES
+        for g in _groups(category):
+            grp = p.groups.get(g)
+            if grp is None:
+                grp = p.groups[g] = _Group(self.windows)
+            grp.push(e, changed and (ladder or g == category))
+
+    def _player(self, pt: str, create: bool = False) -> Optional[_Player]:
+        p = self._players.get(pt)
+        if p is not None:
+            self._players.move_to_end(pt)
+            return p
+        if not create and self.store is None:
+            return None
+        p = self._players[pt] = _Player()
+        while len(self._players) > self.max_players:
+            self._players.popitem(last=False)
+        if self.store is not None:
+            for r in reversed(self.store.player_battles(pt)):
+                self._push(p, _entry_from_row(r), game_modes.classify_row(r))
+        return p
+
+    # ---- Abfragen ----
+    def get(self, player_tag: str, group: str = LADDER_GROUP) -> Dict[Any, Dict[str, Any]]:
+        """{10: {...}, 25: {...}, 100: {...}, 'all': {...}} – leer, wenn es keine Kämpfe gibt."""
+        with self._lock:
+            p = self._player(_norm_tag(player_tag))
+            grp = p.groups.get(group) if p is not None else None
+            return grp.snapshot() if grp is not None else {}
@@ -0,0 +1,223 @@
+# batch_lookup.py – Headless Batch-Lookup (ohne UI/OCR)
+"""
+Liest viele Zeilen (Spielername + Clanname oder Player-Tag) aus Datei oder stdin,
+löst sie parallel über die API auf und schreibt ein JSON-Objekt pro Zeile (JSONL).
+
+Eingabeformat (eine Zeile pro Lookup, Tab oder Komma als Trenner):
+    Spielername<TAB>Clanname
+    Spielername,Clanname
+    #PLAYERTAG
+
+Beispiele:
+    python batch_lookup.py gegner.tsv > ergebnisse.jsonl
+    type gegner.tsv | python batch_lookup.py -c 16 --store
+Am Ende stehen Durchsatz, Fehlerquote und Latenzen auf stderr.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from dotenv import load_dotenv
+
+from cr_api import (
+    ClashAPI,
+    RateLimiter,
+    ResponseCache,
+    ladder_report,
+    resolve_clan_tag_by_name,
+    resolve_player_across_clans,
+    resolve_player_tag_in_clan,
+)
+import http_pool
+import metrics
+from cr_models import HAVE_MSGSPEC
+
+
+def read_rows(fh: TextIO) -> Iterator[Dict[str, str]]:
+    """Eingabezeilen → {'line', 'tag'} oder {'line', 'name', 'clan'}; Leerzeilen werden übersprungen."""
+    for lineno, raw in enumerate(fh, start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#") and "\t" not in line and "," not in line:
+            yield {"line": lineno, "tag": line.lstrip("#").upper()}
+            continue
+        delim = "\t" if "\t" in line else ","
+        fields = [f.strip() for f in next(csv.reader([line], delimiter=delim))]
+        yield {"line": lineno, "name": fields[0], "clan": fields[1] if len(fields) > 1 else ""}
+
+
+def lookup_player(
+    api: ClashAPI,
+    name: str = "",
+    clan: str = "",
+    tag: str = "",
+    history: int = 10,
+    store: Any = None,
+) -> Dict[str, Any]:
+    """
+    Ein Lookup über denselben Pfad wie UI/Scanner (Tag direkt oder Name + Clan).
+    Rückgabe: JSON-fähiges dict mit Deck, Match-Quote und Ladder-Statistik; wirft bei Fehlern.
+    """
+    ptag = tag.lstrip("#").upper()
+    clan_disp = ""
+    if not ptag:
+        if not clan:
+            raise ValueError("Clanname fehlt (globale Namenssuche ist per API nicht möglich)")
+        ctag, csugg, clan_disp = resolve_clan_tag_by_name(api, clan)
+        if ctag:
+            ptag, _, _ = resolve_player_tag_in_clan(api, ctag, name)
+        if not ptag:
+            ptag, ctag, _, clan_disp, csugg = resolve_player_across_clans(api, clan, name)
+        if not ptag:
+            raise LookupError(f"Spieler nicht gefunden. Clans: {csugg[:5]}")
+
+    player = api.get_player(ptag)
+    battles = api.get_battlelog(ptag)
+    if store is not None:
+        store.ingest_battlelog(ptag, battles)
+    rep = ladder_report(player, battles, n=history)
+
+    pclan = player.get("clan") or {}
+    return {
+        "player_tag": player.get("tag", ""),
+        "player_name": player.get("name", ""),
+        "clan": pclan.get("name", "") or clan_disp,
+        "clan_tag": pclan.get("tag", ""),
+        "trophies": player.get("trophies"),
+        "current_deck": [c.get("name", "") for c in player.get("currentDeck") or []],
+        "match": rep["match"],
+        "ladder": {
+            k: rep[k]
+            for k in ("wins", "losses", "winrate", "crowns_for", "crowns_against", "avg_elixir", "four_card_cycle")
+        },
+        "recent_decks": [[c.get("name", "") for c in rc] for rc in rep["recent_cards"]],
+    }
+
+
+def lookup_row(api: ClashAPI, row: Dict[str, Any], history: int = 10, store: Any = None) -> Dict[str, Any]:
+    """lookup_player für eine Eingabezeile; Fehler landen im Ergebnis statt als Exception."""
+    t0 = time.perf_counter()
+    out: Dict[str, Any] = {"line": row["line"], "input": {k: v for k, v in row.items() if k != "line"}}
+    try:
+        res = lookup_player(
+            api, row.get("name", ""), row.get("clan", ""), row.get("tag", ""), history=history, store=store
+        )
+        out["ok"] = True
+        out.update(res)
+    except Exception as e:
+        out.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    out["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return out
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def run(
+    api: ClashAPI,
+    rows: List[Dict[str, Any]],
+    out: TextIO,
+    concurrency: int = 8,
+    history: int = 10,
+    store: Any = None,
+) -> Dict[str, Any]:
+    """Alle Zeilen parallel auflösen, Ergebnisse sofort als JSONL streamen; Rückgabe: Statistik."""
+    lock = threading.Lock()
+    lat: List[float] = []
+    ok = err = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        futs = [ex.submit(lookup_row, api, r, history, store) for r in rows]
+        for f in as_completed(futs):
+            res = f.result()
+            with lock:
+                out.write(json.dumps(res, ensure_ascii=False) + "\n")
+                out.flush()
+            lat.append(res["elapsed_ms"])
+            if res["ok"]:
+                ok += 1
+            else:
+                err += 1
+    wall = time.perf_counter() - t0
+    total = ok + err
+    return {
+        "rows": total,
+        "ok": ok,
+        "errors": err,
+        "error_rate": (err / total) if total else 0.0,
+        "wall_s": wall,
+        "rows_per_s": (total / wall) if wall > 0 else 0.0,
+        "p50_ms": _percentile(lat, 0.5),
+        "p95_ms": _percentile(lat, 0.95),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="DeckFinder Batch-Lookup (JSONL-Ausgabe)")
+    ap.add_argument("input", nargs="?", default="-", help="Eingabedatei (Standard: stdin)")
+    ap.add_argument("-o", "--output", default="-", help="Ausgabedatei (Standard: stdout)")
+    ap.add_argument("-c", "--concurrency", type=int, default=8, help="parallele Lookups (Standard: 8)")
+    ap.add_argument("-n", "--history", type=int, default=10, help="Anzahl Ladder-Decks für Match-Quote")
+    ap.add_argument("--store", action="store_true", help="Battlelogs in history.sqlite3 übernehmen")
+    ap.add_argument("--service", default=None, help="DeckFinder-Dienst (server.py) statt direkter API, z. B. http://127.0.0.1:8787")
+    args = ap.parse_args(argv)
+
+    load_dotenv()
+    metrics.enable_from_env()
+    service = args.service or os.getenv("DECKFINDER_SERVICE")
+    token = os.getenv("CLASH_TOKEN")
+    if not token and not service:
+        print("Fehlt: CLASH_TOKEN in .env", file=sys.stderr)
+        return 1
+
+    fin = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    with fin:
+        rows = list(read_rows(fin))
+
+    store = None
+    if args.store:
+        from history_store import HistoryStore
+        store = HistoryStore()
+
+    if service:
+        api = ClashAPI(
+            os.getenv("DECKFINDER_SERVICE_TOKEN", ""), typed=HAVE_MSGSPEC, cache=ResponseCache(), base_url=service
+        )
+    else:
+        api = ClashAPI(token, typed=HAVE_MSGSPEC, cache=ResponseCache(), limiter=RateLimiter())
+    http_pool.POOL.warm([str(api.client.base_url)], background=False)  # Handshake nicht in der ersten Zeile
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run(api, rows, fout, concurrency=args.concurrency, history=args.history, store=store)
+    finally:
+        if fout is not sys.stdout:
+            fout.close()
+        api.close()
+        http_pool.POOL.close()
+        if store is not None:
+            store.close()
+
+    print(
+        f"{stats['rows']} Zeilen in {stats['wall_s']:.1f}s ({stats['rows_per_s']:.1f}/s) | "
+        f"ok {stats['ok']} | Fehler {stats['errors']} ({stats['error_rate']*100:.1f}%) | "
+        f"p50 {stats['p50_ms']:.0f}ms | p95 {stats['p95_ms']:.0f}ms",
+        file=sys.stderr,
+    )
+    for line in metrics.METRICS.summary():
+        print(line, file=sys.stderr)
+    return 0 if stats["errors"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
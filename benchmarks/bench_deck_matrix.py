@@ -0,0 +1,70 @@
+# benchmarks/bench_deck_matrix.py – DeckMatrix bei 10k / 100k / 1M Decks
+"""
+Aufruf:  python benchmarks/bench_deck_matrix.py [--sizes 10000 100000 1000000] [--queries 100]
+Misst Aufbau, Einzelabfrage (Popcount), Top-10, Batch-Top-10 und den Aufbau der Präsenzmatrix.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deck_matrix import DeckMatrix  # noqa: E402
+
+N_CARDS = 120  # ungefähr der aktuelle Kartenpool
+
+
+def random_deck_words(n: int, rng: np.random.Generator, chunk: int = 100_000) -> np.ndarray:
+    """n zufällige 8-Karten-Decks als (n, 2) uint64."""
+    out = np.zeros((n, 2), dtype=np.uint64)
+    for s in range(0, n, chunk):
+        m = min(chunk, n - s)
+        bits = np.argpartition(rng.random((m, N_CARDS)), 8, axis=1)[:, :8].astype(np.uint64)
+        lo_bits = np.where(bits < 64, np.left_shift(np.uint64(1), bits % np.uint64(64)), np.uint64(0))
+        hi_bits = np.where(bits >= 64, np.left_shift(np.uint64(1), bits % np.uint64(64)), np.uint64(0))
+        out[s : s + m, 0] = np.bitwise_or.reduce(lo_bits, axis=1)
+        out[s : s + m, 1] = np.bitwise_or.reduce(hi_bits, axis=1)
+    return out
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(sizes, n_queries: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    print(f"{'N':>9} | {'build':>9} | {'1 query':>9} | {'top-10':>9} | {f'{n_queries}q top-10':>12} | {'presence':>9}")
+    print("-" * 72)
+    for n in sizes:
+        words = random_deck_words(n, rng)
+        queries = random_deck_words(n_queries, rng)
+        t_build = _timed(lambda: DeckMatrix(words), repeat=1)
+        dm = DeckMatrix(words)
+        t_one = _timed(lambda: dm.similarity(queries[:1], method="popcount"))
+        t_top = _timed(lambda: dm.topk(queries[:1], k=10))
+        t_pres = _timed(lambda: DeckMatrix(words).presence(), repeat=1)
+        t_batch = _timed(lambda: dm.topk(queries, k=10), repeat=1)
+        print(
+            f"{n:>9} | {t_build*1e3:>7.1f}ms | {t_one*1e3:>7.2f}ms | {t_top*1e3:>7.2f}ms "
+            f"| {t_batch*1e3:>10.1f}ms | {t_pres*1e3:>7.1f}ms"
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=100)
+    args = ap.parse_args()
+    run(args.sizes, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# benchmarks/bench_helpers.py – Microbenchmarks für Auflösung, Deck-Analyse und OCR-Preprocessing
+"""
+Aufruf:
+    python benchmarks/bench_helpers.py                          # alle Fälle, Tabelle
+    python benchmarks/bench_helpers.py --save base.json         # Ergebnisse speichern
+    python benchmarks/bench_helpers.py --compare base.json      # gegen gespeicherten Lauf vergleichen
+    python benchmarks/bench_helpers.py --roi-dir samples/ -k ocr
+
+Daten: synthetische 50er-Roster und 25er-Battlelogs (benchmarks/synth.py) plus hochskalierte
+Korpora (--scale, Standard 40 → 2000 Mitglieder / 1000 Kämpfe).
+OCR-Preprocessing: PNGs aus --roi-dir (Dateiname beginnt mit name_ bzw. clan_) oder
+synthetisch gerenderte Schrift in ROI-Größe.
+Angabe: beste Zeit pro Aufruf in µs (timeit, autorange, min über --repeat Läufe).
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth  # noqa: E402
+import cr_models  # noqa: E402
+import deck_bits  # noqa: E402
+import game_modes  # noqa: E402
+from cr_api import (  # noqa: E402
+    NameIndex,
+    _avg_elixir,
+    _best_name_match,
+    _deck_keys,
+    _deck_similarity,
+    _four_card_cycle,
+    _is_ranked_or_trophy_pvp_1v1,
+    _norm,
+    _pvp_stats_last_n,
+    deck_match_report,
+    ladder_report,
+    last_n_decks_from_battlelog,
+)
+
+# Benchmarks fassen keinen Nutzerzustand an: synthetische Karten-ids und Spielmodi landen nur
+# im Speicher, nie in card_registry.json / game_modes.json des Arbeitsverzeichnisses
+deck_bits.CARD_REGISTRY.path = None
+game_modes.GAME_MODES.path = None
+
+REGRESSION_THRESHOLD = 0.20  # +20 % gilt als Regression
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def analytics_cases(scale: int) -> List[Case]:
+    cases: List[Case] = []
+    for label, n_members, n_battles in (("", 50, 25), (f"@x{scale}", 50 * scale, 25 * scale)):
+        rng = random.Random(3)
+        members = synth.roster(n_members, seed=2)["items"]
+        names = [m["name"] for m in members]
+        queries = [synth.ocr_noisy(rng.choice(names), rng) for _ in range(16)]
+        index = NameIndex(names)
+        p = synth.player(seed=4)
+        log = synth.battlelog(p, n=n_battles, seed=5)
+        ladder = [b for b in log if _is_ranked_or_trophy_pvp_1v1(b)]
+        deck = p["currentDeck"]
+        recent = last_n_decks_from_battlelog(log, p["tag"], n=10)
+        cur_keys = _deck_keys(deck)
+        raw = json.dumps(log).encode()
+
+        cases += [
+            (f"name.norm{label}", lambda names=names: [_norm(n) for n in names]),
+            (f"name.best_match{label}", lambda q=queries, n=names: [_best_name_match(n, s) for s in q]),
+            (f"name.index_build{label}", lambda n=names: NameIndex(n)),
+            (f"name.index_lookup{label}", lambda q=queries, ix=index: [ix.best(s) for s in q]),
+            (f"deck.similarity{label}", lambda c=cur_keys, r=recent: [_deck_similarity(c, h) for h in r]),
+            (f"deck.match_report{label}", lambda d=deck, r=recent: deck_match_report(d, r)),
+            (f"deck.last_n{label}", lambda lg=log, t=p["tag"]: last_n_decks_from_battlelog(lg, t, n=10)),
+            (f"filter.ladder_1v1{label}", lambda lg=log: [b for b in lg if _is_ranked_or_trophy_pvp_1v1(b)]),
+            (f"stats.pvp_last_n{label}", lambda lb=ladder, n=n_battles: _pvp_stats_last_n(lb, n=n)),
+            (f"stats.avg_elixir{label}", lambda d=deck: _avg_elixir(d)),
+            (f"stats.four_card_cycle{label}", lambda d=deck: _four_card_cycle(d)),
+            (f"report.ladder{label}", lambda pl=p, lg=log: ladder_report(pl, lg, n=10)),
+            (f"decode.battlelog{label}", lambda r=raw: cr_models.decode_battlelog(r)),
+            (f"decode.json_loads{label}", lambda r=raw: json.loads(r)),  # Vergleich: untypisierter Pfad
+        ]
+    return cases
+
+
+def _synthetic_rois() -> List[Tuple[str, Any]]:
+    """Goldene Namensschrift / weiße Clanschrift auf dunklem, leicht verrauschtem Hintergrund."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(11)
+    out = []
+    for kind, size, color, text in (
+        ("name", (44, 260), (60, 200, 250), "DarkLordツ77"),
+        ("clan", (30, 220), (235, 235, 235), "Synth Clan"),
+    ):
+        img = rng.integers(10, 60, size=(*size, 3), dtype=np.uint8)
+        cv2.putText(img, text, (6, size[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2, cv2.LINE_AA)
+        out.append((kind, img))
+    return out
+
+
+def ocr_cases(roi_dir: str = "") -> List[Case]:
+    """Preprocessing aus ui.py; fehlt OpenCV o. Ä., wird die Gruppe übersprungen."""
+    try:
+        import cv2
+        import ui
+
+        ui.load_ocr_stack()  # ui.py lädt cv2/numpy erst beim ersten Scan
+        preprocess_clan, preprocess_name = ui.preprocess_clan, ui.preprocess_name
+    except Exception as e:
+        print(f"(OCR-Preprocessing übersprungen: {e})", file=sys.stderr)
+        return []
+    samples: List[Tuple[str, Any]] = []
+    if roi_dir:
+        for path in sorted(glob.glob(os.path.join(roi_dir, "*.png"))):
+            base = os.path.basename(path)
+            kind = "name" if base.startswith("name") else "clan" if base.startswith("clan") else ""
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            if kind and img is not None:
+                samples.append((kind, img))
+    if not samples:
+        samples = _synthetic_rois()
+    fns = {"name": preprocess_name, "clan": preprocess_clan}
+    cases: List[Case] = []
+    for kind in ("name", "clan"):
+        imgs = [img for k, img in samples if k == kind]
+        if imgs:
+            cases.append((f"ocr.preprocess_{kind}", lambda f=fns[kind], imgs=imgs: [f(i) for i in imgs]))
+    return cases
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    t = timeit.Timer(fn)
+    number, _ = t.autorange()
+    best = min(t.repeat(repeat=repeat, number=number)) / number
+    return {"us": round(best * 1e6, 3), "number": number}
+
+
+def run(cases: List[Case], repeat: int, pattern: str = "") -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, fn in cases:
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(fn, repeat)
+    return results
+
+
+def _meta() -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "msgspec": cr_models.HAVE_MSGSPEC,
+    }
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None) -> int:
+    """Tabelle ausgeben; Rückgabe: Anzahl Regressionen gegenüber baseline."""
+    regressions = 0
+    width = max((len(k) for k in results), default=10)
+    for name, r in results.items():
+        line = f"{name:<{width}} {r['us']:>12.2f} µs"
+        old = (baseline or {}).get(name)
+        if old:
+            delta = (r["us"] - old["us"]) / old["us"] if old["us"] else 0.0
+            flag = "  ← REGRESSION" if delta > REGRESSION_THRESHOLD else ""
+            regressions += bool(flag)
+            line += f"  (vorher {old['us']:.2f} µs, {delta*100:+.0f} %){flag}"
+        print(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="DeckFinder Microbenchmarks")
+    ap.add_argument("-k", "--filter", default="", help="nur Fälle, deren Name dies enthält")
+    ap.add_argument("--scale", type=int, default=40, help="Faktor für die großen Korpora")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--roi-dir", default="", help="Ordner mit ROI-PNGs (name_*.png / clan_*.png)")
+    ap.add_argument("--save", default="", help="Ergebnisse als JSON speichern")
+    ap.add_argument("--compare", default="", help="gespeicherten Lauf als Vergleich laden")
+    args = ap.parse_args(argv)
+
+    cases = analytics_cases(args.scale) + ocr_cases(args.roi_dir)
+    results = run(cases, args.repeat, args.filter)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": _meta(), "results": results}, f, indent=2)
+    if regressions:
+        print(f"{regressions} Regression(en) > {REGRESSION_THRESHOLD*100:.0f} %", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
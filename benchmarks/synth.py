@@ -0,0 +1,124 @@
+# benchmarks/synth.py – synthetische, API-förmige Testdaten für Benchmarks
+"""
+Erzeugt Roster (Clan-Mitglieder), Spielerprofile und Battlelogs in genau der Form,
+die die Clash-API liefert – deterministisch über einen Seed.
+Battlelogs mischen Ladder/Ranked mit Friendlies, 2v2, Draft und Clanwar, damit die
+Filter realistisch viel verwerfen.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+N_CARDS = 120
+_SYLLABLES = ("ka", "ro", "mi", "xx", "zer", "dark", "lord", "nin", "ja", "el", "ite", "pro", "gam", "er", "ty", "lo")
+_DECOR = ("", "", "", "_", "™", "ツ", "77", "★", "ø", "é")
+
+# (gameMode.name, type, team size, deckSelection, Gewicht)
+_MODES = (
+    ("Ladder", "PvP", 1, "collection", 45),
+    ("Ranked1v1_NewArena", "PvP", 1, "collection", 25),
+    ("Friendly", "friendly", 1, "collection", 8),
+    ("TeamVsTeam", "PvP", 2, "collection", 8),
+    ("Draft_Competitive", "PvP", 1, "draft", 6),
+    ("ClanWar_BoatBattle", "riverRacePvP", 1, "collection", 8),
+)
+
+
+def _card(cid: int, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "id": 26000000 + cid,
+        "name": f"Card {cid}",
+        "level": rng.randint(9, 15),
+        "elixirCost": 1 + cid % 9,
+        "iconUrls": {"medium": f"https://api-assets.clashroyale.com/cards/300/{cid}.png"},
+    }
+
+
+def random_deck(rng: random.Random) -> List[Dict[str, Any]]:
+    return [_card(c, rng) for c in rng.sample(range(N_CARDS), 8)]
+
+
+def random_tag(rng: random.Random) -> str:
+    return "#" + "".join(rng.choice("0289PYLQGRJCUV") for _ in range(9))
+
+
+def random_name(rng: random.Random) -> str:
+    base = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+    if rng.random() < 0.5:
+        base = base.capitalize()
+    return base + rng.choice(_DECOR)
+
+
+def ocr_noisy(name: str, rng: random.Random) -> str:
+    """Name so verfälschen, wie Tesseract es typischerweise tut (l/I, O/0, rn/m …)."""
+    swaps = (("l", "I"), ("o", "0"), ("m", "rn"), ("e", "c"), ("™", ""), ("ツ", ""))
+    out = name
+    for a, b in rng.sample(swaps, 2):
+        out = out.replace(a, b, 1)
+    return out
+
+
+def roster(n: int = 50, seed: int = 1) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "items": [
+            {
+                "tag": random_tag(rng),
+                "name": random_name(rng),
+                "role": rng.choice(("member", "elder", "coLeader")),
+                "expLevel": rng.randint(20, 70),
+                "trophies": rng.randint(4000, 9000),
+            }
+            for _ in range(n)
+        ]
+    }
+
+
+def player(tag: str = "#P0", seed: int = 1) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    deck = random_deck(rng)
+    return {
+        "tag": tag,
+        "name": random_name(rng),
+        "expLevel": 55,
+        "trophies": 7500,
+        "bestTrophies": 8000,
+        "clan": {"tag": "#C0", "name": "Synth Clan"},
+        "currentDeck": deck,
+        "currentFavouriteCard": deck[0],
+    }
+
+
+def battlelog(player_payload: Dict[str, Any], n: int = 25, seed: int = 1, deck_pool: int = 4) -> List[Dict[str, Any]]:
+    """n Kämpfe, neueste zuerst; der Spieler rotiert zwischen deck_pool Decks (inkl. currentDeck)."""
+    rng = random.Random(seed)
+    decks = [player_payload["currentDeck"]] + [random_deck(rng) for _ in range(deck_pool - 1)]
+    weights = [m[4] for m in _MODES]
+    t = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for _ in range(n):
+        mi = rng.choices(range(len(_MODES)), weights)[0]
+        gm, typ, size, ds, _ = _MODES[mi]
+        t -= timedelta(minutes=rng.randint(3, 90))
+        me = {
+            "tag": player_payload["tag"],
+            "name": player_payload["name"],
+            "crowns": rng.randint(0, 3),
+            "startingTrophies": 7500,
+            "trophyChange": rng.choice((30, -30)),
+            "cards": rng.choice(decks),
+        }
+        team = [me] + [{"tag": random_tag(rng), "crowns": me["crowns"], "cards": random_deck(rng)} for _ in range(size - 1)]
+        opp = [{"tag": random_tag(rng), "crowns": rng.randint(0, 3), "cards": random_deck(rng)} for _ in range(size)]
+        out.append(
+            {
+                "type": typ,
+                "battleTime": t.strftime("%Y%m%dT%H%M%S.000Z"),
+                "gameMode": {"id": 72000000 + mi, "name": gm},
+                "deckSelection": ds,
+                "isFriendly": typ == "friendly",
+                "team": team,
+                "opponent": opp,
+            }
+        )
+    return out
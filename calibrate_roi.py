@@ -1,15 +1,25 @@
-# calibrate_roi.py – minimal: nur Spielername- und Clanname-ROI erfassen
+# calibrate_roi.py – minimal: nur Spielername- und Clanname-ROI erfassen (je Gegner-Gruppe)
+# Aufruf als Skript oder in-process aus der GUI (calibrate()).
 
+import argparse
 import json
 import os
 import sys
+from typing import List, Optional
+
 import numpy as np
 import cv2
 import mss
 
+from roi_groups import DEFAULT_LABEL, RoiGroup, default_label, groups_from_config, groups_to_config
+
 CONF_PATH = "config.json"
 
 
+class CalibrationCancelled(Exception):
+    """Keine (gültige) Auswahl getroffen."""
+
+
 def grab_fullscreen() -> np.ndarray:
     """Screenshot des gesamten virtuellen Desktops (alle Monitore)."""
     with mss.mss() as sct:
@@ -31,39 +41,71 @@ def pick_roi(window_title: str, base_img: np.ndarray, hint: str) -> tuple[int, i
 
     x, y, w, h = map(int, r)
     if w <= 0 or h <= 0:
-        print(f"❌ Keine Auswahl fuer '{window_title}' getroffen.", file=sys.stderr)
-        sys.exit(1)
+        raise CalibrationCancelled(f"Keine Auswahl fuer '{window_title}' getroffen.")
     return x, y, w, h
 
 
-def main():
-    img = grab_fullscreen()
+def calibrate(conf_path: str = CONF_PATH, groups: Optional[int] = None, labels: Optional[List[str]] = None) -> dict:
+    """
+    Name- und Clan-ROI je Gegner-Gruppe erfassen und in conf_path speichern; übrige Schlüssel
+    (z. B. watch_clans) bleiben erhalten. groups=None: so viele Gruppen wie bisher (mind. 1).
+    Rückgabe: die gespeicherte Konfiguration.
+    """
+    try:
+        with open(conf_path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+    except (OSError, ValueError):
+        cfg = {}
+    old = groups_from_config(cfg)
+    n = max(1, groups if groups is not None else len(old))
+    labels = list(labels or [])
+    for i in range(len(labels), n):
+        if n == 1:
+            labels.append(DEFAULT_LABEL)
+        elif i < len(old) and len(old) > 1:
+            labels.append(old[i].label)  # Namen aus der letzten Kalibrierung behalten
+        else:
+            labels.append(default_label(i))
 
-    # 1) Spielername-ROI
-    roi_name = pick_roi(
-        "ROI: Spielername",
-        img,
-        "Ziehe ein Rechteck NUR um den SPIELERNAMEN und druecke ENTER"
-    )
-
-    # 2) Clanname-ROI
-    roi_clan = pick_roi(
-        "ROI: Clanname",
-        img,
-        "Ziehe ein Rechteck NUR um den CLANNAMEN und druecke ENTER"
-    )
+    img = grab_fullscreen()
+    picked = []
+    for label in labels[:n]:
+        suffix = f" ({label})" if n > 1 else ""
+        # 1) Spielername-ROI
+        roi_name = pick_roi(
+            f"ROI: Spielername{suffix}",
+            img,
+            f"Ziehe ein Rechteck NUR um den SPIELERNAMEN{suffix} und druecke ENTER"
+        )
+        # 2) Clanname-ROI
+        roi_clan = pick_roi(
+            f"ROI: Clanname{suffix}",
+            img,
+            f"Ziehe ein Rechteck NUR um den CLANNAMEN{suffix} und druecke ENTER"
+        )
+        picked.append(RoiGroup(label, roi_name, roi_clan))
+
+    groups_to_config(picked, cfg)
+    with open(conf_path, "w", encoding="utf-8") as f:
+        json.dump(cfg, f, indent=2)
+    return cfg
 
-    cfg = {
-        "roi_name": [int(v) for v in roi_name],
-        "roi_clan": [int(v) for v in roi_clan],
-    }
 
-    with open(CONF_PATH, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=2)
+def main():
+    ap = argparse.ArgumentParser(description="ROIs für Spielername/Clan festlegen")
+    ap.add_argument("-n", "--groups", type=int, default=None, help="Anzahl Gegner-Gruppen (Standard: wie bisher, sonst 1)")
+    ap.add_argument("--labels", default="", help="Namen der Gruppen, kommagetrennt (z. B. 'Links,Rechts')")
+    args = ap.parse_args()
+    labels = [x.strip() for x in args.labels.split(",") if x.strip()]
+    try:
+        cfg = calibrate(groups=args.groups or (len(labels) or None), labels=labels)
+    except CalibrationCancelled as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
 
     print("✅ Gespeichert:", os.path.abspath(CONF_PATH))
-    print("   roi_name:", cfg["roi_name"])
-    print("   roi_clan:", cfg["roi_clan"])
+    for g in cfg["roi_groups"]:
+        print(f"   {g['label']}: roi_name={g['roi_name']} roi_clan={g['roi_clan']}")
 
 
 if __name__ == "__main__":
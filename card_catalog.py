@@ -0,0 +1,162 @@
+# card_catalog.py
+"""
+Start-Warmup: Kartenkatalog (/cards) + vorgerenderter Icon-Atlas.
+- Katalog einmal laden → CardRegistry in fester Reihenfolge vorbelegen
+- alle Karten-Icons parallel in den Platten-Cache des IconLoaders holen
+- in den drei UI-Größen (ATLAS_SIZES) skalieren und je Größe als ein Atlas-PNG ablegen
+  (icon_cache/atlas_<w>x<h>.png + atlas.json mit der URL-Reihenfolge)
+Beim nächsten Start reicht das Einlesen der Atlanten – kein Netz, keine Einzeldateien.
+Alle Bilder werden im IconLoader fest gehalten (pin), show_deck/Historie treffen dann sofort.
+"""
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+import metrics
+from cr_api import ClashAPI, _find_icon_url
+from deck_bits import CARD_REGISTRY, CardRegistry, card_key
+from icon_loader import IconLoader
+
+# Größen wie im UI: aktuelles Deck, Historienzeilen, Lieblingskarte
+ATLAS_SIZES: Tuple[Tuple[int, int], ...] = ((120, 144), (72, 86), (54, 64))
+ATLAS_COLUMNS = 16
+ATLAS_WORKERS = 8
+
+Progress = Callable[[int, int, str], None]
+
+
+def _atlas_path(cache_dir: str, size: Tuple[int, int]) -> str:
+    return os.path.join(cache_dir, f"atlas_{size[0]}x{size[1]}.png")
+
+
+class CatalogWarmup(threading.Thread):
+    """
+    api: ClashAPI (Katalog), icons: IconLoader (Platten-Cache + Ziel für die Atlas-Bilder)
+    on_progress(done, total, phase): z. B. UI-Queue; phase ∈ {'katalog', 'atlas', 'icons', 'fertig'}
+    """
+
+    def __init__(
+        self,
+        api: ClashAPI,
+        icons: IconLoader,
+        registry: CardRegistry = CARD_REGISTRY,
+        sizes: Tuple[Tuple[int, int], ...] = ATLAS_SIZES,
+        workers: int = ATLAS_WORKERS,
+        on_progress: Optional[Progress] = None,
+    ):
+        super().__init__(daemon=True)
+        self.api = api
+        self.icons = icons
+        self.registry = registry
+        self.sizes = tuple(sizes)
+        self.workers = max(1, workers)
+        self.on_progress = on_progress or (lambda done, total, phase: None)
+        self.stop_ev = threading.Event()
+        self.meta_path = os.path.join(icons.cache_dir, "atlas.json")
+
+    def stop(self) -> None:
+        self.stop_ev.set()
+
+    def run(self):
+        try:
+            with metrics.span("warmup.catalog"):
+                self.warm()
+        except Exception as e:
+            self.on_progress(0, 0, f"fehlgeschlagen: {e}")
+
+    def warm(self) -> int:
+        """Katalog laden, Atlas einlesen bzw. neu bauen; Rückgabe: Anzahl Icons im Atlas."""
+        self.on_progress(0, 0, "katalog")
+        items = self.api.get_cards().get("items", [])
+        self.registry.seed(k for k in map(card_key, items) if k is not None)
+        urls = sorted({u for u in map(_find_icon_url, items) if u})
+
+        if self.load_atlas(urls):
+            self.on_progress(len(urls), len(urls), "fertig")
+            return len(urls)
+        return self.build_atlas(urls)
+
+    # ---- Atlas ----
+    def load_atlas(self, urls: List[str]) -> bool:
+        """Vorhandenen Atlas einlesen und pinnen – nur wenn er alle Katalog-URLs abdeckt."""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        order: List[str] = meta.get("urls") or []
+        if not set(urls) <= set(order) or [list(s) for s in self.sizes] != meta.get("sizes"):
+            return False
+        self.on_progress(0, len(order), "atlas")
+        with metrics.span("warmup.atlas_load"):
+            for size in self.sizes:
+                try:
+                    sheet = Image.open(_atlas_path(self.icons.cache_dir, size))
+                    sheet.load()
+                except OSError:
+                    return False
+                for i, url in enumerate(order):
+                    self.icons.pin(url, size, sheet.crop(self._tile(i, size)))
+        return True
+
+    def build_atlas(self, urls: List[str]) -> int:
+        total = len(urls)
+        tiles: Dict[str, Dict[Tuple[int, int], Image.Image]] = {}
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="atlas") as ex:
+            futs = {ex.submit(self._render, u): u for u in urls}
+            for f in as_completed(futs):
+                if self.stop_ev.is_set():
+                    ex.shutdown(wait=False, cancel_futures=True)
+                    return 0
+                done += 1
+                res = f.result()
+                if res is not None:
+                    url = futs[f]
+                    tiles[url] = res
+                    for size, im in res.items():
+                        self.icons.pin(url, size, im)
+                if done % 8 == 0 or done == total:
+                    self.on_progress(done, total, "icons")
+        self.icons.save_index()
+
+        order = [u for u in urls if u in tiles]
+        if order:
+            self._save_atlas(order, tiles)
+        self.on_progress(len(order), total, "fertig")
+        return len(order)
+
+    def _render(self, url: str) -> Optional[Dict[Tuple[int, int], Image.Image]]:
+        try:
+            base = Image.open(io.BytesIO(self.icons.original_bytes(url))).convert("RGBA")
+        except Exception:
+            metrics.inc("icon_error")
+            return None
+        return {size: base.resize(size, Image.LANCZOS) for size in self.sizes}
+
+    def _tile(self, i: int, size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        w, h = size
+        x, y = (i % ATLAS_COLUMNS) * w, (i // ATLAS_COLUMNS) * h
+        return x, y, x + w, y + h
+
+    def _save_atlas(self, order: List[str], tiles: Dict[str, Dict[Tuple[int, int], Image.Image]]) -> None:
+        rows = (len(order) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+        try:
+            for size in self.sizes:
+                sheet = Image.new("RGBA", (ATLAS_COLUMNS * size[0], rows * size[1]), (0, 0, 0, 0))
+                for i, url in enumerate(order):
+                    sheet.paste(tiles[url][size], self._tile(i, size)[:2])
+                path = _atlas_path(self.icons.cache_dir, size)
+                sheet.save(f"{path}.tmp", format="PNG")
+                os.replace(f"{path}.tmp", path)
+            tmp = f"{self.meta_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"sizes": [list(s) for s in self.sizes], "urls": order}, f)
+            os.replace(tmp, self.meta_path)
+        except OSError:
+            pass  # Atlas ist nur Beschleunigung – beim nächsten Start neu bauen
@@ -1,9 +1,17 @@
 # cr_api.py
 import time
 import httpx
+import threading
 import unicodedata
-import difflib
-from typing import Any, Dict, List, Tuple, Optional
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple, Optional
+
+import cr_models
+import game_modes
+import http_pool
+import metrics
+from deck_bits import card_key, deck_mask, keys_mask, mask_similarity
 
 CLASH_BASE = "https://api.clashroyale.com/v1"
 
@@ -18,41 +26,290 @@ def _norm(s: str) -> str:
     return s.lower().strip()
 
 
-def _best_name_match(candidates: List[str], query: str) -> Optional[str]:
-    """Exakt → sonst fuzzy best match über difflib."""
-    qn = _norm(query)
-    exact = [c for c in candidates if _norm(c) == qn]
-    if exact:
-        return exact[0]
-    if not candidates:
+def _best_name_match(candidates: List[str], query: str, min_score: float = 0.0) -> Optional[str]:
+    """Exakt → sonst OCR-toleranter best match (None, wenn unter min_score)."""
+    name, score = NameIndex(candidates).best(query)
+    if name is None or score < min_score:
         return None
-    return difflib.get_close_matches(query, candidates, n=1, cutoff=0.0)[0]
+    return name
+
+
+# ------------------------ OCR-tolerantes Namens-Matching ----------------------
+# Typische Tesseract-Verwechslungen (nach _norm, also klein geschrieben).
+# Zeichen einer Gruppe kosten beim Ersetzen nur _CONFUSION_COST statt 1.0.
+_CONFUSION_GROUPS = ("0o", "1il|!", "5s", "8b", "2z", "9g")
+# Mehrzeichen-Verwechslungen: zwei Zeichen werden als eines gelesen (oder umgekehrt)
+_CONFUSION_MULTI = {"rn": "m", "vv": "w", "cl": "d"}
+_CONFUSION_COST = 0.25
+
+_CONFUSION_CLASS: Dict[str, str] = {c: g[0] for g in _CONFUSION_GROUPS for c in g}
+
+# Unter diesem Score gilt ein Treffer als geraten und wird verworfen
+NAME_MATCH_MIN_SCORE = 0.6
+
+
+def _match_key(s: str) -> str:
+    """Vergleichs-Key: normalisiert, ohne Whitespace (OCR verschluckt Leerzeichen gern)."""
+    return "".join(_norm(s).split())
+
+
+def _skeleton(key: str) -> str:
+    """Faltet Verwechslungen auf einen Repräsentanten (Basis für die N-Gramm-Vorauswahl)."""
+    for multi, single in _CONFUSION_MULTI.items():
+        key = key.replace(multi, single)
+    return "".join(_CONFUSION_CLASS.get(c, c) for c in key)
+
+
+def _bigrams(s: str) -> set:
+    s = f"^{s}$"
+    return {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+def _ocr_distance(a: str, b: str) -> float:
+    """Levenshtein-Distanz mit reduzierten Kosten für typische OCR-Verwechslungen."""
+    la, lb = len(a), len(b)
+    prev2: List[float] = []
+    prev = [float(j) for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        ka = _CONFUSION_CLASS.get(ca, ca)
+        cur = [float(i)] + [0.0] * lb
+        for j in range(1, lb + 1):
+            cb = b[j - 1]
+            if ca == cb:
+                sub = 0.0
+            elif ka == _CONFUSION_CLASS.get(cb, cb):
+                sub = _CONFUSION_COST
+            else:
+                sub = 1.0
+            d = min(prev[j] + 1.0, cur[j - 1] + 1.0, prev[j - 1] + sub)
+            # "rn" ↔ "m" usw. in beide Richtungen
+            if i >= 2 and _CONFUSION_MULTI.get(a[i - 2:i]) == cb:
+                d = min(d, prev2[j - 1] + _CONFUSION_COST)
+            if j >= 2 and _CONFUSION_MULTI.get(b[j - 2:j]) == ca:
+                d = min(d, prev[j - 2] + _CONFUSION_COST)
+            cur[j] = d
+        prev2, prev = prev, cur
+    return prev[lb]
+
+
+def _ocr_score(a: str, b: str) -> float:
+    """Auf die Namenslänge normierter Score: 1.0 = identisch, 0.0 = nichts gemeinsam."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if not longest:
+        return 0.0
+    return max(0.0, 1.0 - _ocr_distance(a, b) / longest)
+
+
+# Ersetzungen für alternative Schreibweisen einer OCR-Anfrage (z. B. Clan-Suche)
+_OCR_SWAPS = (("0", "O"), ("1", "l"), ("1", "I"), ("|", "l"), ("5", "S"), ("8", "B"),
+              ("rn", "m"), ("vv", "w"), ("I", "l"), ("l", "I"))
+
+
+def ocr_variants(text: str, limit: int = 3) -> List[str]:
+    """Bis zu `limit` alternative Schreibweisen (0→O, 1→l, rn→m, …), ohne das Original."""
+    seen = {_match_key(text)}
+    out: List[str] = []
+    for src, dst in _OCR_SWAPS:
+        if len(out) >= limit:
+            break
+        if src not in text:
+            continue
+        v = text.replace(src, dst)
+        k = _match_key(v)
+        if k not in seen:
+            seen.add(k)
+            out.append(v)
+    return out
+
+
+class NameIndex:
+    """
+    Vorberechneter, OCR-toleranter Suchindex über eine Namensliste (z. B. ein Clan-Roster).
+    - Bigramm-Postings über die gefalteten Namen → nur wenige Kandidaten werden genau verglichen
+    - Score über verwechslungsgewichtete Editierdistanz, längennormiert (0.0–1.0),
+      damit ein fester Schwellwert (NAME_MATCH_MIN_SCORE) für kurze und lange Namen passt
+    """
+
+    def __init__(self, names: Iterable[str], max_candidates: int = 12):
+        self.names: List[str] = list(names)
+        self.max_candidates = max_candidates
+        self._keys = [_match_key(n) for n in self.names]
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._keys):
+            self._exact.setdefault(key, i)
+            for bg in _bigrams(_skeleton(key)):
+                self._postings.setdefault(bg, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _candidates(self, qkey: str) -> List[int]:
+        hits: Dict[int, int] = {}
+        for bg in _bigrams(_skeleton(qkey)):
+            for i in self._postings.get(bg, ()):
+                hits[i] = hits.get(i, 0) + 1
+        if not hits:
+            return list(range(len(self.names)))
+        # Kandidaten mit weniger als der Hälfte der besten Überlappung lohnen keinen DP-Vergleich
+        floor = max(hits.values()) / 2.0
+        ranked = sorted((i for i in hits if hits[i] >= floor), key=lambda i: (-hits[i], i))
+        return ranked[: self.max_candidates]
+
+    def lookup(self, query: str, n: int = 1) -> List[Tuple[int, str, float]]:
+        """Bis zu n beste Treffer als (position, name, score), bester zuerst."""
+        qkey = _match_key(query)
+        if not self.names or not qkey:
+            return []
+        exact = self._exact.get(qkey)
+        if exact is not None and n == 1:
+            return [(exact, self.names[exact], 1.0)]
+        cands = self._candidates(qkey)
+        if exact is not None and exact not in cands:
+            cands.insert(0, exact)
+        scored = [(i, self.names[i], _ocr_score(qkey, self._keys[i])) for i in cands]
+        scored.sort(key=lambda t: (-t[2], t[0]))
+        return scored[:n]
+
+    def best(self, query: str) -> Tuple[Optional[str], float]:
+        """Bester Treffer als (name, score); (None, 0.0) bei leerem Index/leerer Anfrage."""
+        hits = self.lookup(query, n=1)
+        if not hits:
+            return None, 0.0
+        _, name, score = hits[0]
+        return name, score
+
+
+# ------------------------- Antwort-Cache / Rate-Limit -------------------------
+# Standard-Lebensdauer je Endpunkt (Sekunden). Spieler kurz, damit currentDeck frisch bleibt.
+CACHE_TTL = {
+    "search": 900.0, "clan": 900.0, "members": 900.0, "roster": 900.0,
+    "player": 120.0, "battlelog": 300.0, "cards": 86400.0,
+}
+
+
+class ResponseCache:
+    """
+    Thread-sicherer TTL-Cache für API-Antworten, teilbar zwischen mehreren ClashAPI-Instanzen.
+    put(..., ttl=…) überschreibt die Lebensdauer eines Eintrags (z. B. fürs Prewarming,
+    dessen Einträge bis zum nächsten Durchlauf halten sollen).
+    """
+
+    def __init__(self, ttl: Optional[Dict[str, float]] = None, max_entries: int = 20000):
+        self.ttl = dict(CACHE_TTL, **(ttl or {}))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[Tuple[str, str], Tuple[float, Any]] = {}  # → (läuft ab um, Wert)
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> Any:
+        with self._lock:
+            hit = self._data.get((kind, key))
+            if hit is not None and time.monotonic() < hit[0]:
+                self.hits += 1
+                return hit[1]
+            self.misses += 1
+            return None
+
+    def put(self, kind: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                # Die am frühesten ablaufende Hälfte verwerfen – selten, hält den Speicher begrenzt
+                for k, _ in sorted(self._data.items(), key=lambda kv: kv[1][0])[: self.max_entries // 2]:
+                    del self._data[k]
+            life = self.ttl.get(kind, 0.0) if ttl is None else ttl
+            self._data[(kind, key)] = (time.monotonic() + life, value)
+
+
+class RateLimiter:
+    """
+    Token-Bucket für API-Requests mit zwei Prioritäten.
+    Hintergrund-Requests (z. B. Prewarming) bekommen nur Tokens, solange mehr als `reserve`
+    übrig sind – Vordergrund-Lookups finden also immer freie Kapazität vor.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 20.0, reserve: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1.0)
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, background: bool = False) -> None:
+        floor = 1.0 + (self.reserve if background else 0.0)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= floor:
+                    self._tokens -= 1.0
+                    return
+                wait = (floor - self._tokens) / self.rate
+            time.sleep(wait)
 
 
 # --------------------------------- API-Client --------------------------------
 class ClashAPI:
     """
     Leichter Wrapper um die Clash Royale API.
-    - Persistent httpx.Client mit base_url (vermeidet 'missing protocol'-Fehler)
+    - Persistent httpx.Client mit base_url (vermeidet 'missing protocol'-Fehler), standardmäßig
+      auf dem prozessweiten Verbindungspool (http_pool, HTTP/2); pool=None → eigener Client
     - Cache-Busting via ts=... (Millis)
     - Simple Retry bei 429/5xx
+    - Clan-Roster inkl. NameIndex werden pro Clan kurz zwischengespeichert
+    - typed=True: Spieler/Battlelog/Mitglieder kommen als slotted Structs (cr_models)
+      statt als verschachtelte dicts – schneller mit msgspec, deutlich weniger RAM
+    - optional geteilter ResponseCache und RateLimiter; background=True für Hintergrundjobs
+    - cache_ttl: eigene Lebensdauer (je Endpunkt) für Einträge, die dieser Client schreibt
+    - base_url auf einen DeckFinder-Dienst (server.py) zeigen lassen → gleiche Endpunkte,
+      aber geteilter Cache/Rate-Limit/Historie über alle Clients
     """
 
-    def __init__(self, token: str, timeout: float = 15.0):
+    def __init__(
+        self,
+        token: str,
+        timeout: float = 15.0,
+        roster_ttl: float = 300.0,
+        typed: bool = False,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        background: bool = False,
+        base_url: str = CLASH_BASE,
+        pool: Optional[http_pool.HttpPool] = http_pool.POOL,
+        cache_ttl: Optional[Dict[str, float]] = None,
+    ):
         self.timeout = timeout
-        self.client = httpx.Client(
-            base_url=CLASH_BASE,
-            timeout=timeout,
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/json",
-                "Cache-Control": "no-store, max-age=0",
-                "Pragma": "no-cache",
-                "User-Agent": "deckfinder/1.0",
-            },
-        )
+        self.typed = typed
+        self.cache = cache
+        self.limiter = limiter
+        self.background = background
+        self.cache_ttl = dict(cache_ttl or {})
+        self.roster_ttl = roster_ttl
+        self._rosters: Dict[str, Tuple[float, List[Dict[str, Any]], NameIndex]] = {}
+        self._roster_lock = threading.Lock()
+        headers = {
+            "Accept": "application/json",
+            "Cache-Control": "no-store, max-age=0",
+            "Pragma": "no-cache",
+            "User-Agent": "deckfinder/1.0",
+        }
+        if token:  # beim lokalen Dienst: DECKFINDER_SERVICE_TOKEN (oder keiner)
+            headers["Authorization"] = f"Bearer {token}"
+        self._own_client = pool is None
+        if pool is None:
+            self.client = httpx.Client(base_url=base_url, timeout=timeout, headers=headers)
+        else:
+            self.client = pool.client(base_url=base_url, headers=headers, timeout=timeout)
 
     def close(self) -> None:
+        if not self._own_client:
+            return  # geteilter Transport – schließt http_pool.POOL.close()
         try:
             self.client.close()
         except Exception:
@@ -67,7 +324,7 @@ class ClashAPI:
     def _player_path(player_tag: str) -> str:
         return f"/players/%23{player_tag.lstrip('#').upper()}"
 
-    def _get(self, path_or_url: str, params: Optional[Dict[str, Any]] = None, cache_bust: bool = True) -> Any:
+    def _request(self, path_or_url: str, params: Optional[Dict[str, Any]] = None, cache_bust: bool = True) -> httpx.Response:
         """
         GET mit optionalem Cache-Busting & einfachem Retry.
         `path_or_url` kann relativer Pfad (nutzt base_url) oder volle URL sein.
@@ -76,27 +333,93 @@ class ClashAPI:
         if cache_bust:
             p["ts"] = int(time.time() * 1000)
 
+        if self.limiter is not None:
+            with metrics.span("ratelimit.wait"):
+                self.limiter.acquire(self.background)
         r = self.client.get(path_or_url, params=p)
         if r.status_code in (429, 500, 502, 503, 504):
+            metrics.inc(f"http_retry.{r.status_code}")
             time.sleep(1.0)
+            if self.limiter is not None:
+                self.limiter.acquire(self.background)
             r = self.client.get(path_or_url, params=p)
 
         r.raise_for_status()
+        return r
+
+    def _get(self, path_or_url: str, params: Optional[Dict[str, Any]] = None, cache_bust: bool = True) -> Any:
         # Einige Endpunkte liefern Listen (z. B. battlelog), andere Dicts → Any zurückgeben
-        return r.json()
+        return self._request(path_or_url, params, cache_bust).json()
+
+    def _get_typed(self, path_or_url: str, decode) -> Any:
+        """Rohe Bytes direkt in cr_models-Structs dekodieren (ohne dict-Zwischenschritt)."""
+        return decode(self._request(path_or_url).content)
+
+    def _fetch(self, kind: str, path: str, decode=None, params: Optional[Dict[str, Any]] = None, refresh: bool = False) -> Any:
+        """GET über den (optionalen) ResponseCache; refresh=True lädt neu und aktualisiert den Cache."""
+        key = path if not params else f"{path}?{sorted(params.items())}"
+        if self.cache is not None and not refresh:
+            hit = self.cache.get(kind, key)
+            if hit is not None:
+                metrics.inc(f"cache_hit.{kind}")
+                return hit
+            metrics.inc(f"cache_miss.{kind}")
+        with metrics.span(f"api.{kind}"):
+            if self.typed and decode is not None:
+                val = self._get_typed(path, decode)
+            else:
+                val = self._get(path, params=params)
+        if self.cache is not None:
+            self.cache.put(kind, key, val, self.cache_ttl.get(kind))
+        return val
 
     # ---- Endpunkte ----
-    def search_clans(self, name: str, limit: int = 20) -> Dict[str, Any]:
-        return self._get("/clans", params={"name": name, "limit": limit})
+    def search_clans(self, name: str, limit: int = 20, refresh: bool = False) -> Dict[str, Any]:
+        return self._fetch("search", "/clans", params={"name": name, "limit": limit}, refresh=refresh)
+
+    def get_clan(self, clan_tag: str, refresh: bool = False) -> Dict[str, Any]:
+        return self._fetch("clan", self._clan_path(clan_tag), refresh=refresh)
 
-    def get_clan_members(self, clan_tag: str) -> Dict[str, Any]:
-        return self._get(self._clan_path(clan_tag, "/members"))
+    def get_clan_members(self, clan_tag: str, refresh: bool = False) -> Dict[str, Any]:
+        return self._fetch("members", self._clan_path(clan_tag, "/members"), cr_models.decode_clan_members, refresh=refresh)
 
-    def get_player(self, player_tag: str) -> Dict[str, Any]:
-        return self._get(self._player_path(player_tag))
+    def get_player(self, player_tag: str, refresh: bool = False) -> Dict[str, Any]:
+        return self._fetch("player", self._player_path(player_tag), cr_models.decode_player, refresh=refresh)
+
+    def get_battlelog(self, player_tag: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        return self._fetch(
+            "battlelog", self._player_path(player_tag) + "/battlelog", cr_models.decode_battlelog, refresh=refresh
+        )
 
-    def get_battlelog(self, player_tag: str) -> List[Dict[str, Any]]:
-        return self._get(self._player_path(player_tag) + "/battlelog")
+    def get_cards(self, refresh: bool = False) -> Dict[str, Any]:
+        """Kartenkatalog ({'items': [...], 'supportItems': [...]}) – ändert sich nur mit Updates."""
+        return self._fetch("cards", "/cards", refresh=refresh)
+
+    def get_clan_roster(self, clan_tag: str, refresh: bool = False) -> Tuple[List[Dict[str, Any]], NameIndex]:
+        """
+        Mitgliederliste + vorberechneter NameIndex (gecacht für roster_ttl Sekunden;
+        mit geteiltem ResponseCache auch über ClashAPI-Instanzen hinweg).
+        """
+        key = clan_tag.lstrip("#").upper()
+        now = time.monotonic()
+        if not refresh:
+            if self.cache is not None:
+                hit = self.cache.get("roster", key)
+            else:
+                with self._roster_lock:
+                    hit = self._rosters.get(key)
+                hit = hit[1:] if hit and now - hit[0] < self.roster_ttl else None
+            if hit:
+                return hit[0], hit[1]
+
+        items = self.get_clan_members(key, refresh=refresh).get("items", [])
+        index = NameIndex(m.get("name", "") for m in items)
+        if self.cache is not None:
+            self.cache.put("roster", key, (items, index), self.cache_ttl.get("roster"))
+        else:
+            with self._roster_lock:
+                self._rosters[key] = (now, items, index)
+        return items, index
 
 
 # ----------------------------- Resolver/Formatter -----------------------------
@@ -121,24 +444,104 @@ def resolve_clan_tag_by_name(api: ClashAPI, clan_name: str) -> Tuple[Optional[st
     return (tag if tag else None), suggestions, disp
 
 
-def resolve_player_tag_in_clan(api: ClashAPI, clan_tag: str, player_name: str) -> Tuple[Optional[str], List[str], str]:
+def match_player_in_clan(api: ClashAPI, clan_tag: str, player_name: str) -> Tuple[Optional[Dict[str, Any]], float, List[str]]:
     """
-    Findet den Player-Tag in einem Clan über den (ggf. fuzzy) Spielernamen.
-    Rückgabe: (player_tag, namensvorschlaege, display_name)
+    Bestes Clan-Mitglied zum (ggf. OCR-verrauschten) Spielernamen.
+    Rückgabe: (mitglied, score, namensliste) – mitglied None bei leerem Clan.
     """
-    members = api.get_clan_members(clan_tag)
-    items = members.get("items", [])
+    items, index = api.get_clan_roster(clan_tag)
     if not items:
-        return None, [], ""
+        return None, 0.0, []
+    hits = index.lookup(player_name, n=1)
+    if not hits:
+        return None, 0.0, index.names
+    pos, _, score = hits[0]
+    return items[pos], score, index.names
+
 
-    names = [m.get("name", "") for m in items]
-    best_name = _best_name_match(names, player_name)
-    if not best_name:
+def resolve_player_tag_in_clan(
+    api: ClashAPI, clan_tag: str, player_name: str, min_score: float = NAME_MATCH_MIN_SCORE
+) -> Tuple[Optional[str], List[str], str]:
+    """
+    Findet den Player-Tag in einem Clan über den (ggf. fuzzy) Spielernamen.
+    Treffer unter min_score werden verworfen (spart einen sinnlosen get_player-Call).
+    Rückgabe: (player_tag, namensvorschlaege, display_name)
+    """
+    m, score, names = match_player_in_clan(api, clan_tag, player_name)
+    if m is None or score < min_score:
         return None, names[:10], ""
 
-    m = next(m for m in items if m.get("name", "") == best_name)
     tag = (m.get("tag") or "").lstrip("#").upper()
-    return (tag if tag else None), names[:10], best_name
+    return (tag if tag else None), names[:10], m.get("name", "")
+
+
+def resolve_player_across_clans(
+    api: ClashAPI,
+    clan_name: str,
+    player_name: str,
+    k: int = 5,
+    variants: int = 3,
+    min_score: float = NAME_MATCH_MIN_SCORE,
+) -> Tuple[Optional[str], Optional[str], str, str, List[str]]:
+    """
+    Fan-out-Variante von resolve_clan_tag_by_name + resolve_player_tag_in_clan.
+    1. Clan-Suche für den OCR-Text und seine OCR-Varianten – parallel
+    2. Mitgliederlisten der k plausibelsten Clans – parallel
+    3. Gewinner ist der Clan mit dem besten Spieler-Match
+    Kostet damit zwei parallele statt k sequenzieller Round-Trips.
+    Rückgabe: (player_tag, clan_tag, player_display, clan_display, vorschlaege)
+    """
+    alts = ocr_variants(clan_name, limit=variants)
+    with ThreadPoolExecutor(max_workers=max(k, 1 + len(alts))) as ex:
+        primary = ex.submit(api.search_clans, clan_name, 20)
+        alt_futs = [ex.submit(_search_items, api, q) for q in alts]
+        # Fehler der Hauptsuche durchreichen, Varianten sind best effort
+        results = [primary.result().get("items", [])] + [f.result() for f in alt_futs]
+        if not any(results):
+            return None, None, "", "", []
+
+        clans: Dict[str, Dict[str, Any]] = {}
+        for items in results:
+            for c in items:
+                tag = (c.get("tag") or "").lstrip("#").upper()
+                if tag:
+                    clans.setdefault(tag, c)
+
+        # Clan-Kandidaten: Namensähnlichkeit zur OCR-Anfrage, dann Mitgliederzahl
+        qkey = _match_key(clan_name)
+        ranked = sorted(
+            clans.items(),
+            key=lambda kv: (-_ocr_score(qkey, _match_key(kv[1].get("name", ""))), -int(kv[1].get("members") or 0)),
+        )[:k]
+        suggestions = [f"{c.get('name','?')} ({c.get('tag','?')})" for _, c in ranked[:5]]
+
+        def probe(tag: str) -> Tuple[Optional[Dict[str, Any]], float]:
+            try:
+                m, score, _ = match_player_in_clan(api, tag, player_name)
+            except Exception:
+                return None, 0.0
+            return m, score
+
+        probes = list(ex.map(probe, [tag for tag, _ in ranked]))
+
+    best_i = max(range(len(ranked)), key=lambda i: probes[i][1], default=None)
+    if best_i is None:
+        return None, None, "", "", suggestions
+    m, score = probes[best_i]
+    ctag, clan = ranked[best_i]
+    if m is None or score < min_score:
+        return None, ctag, "", clan.get("name", "?"), suggestions
+
+    ptag = (m.get("tag") or "").lstrip("#").upper()
+    return (ptag or None), ctag, m.get("name", ""), clan.get("name", "?"), suggestions
+
+
+def _search_items(api: ClashAPI, name: str) -> List[Dict[str, Any]]:
+    """Clan-Suche, die bei Fehlern (z. B. ungültige Variante) leer statt mit Exception endet."""
+    try:
+        return api.search_clans(name, limit=20).get("items", [])
+    except Exception:
+        return []
 
 
 def fmt_player_deck(player_payload: Dict[str, Any], clan_name: Optional[str] = None) -> str:
@@ -167,22 +570,28 @@ def _norm_tag(tag: str) -> str:
     return (tag or "").strip().upper().lstrip("#")
 
 
+def battle_time_epoch(battle_time: str) -> float:
+    """battleTime der API ('20240131T184512.000Z') → Unix-Zeit; 0.0 wenn unlesbar."""
+    try:
+        dt = datetime.strptime(battle_time or "", "%Y%m%dT%H%M%S.%fZ")
+    except ValueError:
+        return 0.0
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
 def _deck_keys(deck_cards: List[Dict[str, Any]]) -> List[str]:
     """Extrahiert robuste Karten-Keys pro Karte (id/key/name), lower-case."""
     keys: List[str] = []
     for c in deck_cards or []:
-        cid = c.get("id") or c.get("key") or c.get("name")
-        if cid is not None:
-            keys.append(str(cid).lower())
+        k = card_key(c)
+        if k is not None:
+            keys.append(k)
     return keys
 
 
 def _deck_similarity(cur_keys: List[str], hist_keys: List[str]) -> float:
     """Anteil gleicher Karten bezogen auf 8 Slots (0.0–1.0)."""
-    if not cur_keys or not hist_keys:
-        return 0.0
-    a, b = set(cur_keys), set(hist_keys)
-    return len(a & b) / 8.0
+    return mask_similarity(keys_mask(cur_keys), keys_mask(hist_keys))
 
 
 def extract_player_cards_from_battle(battle: Dict[str, Any], player_tag: str) -> List[Dict[str, Any]]:
@@ -213,10 +622,10 @@ def deck_match_report(current_deck: List[Dict[str, Any]], recent_decks_keys: Lis
     recent_decks_keys: Liste von Key-Listen, wie von last_n_decks_from_battlelog()
     Rückgabe: {'count', 'avg', 'best', 'exact'}
     """
-    cur = _deck_keys(current_deck)
+    cur = deck_mask(current_deck)
     if not recent_decks_keys:
         return {"count": 0, "avg": 0.0, "best": 0.0, "exact": 0}
-    sims = [_deck_similarity(cur, hist) for hist in recent_decks_keys]
+    sims = [mask_similarity(cur, keys_mask(hist)) for hist in recent_decks_keys]
     exact = sum(1 for s in sims if s >= 0.999)
     return {
         "count": len(sims),
@@ -224,3 +633,108 @@ def deck_match_report(current_deck: List[Dict[str, Any]], recent_decks_keys: Lis
         "best": max(sims) if sims else 0.0,
         "exact": exact,
     }
+
+
+# ------------------- Ladder/Ranked PvP Filter + Stats -------------------------
+def _is_ranked_or_trophy_pvp_1v1(b: Dict[str, Any]) -> bool:
+    """
+    True für Trophäenpfad/Ranked 1v1 (game_modes: Kategorie ladder/ranked):
+    - kein Draft/Megadraft, kein 2v2
+    - keine Friendlies, keine Challenges, kein Clanwar
+    """
+    return game_modes.classify(b) in game_modes.LADDER_CATEGORIES
+
+
+def _avg_elixir(deck: List[Dict[str, Any]]) -> float:
+    costs = []
+    for c in deck or []:
+        v = c.get("elixirCost", c.get("elixir"))
+        if isinstance(v, (int, float)):
+            costs.append(float(v))
+    return round(sum(costs) / len(costs), 1) if costs else 0.0
+
+
+def _four_card_cycle(deck: List[Dict[str, Any]]) -> int:
+    costs = []
+    for c in deck or []:
+        v = c.get("elixirCost", c.get("elixir"))
+        if isinstance(v, (int, float)):
+            costs.append(float(v))
+    costs.sort()
+    return int(round(sum(costs[:4]))) if len(costs) >= 4 else 0
+
+
+def _favorite_card(player: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    fav = player.get("currentFavouriteCard")
+    if fav:
+        return fav
+    deck = player.get("currentDeck") or []
+    return deck[0] if deck else None
+
+
+def _find_icon_url(card_obj: Dict[str, Any]) -> Optional[str]:
+    icon = (card_obj or {}).get("iconUrls") or {}
+    for k in ("medium", "evolutionMedium", "evolutionSmall", "large", "small"):
+        if icon.get(k):
+            return icon[k]
+    return None
+
+
+def _pvp_stats_last_n(battles: List[Dict[str, Any]], n: int = 10) -> Tuple[int, int, float, int, int]:
+    """Gibt (wins, losses, wr, crowns_for, crowns_against) über die letzten n Ladder-PvP zurück."""
+    wins = losses = crowns_for = crowns_against = 0
+    for b in battles[:n]:
+        t = (b.get("team") or [{}])[0]
+        o = (b.get("opponent") or [{}])[0]
+        cf = int(t.get("crowns", 0))
+        ca = int(o.get("crowns", 0))
+        crowns_for += cf
+        crowns_against += ca
+        if cf > ca:
+            wins += 1
+        elif cf < ca:
+            losses += 1
+    total = wins + losses
+    wr = (wins / total) if total else 0.0
+    return wins, losses, wr, crowns_for, crowns_against
+
+
+def ladder_report(
+    player: Dict[str, Any],
+    battles: List[Dict[str, Any]],
+    n: int = 10,
+    categories: FrozenSet[str] = game_modes.LADDER_CATEGORIES,
+) -> Dict[str, Any]:
+    """
+    Auswertung wie im UI-Panel: letzte n Ladder/Ranked-1v1-Decks (bzw. Kämpfe der gewählten
+    game_modes-Kategorien), Match-Quote zum aktuellen Deck und Kurzstatistik.
+    Rückgabe: {'ladder_battles', 'recent_cards', 'match', 'wins', 'losses', 'winrate',
+               'crowns_for', 'crowns_against', 'avg_elixir', 'four_card_cycle'}
+    """
+    tag = player.get("tag", "")
+    deck = player.get("currentDeck") or []
+    recent_cards: List[List[Dict[str, Any]]] = []
+    ladder_battles: List[Dict[str, Any]] = []
+    for b in battles:
+        if game_modes.classify(b) not in categories:
+            continue
+        ladder_battles.append(b)
+        cards = extract_player_cards_from_battle(b, tag)
+        if cards:
+            recent_cards.append(cards)
+        if len(recent_cards) >= n:
+            break
+
+    wins, losses, wr, cf, ca = _pvp_stats_last_n(ladder_battles, n=n)
+    return {
+        "ladder_battles": ladder_battles,
+        "recent_cards": recent_cards,
+        "match": deck_match_report(deck, [_deck_keys(rc) for rc in recent_cards]),
+        "wins": wins,
+        "losses": losses,
+        "winrate": wr,
+        "crowns_for": cf,
+        "crowns_against": ca,
+        "avg_elixir": _avg_elixir(deck),
+        "four_card_cycle": _four_card_cycle(deck),
+    }
@@ -0,0 +1,220 @@
+# cr_models.py
+"""
+Schlanke, typisierte Strukturen für API-Antworten – nur die Felder, die DeckFinder nutzt.
+- msgspec installiert → die Strukturen sind msgspec.Struct-Klassen, JSON wird direkt
+  (ohne Zwischen-dicts) in sie dekodiert – schneller als json.loads allein
+- sonst slotted dataclasses, orjson bzw. json + Konvertierung
+Alle Strukturen haben __slots__ und ein dict-kompatibles .get(), damit die bestehenden
+Helfer (extract_player_cards_from_battle, Ladder-Filter, Stats, UI) unverändert laufen.
+"""
+import dataclasses
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+HAVE_MSGSPEC = msgspec is not None
+
+
+if HAVE_MSGSPEC:
+    class _Struct(msgspec.Struct):
+        """Basis: erlaubt s.get('feld', default) wie bei den rohen API-dicts."""
+
+        def get(self, key: str, default: Any = None) -> Any:
+            return getattr(self, key, default)
+
+    def _struct(cls: type) -> type:
+        return cls  # msgspec.Struct ist schon slotted
+
+    def _list_field() -> Any:
+        return msgspec.field(default_factory=list)
+else:
+    class _Struct:
+        """Basis: erlaubt s.get('feld', default) wie bei den rohen API-dicts."""
+
+        __slots__ = ()
+
+        def get(self, key: str, default: Any = None) -> Any:
+            return getattr(self, key, default)
+
+    _struct = dataclass(slots=True)
+
+    def _list_field() -> Any:
+        return field(default_factory=list)
+
+
+# ---------------------------------- Strukturen --------------------------------
+@_struct
+class IconUrls(_Struct):
+    medium: Optional[str] = None
+    evolutionMedium: Optional[str] = None
+    evolutionSmall: Optional[str] = None
+    large: Optional[str] = None
+    small: Optional[str] = None
+
+
+@_struct
+class Card(_Struct):
+    id: Optional[int] = None
+    name: str = ""
+    level: Optional[int] = None
+    elixirCost: Optional[int] = None
+    evolutionLevel: Optional[int] = None
+    iconUrls: Optional[IconUrls] = None
+
+
+@_struct
+class GameMode(_Struct):
+    id: Optional[int] = None
+    name: str = ""
+
+
+@_struct
+class BattlePlayer(_Struct):
+    tag: str = ""
+    name: str = ""
+    crowns: int = 0
+    startingTrophies: Optional[int] = None
+    trophyChange: Optional[int] = None
+    cards: List[Card] = _list_field()
+
+
+@_struct
+class Battle(_Struct):
+    type: str = ""
+    battleTime: str = ""
+    gameMode: Optional[GameMode] = None
+    deckSelection: str = ""
+    challengeId: Optional[int] = None
+    challengeTitle: Optional[str] = None
+    isFriendly: Optional[bool] = None
+    team: List[BattlePlayer] = _list_field()
+    opponent: List[BattlePlayer] = _list_field()
+
+
+@_struct
+class ClanRef(_Struct):
+    tag: str = ""
+    name: str = ""
+
+
+@_struct
+class Player(_Struct):
+    tag: str = ""
+    name: str = ""
+    expLevel: Optional[int] = None
+    trophies: Optional[int] = None
+    bestTrophies: Optional[int] = None
+    role: Optional[str] = None
+    clan: Optional[ClanRef] = None
+    currentDeck: List[Card] = _list_field()
+    currentFavouriteCard: Optional[Card] = None
+
+
+@_struct
+class ClanMember(_Struct):
+    tag: str = ""
+    name: str = ""
+    role: Optional[str] = None
+    expLevel: Optional[int] = None
+    trophies: Optional[int] = None
+
+
+@_struct
+class ClanMemberList(_Struct):
+    items: List[ClanMember] = _list_field()
+
+
+# ------------------------- Fallback: dict → Struct ----------------------------
+_Conv = Optional[Callable[[Any], Any]]
+_SPECS: Dict[type, List[tuple]] = {}
+
+
+def _converter(tp: Any) -> _Conv:
+    """Konverter für einen Feldtyp; None = Wert unverändert übernehmen."""
+    origin = get_origin(tp)
+    if origin is Union:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        inner = _converter(args[0]) if len(args) == 1 else None
+        if inner is None:
+            return None
+        return lambda v: None if v is None else inner(v)
+    if origin is list:
+        inner = _converter(get_args(tp)[0])
+        if inner is None:
+            return lambda v: list(v or ())
+        return lambda v: [inner(x) for x in v or ()]
+    if isinstance(tp, type) and issubclass(tp, _Struct):
+        return lambda v: _build(tp, v)
+    return None
+
+
+def _spec(cls: type) -> List[tuple]:
+    spec = _SPECS.get(cls)
+    if spec is None:
+        hints = get_type_hints(cls)
+        names = getattr(cls, "__struct_fields__", None) or [f.name for f in dataclasses.fields(cls)]
+        spec = [(name, _converter(hints[name])) for name in names]
+        _SPECS[cls] = spec
+    return spec
+
+
+def _build(cls: type, obj: Dict[str, Any]) -> Any:
+    kwargs = {}
+    for name, conv in _spec(cls):
+        if name in obj:
+            v = obj[name]
+            kwargs[name] = conv(v) if conv is not None else v
+    return cls(**kwargs)
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# ---------------------------------- Decoder -----------------------------------
+class _Decoder:
+    def __init__(self, tp: Any):
+        self._fast = msgspec.json.Decoder(tp) if HAVE_MSGSPEC else None
+        self._conv = None if self._fast is not None else _converter(tp)
+
+    def __call__(self, raw: bytes) -> Any:
+        if self._fast is not None:
+            return self._fast.decode(raw)
+        return self._conv(_loads(raw))
+
+
+decode_player = _Decoder(Player)
+decode_battlelog = _Decoder(List[Battle])
+decode_clan_members = _Decoder(ClanMemberList)
+
+
+def to_dict(obj: Any) -> Any:
+    """Structs (auch in Listen/dicts verschachtelt) zurück in die API-dict-Form."""
+    if isinstance(obj, list):
+        return [to_dict(o) for o in obj]
+    if isinstance(obj, dict):
+        return {k: to_dict(v) for k, v in obj.items()}
+    if isinstance(obj, _Struct):
+        return msgspec.to_builtins(obj) if HAVE_MSGSPEC else dataclasses.asdict(obj)
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON-Bytes für dicts und Structs (msgspec kann Structs, orjson dataclasses direkt)."""
+    if HAVE_MSGSPEC:
+        return msgspec.json.encode(obj)
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(to_dict(obj), ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,191 @@
+# deck_bits.py
+"""
+Kompakte Deck-Darstellung für schnelle Vergleiche.
+- CardRegistry: jede Karte (id/key/name) bekommt einen dichten Bit-Index (0..127, bei Überlauf weiter)
+- Deck → 128-Bit-Maske (zwei uint64-Wörter); Ähnlichkeit/Schnittmengen = Popcount
+- Die Registry wird in card_registry.json abgelegt, damit Masken und Fingerprints
+  über Programmstarts hinweg stabil bleiben (Hashing, Dedup, gespeicherte Historie);
+  neue Karten werden gesammelt und verzögert geschrieben, nicht pro Karte im Lookup-Pfad
+- Überlauf: mehr als 128 Karten sind erlaubt. Python-int-Masken (Ähnlichkeit, Match-Quote)
+  wachsen einfach mit; feste 128-Bit-Formen (mask_words → SQLite, NumPy) enthalten nur die
+  ersten 128 Karten – dort fehlen spätere Karten, statt dass jeder Lookup abbricht
+"""
+import atexit
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DECK_BITS = 128  # 2 × uint64 – feste Breite für SQLite/NumPy (~120 Karten im Spiel)
+_WORD = (1 << 64) - 1
+
+CARD_REGISTRY_PATH = "card_registry.json"
+SAVE_DELAY_S = 2.0  # neue Karten werden gebündelt geschrieben
+
+
+def card_key(card: Dict[str, Any]) -> Optional[str]:
+    """Robuster Karten-Key (id/key/name), lower-case – wie cr_api._deck_keys."""
+    cid = card.get("id") or card.get("key") or card.get("name")
+    return str(cid).lower() if cid not in (None, "") else None
+
+
+class CardRegistry:
+    """Karten-Key → dichter Bit-Index. Neue Karten werden beim ersten Auftreten vergeben."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._bits: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                keys = json.load(f).get("cards", [])
+        except (OSError, ValueError):
+            return
+        for k in keys:
+            if k not in self._bits:
+                self._bits[k] = len(self._keys)
+                self._keys.append(k)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"cards": self._keys}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Registry funktioniert auch rein im Speicher
+
+    def _schedule_save(self) -> None:
+        """Unter self._lock: Schreiben nach SAVE_DELAY_S bündeln (flush() schreibt sofort)."""
+        self._dirty = True
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY_S, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Ausstehende neue Karten jetzt schreiben (auch beim Beenden via atexit)."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._dirty = False
+                self._save()
+
+    def _assign(self, key: str) -> int:
+        b = len(self._keys)
+        self._bits[key] = b
+        self._keys.append(key)
+        return b
+
+    @property
+    def overflow(self) -> bool:
+        """Mehr Karten als DECK_BITS – feste 128-Bit-Masken sind dann unvollständig."""
+        return len(self._keys) > DECK_BITS
+
+    def bit(self, key: str) -> int:
+        b = self._bits.get(key)
+        if b is not None:
+            return b
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            b = self._bits.get(key)
+            if b is None:
+                b = self._assign(key)
+                self._schedule_save()
+            return b
+
+    def find(self, key: str) -> Optional[int]:
+        """Bit-Index ohne Neuvergabe (None für unbekannte Karten)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        return self._bits.get(key)
+
+    def key(self, bit: int) -> str:
+        return self._keys[bit]
+
+    def seed(self, keys: Iterable[str]) -> None:
+        """Bekannte Karten (z. B. aus dem Kartenkatalog) vorab in fester Reihenfolge eintragen."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            new = sorted({k for k in keys if k not in self._bits})
+            for k in new:
+                self._assign(k)
+            if new:
+                self._dirty = True
+        self.flush()
+
+
+CARD_REGISTRY = CardRegistry(CARD_REGISTRY_PATH)
+atexit.register(CARD_REGISTRY.flush)
+
+
+# ------------------------------- Masken-Helfer --------------------------------
+def keys_mask(keys: Iterable[str], registry: CardRegistry = CARD_REGISTRY) -> int:
+    m = 0
+    for k in keys:
+        m |= 1 << registry.bit(k)
+    return m
+
+
+def deck_mask(cards: Iterable[Dict[str, Any]], registry: CardRegistry = CARD_REGISTRY) -> int:
+    """Kartenobjekte (currentDeck / Battlelog-cards) → Bit-Maske (128 Bit, bei Überlauf breiter)."""
+    m = 0
+    for c in cards or ():
+        k = card_key(c or {})
+        if k is not None:
+            m |= 1 << registry.bit(k)
+    return m
+
+
+def mask_keys(mask: int, registry: CardRegistry = CARD_REGISTRY) -> List[str]:
+    keys: List[str] = []
+    while mask:
+        low = mask & -mask
+        keys.append(registry.key(low.bit_length() - 1))
+        mask ^= low
+    return keys
+
+
+def popcount(mask: int) -> int:
+    return mask.bit_count()
+
+
+def mask_similarity(a: int, b: int) -> float:
+    """Anteil gleicher Karten bezogen auf 8 Slots (0.0–1.0), wie cr_api._deck_similarity."""
+    if not a or not b:
+        return 0.0
+    return (a & b).bit_count() / 8.0
+
+
+def mask_words(mask: int) -> Tuple[int, int]:
+    """Maske → (lo, hi) als uint64-Wörter (z. B. für NumPy oder SQLite); Bits ≥ 128 fallen weg."""
+    return mask & _WORD, (mask >> 64) & _WORD
+
+
+def words_mask(lo: int, hi: int) -> int:
+    return (int(hi) << 64) | int(lo)
+
+
+def deck_fingerprint(cards: Iterable[Dict[str, Any]], registry: CardRegistry = CARD_REGISTRY) -> str:
+    """Kanonischer Deck-Fingerprint (unabhängig von Kartenreihenfolge/Level), 32 Hex-Zeichen."""
+    return f"{deck_mask(cards, registry):032x}"
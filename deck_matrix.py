@@ -0,0 +1,157 @@
+# deck_matrix.py
+"""
+Batch-Deckvergleich mit NumPy – ein Deck gegen zehntausende/Millionen gespeicherte Decks.
+- Decks liegen als (N, 2) uint64-Matrix (gepackte 128-Bit-Masken aus deck_bits)
+- wenige Anfragen: AND + Popcount direkt auf den gepackten Wörtern
+- viele Anfragen: binäre Präsenzmatrix (N, 128) × Anfragen → Matrixmultiplikation (BLAS)
+- topk(): beste k Decks je Anfrage; Schwelle über ein Histogramm der Trefferzahlen (0..8)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from deck_bits import DECK_BITS, deck_mask, mask_words
+
+_POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+_NATIVE_POPCOUNT = hasattr(np, "bitwise_count")
+# Ohne natives Popcount (NumPy < 2.0) lohnt sich ab so vielen Anfragen Präsenzmatrix + Matmul
+MATMUL_MIN_QUERIES = 8
+# Zeilen pro Block (begrenzt Zwischenspeicher bei großen N)
+_CHUNK = 1 << 16
+
+Queries = Union[int, Sequence[int], np.ndarray]
+
+
+def _popcount64(x: np.ndarray) -> np.ndarray:
+    """Popcount je uint64 (NumPy ≥ 2.0 nativ, sonst über eine Byte-Tabelle)."""
+    if _NATIVE_POPCOUNT:
+        return np.bitwise_count(x)
+    return _POP8[x.view(np.uint8)].reshape(*x.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def masks_to_words(masks: Iterable[int]) -> np.ndarray:
+    """Python-int-Masken → (N, 2) uint64 [lo, hi]."""
+    return np.array([mask_words(m) for m in masks], dtype=np.uint64).reshape(-1, 2)
+
+
+def words_to_presence(words: np.ndarray) -> np.ndarray:
+    """(N, 2) uint64 → (N, 128) uint8 0/1; Spalte j entspricht Bit j der Maske."""
+    w = np.ascontiguousarray(words, dtype="<u8")
+    return np.unpackbits(w.view(np.uint8), axis=1, bitorder="little")[:, :DECK_BITS]
+
+
+def _as_words(queries: Queries) -> np.ndarray:
+    if isinstance(queries, np.ndarray):
+        return queries.astype(np.uint64, copy=False).reshape(-1, 2)
+    if isinstance(queries, int):
+        queries = [queries]
+    return masks_to_words(queries)
+
+
+class DeckMatrix:
+    """
+    Wachsende Sammlung von Decks für vektorisierte Ähnlichkeitsabfragen.
+    Optional mit beliebigen ids (z. B. Battle-Keys) je Zeile.
+    """
+
+    def __init__(self, words: Optional[np.ndarray] = None, ids: Optional[Sequence[Any]] = None):
+        w = np.zeros((0, 2), dtype=np.uint64) if words is None else np.asarray(words, dtype=np.uint64).reshape(-1, 2)
+        self._words = w.copy()
+        self._n = len(w)
+        self.ids: List[Any] = list(ids) if ids is not None else list(range(self._n))
+        self._presence: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_masks(cls, masks: Iterable[int], ids: Optional[Sequence[Any]] = None) -> "DeckMatrix":
+        return cls(masks_to_words(masks), ids)
+
+    @classmethod
+    def from_decks(cls, decks: Iterable[List[Dict[str, Any]]], ids: Optional[Sequence[Any]] = None) -> "DeckMatrix":
+        """Kartenlisten (currentDeck / Battlelog-cards) direkt übernehmen."""
+        return cls.from_masks((deck_mask(d) for d in decks), ids)
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def words(self) -> np.ndarray:
+        return self._words[: self._n]
+
+    def append(self, masks: Queries, ids: Optional[Sequence[Any]] = None) -> None:
+        """Decks anhängen (amortisiert O(1) pro Deck durch Kapazitätsverdopplung)."""
+        new = _as_words(masks)
+        need = self._n + len(new)
+        if need > len(self._words):
+            grown = np.zeros((max(need, 2 * len(self._words), 1024), 2), dtype=np.uint64)
+            grown[: self._n] = self.words
+            self._words = grown
+        self._words[self._n : need] = new
+        if ids is None:
+            self.ids.extend(range(self._n, need))
+        else:
+            self.ids.extend(ids)
+        self._n = need
+        self._presence = None
+
+    def presence(self) -> np.ndarray:
+        """Binäre Präsenzmatrix (N, 128) uint8, gecacht bis zum nächsten append()."""
+        if self._presence is None:
+            self._presence = words_to_presence(self.words)
+        return self._presence
+
+    # ---- Abfragen ----
+    def common(self, queries: Queries, method: str = "auto") -> np.ndarray:
+        """
+        Anzahl gemeinsamer Karten je (Anfrage, Deck) als (Q, N) uint8.
+        method: 'popcount', 'matmul' oder 'auto' (natives Popcount bzw. Anzahl der Anfragen).
+        """
+        q = _as_words(queries)
+        if method == "auto":
+            method = "popcount" if _NATIVE_POPCOUNT or len(q) < MATMUL_MIN_QUERIES else "matmul"
+        out = np.empty((len(q), self._n), dtype=np.uint8)
+        if method == "popcount":
+            w = self.words
+            for i, (lo, hi) in enumerate(q):
+                for s in range(0, self._n, _CHUNK):
+                    blk = w[s : s + _CHUNK]
+                    out[i, s : s + _CHUNK] = _popcount64(blk[:, 0] & lo) + _popcount64(blk[:, 1] & hi)
+        elif method == "matmul":
+            qp = words_to_presence(q).astype(np.float32)
+            p = self.presence()
+            for s in range(0, self._n, _CHUNK):
+                out[:, s : s + _CHUNK] = qp @ p[s : s + _CHUNK].astype(np.float32).T
+        else:
+            raise ValueError(f"Unbekannte Methode: {method}")
+        return out
+
+    def similarity(self, queries: Queries, method: str = "auto") -> np.ndarray:
+        """Ähnlichkeit wie cr_api._deck_similarity (gemeinsame Karten / 8) als (Q, N) float32."""
+        return self.common(queries, method).astype(np.float32) / 8.0
+
+    def exact(self, queries: Queries) -> np.ndarray:
+        """Anzahl exakt gleicher Decks je Anfrage."""
+        q = _as_words(queries)
+        w = self.words
+        return np.array([int(np.count_nonzero((w[:, 0] == lo) & (w[:, 1] == hi))) for lo, hi in q])
+
+    def topk(self, queries: Queries, k: int = 10, method: str = "auto") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Beste k Decks je Anfrage.
+        Rückgabe: (zeilenindizes (Q, k), ähnlichkeiten (Q, k)), absteigend sortiert.
+        """
+        common = self.common(queries, method)
+        k = min(k, self._n)
+        idx = np.zeros((len(common), max(k, 0)), dtype=np.int64)
+        if k <= 0:
+            return idx, np.zeros(idx.shape, dtype=np.float32)
+        for i, row in enumerate(common):
+            # Nur 0..8 gemeinsame Karten möglich → Schwelle per Histogramm statt argpartition über N
+            hist = np.bincount(row, minlength=9)
+            above = np.cumsum(hist[::-1])
+            thresh = 8 - int(np.searchsorted(above, k))
+            cand = np.flatnonzero(row >= thresh)
+            order = np.argsort(-row[cand].astype(np.int8), kind="stable")[:k]
+            idx[i] = cand[order]
+        vals = np.take_along_axis(common, idx, axis=1)
+        return idx, vals.astype(np.float32) / 8.0
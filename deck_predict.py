@@ -0,0 +1,122 @@
+# deck_predict.py
+"""
+Deck-Vorhersage aus wenigen beobachteten Karten (z. B. mitten im Match).
+Invertierter Index Karte → Decks über die gespeicherte Battle-Historie:
+- jedes vollständige 8-Karten-Deck wird einmal geführt (Dedup über die 128-Bit-Maske)
+- Gewicht = Häufigkeit × Aktualität: Σ 2^((t_i − T0) / Halbwertszeit)
+  (gemeinsamer Faktor 2^(−now/h) ändert die Reihenfolge nicht → kein Neuberechnen nötig)
+- Abfrage: Postings der beobachteten Karten schneiden (kleinste zuerst), Top-n nach Gewicht
+"""
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from cr_api import battle_time_epoch, extract_player_cards_from_battle
+from deck_bits import CARD_REGISTRY, CardRegistry, card_key, deck_mask, mask_keys
+
+_T0 = 1_704_067_200.0  # 2024-01-01 UTC, Bezugspunkt für die Gewichte
+DEFAULT_HALF_LIFE_DAYS = 14.0
+
+Observed = Iterable[Union[str, Dict[str, Any]]]
+
+
+class PartialDeckIndex:
+    """Karte → Decks, die sie enthalten; liefert wahrscheinliche 8-Karten-Vervollständigungen."""
+
+    def __init__(self, half_life_days: float = DEFAULT_HALF_LIFE_DAYS, registry: CardRegistry = CARD_REGISTRY):
+        self.registry = registry
+        self._half_life = half_life_days * 86400.0
+        self._rows: Dict[int, int] = {}  # maske → zeile
+        self._masks: List[int] = []
+        self._count: List[int] = []
+        self._last: List[float] = []
+        self._weight: List[float] = []
+        self._postings: Dict[int, Set[int]] = {}  # bit → zeilen
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    # ---- Aufbau ----
+    def add_mask(self, mask: int, when: float = 0.0) -> None:
+        """Ein gespieltes Deck (Maske) zum Zeitpunkt `when` (Unix-Zeit) aufnehmen."""
+        if mask.bit_count() != 8:
+            return  # nur vollständige Decks taugen als Vervollständigung
+        row = self._rows.get(mask)
+        if row is None:
+            row = len(self._masks)
+            self._rows[mask] = row
+            self._masks.append(mask)
+            self._count.append(0)
+            self._last.append(0.0)
+            self._weight.append(0.0)
+            m = mask
+            while m:
+                low = m & -m
+                self._postings.setdefault(low.bit_length() - 1, set()).add(row)
+                m ^= low
+        self._count[row] += 1
+        self._last[row] = max(self._last[row], when)
+        self._weight[row] += 2.0 ** (((when or _T0) - _T0) / self._half_life)
+
+    def add_deck(self, cards: List[Dict[str, Any]], battle_time: str = "") -> None:
+        self.add_mask(deck_mask(cards, self.registry), battle_time_epoch(battle_time))
+
+    def add_battles(self, battles: Iterable[Dict[str, Any]], player_tag: Optional[str] = None) -> None:
+        """Battlelog-Einträge aufnehmen – nur ein Spieler (player_tag) oder alle Seiten."""
+        for b in battles:
+            bt = b.get("battleTime") or ""
+            if player_tag:
+                self.add_deck(extract_player_cards_from_battle(b, player_tag), bt)
+                continue
+            for side in ("team", "opponent"):
+                for pl in b.get(side) or []:
+                    self.add_deck(pl.get("cards") or [], bt)
+
+    def add_store(self, store: Any, player_tag: Optional[str] = None) -> None:
+        """Alle gespeicherten Decks aus einem HistoryStore aufnehmen (ohne API-Calls)."""
+        for mask, bt in store.iter_decks(player_tag):
+            self.add_mask(mask, battle_time_epoch(bt))
+
+    # ---- Abfrage ----
+    def _observed_bits(self, observed: Observed) -> List[int]:
+        bits = []
+        for o in observed:
+            k = o if isinstance(o, str) else card_key(o)
+            b = self.registry.find(str(k).lower()) if k is not None else None
+            if b is not None:  # unbekannte Karte → kommt in keinem Deck vor
+                bits.append(b)
+        return bits
+
+    def predict(self, observed: Observed, n: int = 5) -> List[Dict[str, Any]]:
+        """
+        observed: Karten-Keys oder Kartenobjekte (typisch 2–5 Stück).
+        Rückgabe (beste zuerst): {'cards', 'missing', 'matched', 'count', 'last_seen', 'weight'}
+        Enthält kein Deck alle beobachteten Karten, zählen Decks mit den meisten Treffern.
+        """
+        bits = set(self._observed_bits(observed))
+        if not bits or not self._masks:
+            return []
+        postings = sorted((self._postings.get(b, set()) for b in bits), key=len)
+        cand = set(postings[0]).intersection(*postings[1:]) if postings[0] else set()
+
+        if cand:
+            best = heapq.nlargest(n, cand, key=self._weight.__getitem__)
+        else:
+            hits: Dict[int, int] = {}
+            for p in postings:
+                for row in p:
+                    hits[row] = hits.get(row, 0) + 1
+            best = heapq.nlargest(n, hits, key=lambda r: (hits[r], self._weight[r]))
+
+        obs_mask = sum(1 << b for b in bits)
+        out = []
+        for row in best:
+            mask = self._masks[row]
+            out.append({
+                "cards": mask_keys(mask, self.registry),
+                "missing": mask_keys(mask & ~obs_mask, self.registry),
+                "matched": (mask & obs_mask).bit_count(),
+                "count": self._count[row],
+                "last_seen": self._last[row],
+                "weight": self._weight[row],
+            })
+        return out
@@ -0,0 +1,253 @@
+# game_modes.py
+"""
+Tabellengesteuerte Einordnung von Kämpfen.
+- GameModeRegistry: gameMode.id → Grundkategorie. Vorrang haben immer die Tabellen im Code
+  (KNOWN_IDS, KNOWN_MODES); unbekannte ids werden über ihren Namen eingeordnet und gemerkt
+  (game_modes.json) – umbenannte Modi behalten so ihre Kategorie. "other" wird nie gemerkt,
+  sondern bei jedem neuen Namen neu bewertet; ein gemerkter Eintrag wird bei Umbenennung
+  neu eingeordnet, sobald der neue Name eindeutig ist.
+- classify(battle): Kategorie eines Kampfes aus id/Name, type, deckSelection, Teamgröße und
+  Challenge/Friendly-Flags. Ergebnisse werden pro Merkmals-Tupel memoisiert – pro Kampf bleibt
+  ein Tupel-Aufbau und ein Dict-Zugriff, auch über große gespeicherte Historien.
+Kategorien: ladder, ranked, 2v2, war, draft, friendly, challenge (sonst other).
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+LADDER = "ladder"
+RANKED = "ranked"
+TWO_V_TWO = "2v2"
+WAR = "war"
+DRAFT = "draft"
+FRIENDLY = "friendly"
+CHALLENGE = "challenge"
+OTHER = "other"
+
+CATEGORIES = (LADDER, RANKED, TWO_V_TWO, WAR, DRAFT, FRIENDLY, CHALLENGE, OTHER)
+CATEGORY_LABELS = {
+    LADDER: "Ladder", RANKED: "Ranked", TWO_V_TWO: "2v2", WAR: "Clankrieg",
+    DRAFT: "Draft", FRIENDLY: "Freundschaft", CHALLENGE: "Challenge", OTHER: "Sonstige",
+}
+LADDER_CATEGORIES: FrozenSet[str] = frozenset({LADDER, RANKED})  # Standardfilter (1v1 Ladder/Ranked)
+
+GAME_MODES_PATH = "game_modes.json"
+
+# Bekannte Modi (gameMode.name → Kategorie); ids lernt die Registry beim ersten Auftreten dazu
+KNOWN_MODES: Dict[str, str] = {
+    "Ladder": LADDER,
+    "Ladder_CrownRush": LADDER,
+    "Ladder_GoldRush": LADDER,
+    "Ranked1v1": RANKED,
+    "Ranked1v1_NewArena": RANKED,
+    "Ranked1v1_NewArena2": RANKED,
+    "Ranked1v1_CrownRush": RANKED,
+    "TeamVsTeam": TWO_V_TWO,
+    "TeamVsTeamLadder": TWO_V_TWO,
+    "Friendly": FRIENDLY,
+    "ClanWar_BoatBattle": WAR,
+    "CW_Battle_1v1": WAR,
+    "CW_Duel_1v1": WAR,
+    "Draft_Competitive": DRAFT,
+    "DraftMode": DRAFT,
+}
+# Bekannte ids (id → erwarteter Name, Kategorie). Passt der gemeldete Name nicht und ist er
+# selbst eindeutig, gewinnt der Name – ein falsch eingetragener Seed ordnet so nichts falsch ein.
+KNOWN_IDS: Dict[int, Tuple[str, str]] = {
+    72000006: ("Ladder", LADDER),
+    72000201: ("Ranked1v1_NewArena", RANKED),
+    72000323: ("Ranked1v1_NewArena2", RANKED),
+    72000267: ("CW_Battle_1v1", WAR),
+    72000268: ("CW_Duel_1v1", WAR),
+}
+
+# battle.type → Kategorie; "pvp" entscheidet der Spielmodus
+TYPE_CATEGORIES: Dict[str, Optional[str]] = {
+    "pvp": None,
+    "pathoflegend": RANKED,
+    "friendly": FRIENDLY,
+    "clanmate": FRIENDLY,
+    "challenge": CHALLENGE,
+    "tournament": CHALLENGE,
+    "riverracepvp": WAR,
+    "riverraceduel": WAR,
+    "riverraceduelcolosseum": WAR,
+    "boatbattle": WAR,
+    "clanwarwarday": WAR,
+    "clanwarcollectionday": WAR,
+}
+
+# Namensregeln für unbekannte Modi (Reihenfolge zählt: Draft/Krieg vor Ladder)
+_NAME_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("draft",), DRAFT),
+    (("river", "boat", "clan war", "clanwar", "cw_"), WAR),
+    (("2v2", "teamvsteam", "duo"), TWO_V_TWO),
+    (("friendly",), FRIENDLY),
+    (("challenge", "tournament"), CHALLENGE),
+    (("ranked", "path of legends", "pathoflegend"), RANKED),
+    (("ladder", "trophy road", "league"), LADDER),
+)
+
+_MEMO_MAX = 4096
+
+
+def classify_mode_name(name: str) -> str:
+    """Grundkategorie eines Modus nur aus seinem Namen (Fallback für unbekannte ids)."""
+    if name in KNOWN_MODES:
+        return KNOWN_MODES[name]
+    low = (name or "").lower()
+    for keys, cat in _NAME_RULES:
+        if any(k in low for k in keys):
+            return cat
+    return OTHER
+
+
+class GameModeRegistry:
+    """gameMode.id → Grundkategorie (+ zuletzt gesehener Name), thread-sicher, optional persistiert."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._by_id: Dict[int, Tuple[str, str]] = {}  # gelernte ids (nie "other", nie KNOWN_IDS)
+        self._memo: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._loaded = path is None
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                modes = json.load(f).get("modes", {})
+        except (OSError, ValueError):
+            return
+        for mid, entry in modes.items():
+            try:
+                name, cat = entry
+                mid = int(mid)
+            except (TypeError, ValueError):
+                continue
+            if cat in CATEGORIES and cat != OTHER and mid not in KNOWN_IDS:
+                self._by_id[mid] = (name, cat)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"modes": {str(k): list(v) for k, v in sorted(self._by_id.items())}}, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Registry funktioniert auch rein im Speicher
+
+    def mode_category(self, mode_id: Optional[int], name: str = "") -> str:
+        """Grundkategorie eines Modus; unbekannte ids werden über den Namen eingeordnet und gemerkt."""
+        by_name = classify_mode_name(name)
+        if mode_id is None:
+            return by_name
+        seed = KNOWN_IDS.get(mode_id)
+        if seed is not None:
+            if not name or name == seed[0] or by_name == OTHER:
+                return seed[1]
+            return by_name  # Seed passt nicht zum Namen → Name ist verlässlicher
+        if name in KNOWN_MODES:
+            return by_name  # Code-Tabelle schlägt gemerkte Einträge
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            hit = self._by_id.get(mode_id)
+            if hit is not None and (not name or name == hit[0]):
+                return hit[1]
+            if by_name == OTHER:
+                # unbekannter Name: gemerkte Kategorie behalten (Umbenennung), sonst nichts merken
+                return hit[1] if hit is not None else OTHER
+            if hit != (name, by_name):
+                self._by_id[mode_id] = (name, by_name)
+                self._save()
+            return by_name
+
+    def known(self) -> Dict[int, Tuple[str, str]]:
+        """Alle bekannten ids: gelernte, überlagert von KNOWN_IDS."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            out = dict(self._by_id)
+        out.update(KNOWN_IDS)
+        return out
+
+    def classify_fields(
+        self,
+        mode_id: Optional[int],
+        mode_name: str,
+        battle_type: str,
+        deck_selection: str = "",
+        team_size: int = 1,
+        opponent_size: int = 1,
+        challenge: bool = False,
+        friendly: bool = False,
+    ) -> str:
+        """Kategorie aus den Kernfeldern (auch für Zeilen aus dem HistoryStore)."""
+        key = (mode_id, mode_name, battle_type, deck_selection, team_size, opponent_size, challenge, friendly)
+        cat = self._memo.get(key)
+        if cat is not None:
+            return cat
+        cat = self._classify(*key)
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        self._memo[key] = cat
+        return cat
+
+    def classify(self, b: Dict[str, Any]) -> str:
+        gm = b.get("gameMode") or {}
+        return self.classify_fields(
+            gm.get("id"),
+            gm.get("name") or "",
+            b.get("type") or "",
+            b.get("deckSelection") or "",
+            len(b.get("team") or []),
+            len(b.get("opponent") or []),
+            bool(b.get("challengeId") or b.get("challengeTitle")),
+            bool(b.get("isFriendly")),
+        )
+
+    def _classify(self, mode_id, mode_name, battle_type, deck_selection, team_size, opponent_size, challenge, friendly) -> str:
+        if friendly:
+            return FRIENDLY
+        if challenge:
+            return CHALLENGE
+        typ = battle_type.lower()
+        if typ not in TYPE_CATEGORIES:
+            return OTHER
+        by_type = TYPE_CATEGORIES[typ]
+        if by_type is not None:
+            return by_type
+        if team_size == 2 and opponent_size == 2:
+            return TWO_V_TWO
+        if team_size != 1 or opponent_size != 1:
+            return OTHER
+        if "draft" in deck_selection.lower():
+            return DRAFT
+        return self.mode_category(mode_id, mode_name)
+
+
+GAME_MODES = GameModeRegistry(GAME_MODES_PATH)
+
+
+def classify(b: Dict[str, Any]) -> str:
+    """Kategorie eines Kampfes (siehe CATEGORIES)."""
+    return GAME_MODES.classify(b)
+
+
+def classify_row(row: Dict[str, Any]) -> str:
+    """Kategorie einer HistoryStore-Zeile (dort liegen nur die Kernfelder)."""
+    n_opp = (row.get("opponent_tag") or "").count("+") + 1
+    return GAME_MODES.classify_fields(
+        row.get("game_mode_id"),
+        row.get("game_mode_name") or "",
+        row.get("type") or "",
+        row.get("deck_selection") or "",
+        n_opp,
+        n_opp,
+    )
@@ -0,0 +1,273 @@
+# history_store.py
+"""
+Lokaler, inkrementeller Battle-Speicher (SQLite, nur anhängen).
+- jeder geladene Battlelog wird übernommen; Dedup über (player_tag, battleTime, opponent_tag)
+- beim erneuten Laden werden nur Kämpfe nach dem letzten gespeicherten battleTime eingefügt
+- Decks kompakt: einmal pro Kartenkombination in `decks` (sortierte Keys + 128-Bit-Maske),
+  Kämpfe verweisen nur per id darauf
+Die API liefert nur ~25 Kämpfe pro Spieler – hier wächst die Historie über alle Lookups.
+"""
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+from cr_api import _norm_tag
+from deck_bits import card_key, keys_mask, mask_words, words_mask
+
+HISTORY_DB_PATH = "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id    INTEGER PRIMARY KEY,
+    cards TEXT NOT NULL UNIQUE,      -- sortierte Karten-Keys, komma-getrennt
+    lo    INTEGER NOT NULL,          -- Maske (deck_bits), als signed int64
+    hi    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS battles (
+    player_tag        TEXT NOT NULL,
+    battle_time       TEXT NOT NULL,
+    opponent_tag      TEXT NOT NULL,
+    type              TEXT,
+    game_mode_id      INTEGER,
+    game_mode_name    TEXT,
+    deck_selection    TEXT,
+    crowns_for        INTEGER,
+    crowns_against    INTEGER,
+    starting_trophies INTEGER,
+    trophy_change     INTEGER,
+    deck_id           INTEGER REFERENCES decks(id),
+    opponent_deck_id  INTEGER REFERENCES decks(id),
+    PRIMARY KEY (player_tag, battle_time, opponent_tag)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = (
+    "player_tag", "battle_time", "opponent_tag", "type", "game_mode_id", "game_mode_name",
+    "deck_selection", "crowns_for", "crowns_against", "starting_trophies", "trophy_change",
+    "deck_id", "opponent_deck_id",
+)
+
+
+def _s64(u: int) -> int:
+    """uint64 → signed int64 (SQLite kennt nur signed)."""
+    return u - (1 << 64) if u >= (1 << 63) else u
+
+
+def _u64(s: int) -> int:
+    return s + (1 << 64) if s < 0 else s
+
+
+def _split_sides(battle: Dict[str, Any], player_tag: str) -> Tuple[Optional[List[Any]], List[Any]]:
+    """(eigene Seite, Gegnerseite) aus Sicht von player_tag; eigene Seite None, falls nicht beteiligt."""
+    team = battle.get("team") or []
+    opp = battle.get("opponent") or []
+    if any(_norm_tag(p.get("tag")) == player_tag for p in team):
+        return team, opp
+    if any(_norm_tag(p.get("tag")) == player_tag for p in opp):
+        return opp, team
+    return None, []
+
+
+class HistoryStore:
+    """Thread-sicherer Zugriff auf die lokale Battle-Historie."""
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        self._deck_ids: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+
+    def add_listener(self, fn: Callable[[str, List[Dict[str, Any]]], None]) -> None:
+        """
+        fn(player_tag, neue Kämpfe) nach jedem ingest_battlelog mit neuen Kämpfen (z. B. aggregates).
+        Fehler eines Listeners werden gezählt, aber nicht weitergereicht – die Kämpfe sind dann schon gespeichert.
+        """
+        self._listeners.append(fn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ---- Decks ----
+    def _deck_id(self, cards: List[Dict[str, Any]], pending: Dict[str, int]) -> Optional[int]:
+        """
+        Deck-id zur Kartenkombination (legt sie bei Bedarf an). Neue ids landen erst in
+        pending und kommen nach dem Commit in den Cache – ein Rollback hinterließe sonst
+        ids, die es in der Datenbank nicht gibt.
+        """
+        keys = sorted({k for k in map(card_key, cards) if k is not None})
+        if not keys:
+            return None
+        sig = ",".join(keys)
+        did = self._deck_ids.get(sig) or pending.get(sig)
+        if did is not None:
+            return did
+        row = self._db.execute("SELECT id FROM decks WHERE cards = ?", (sig,)).fetchone()
+        if row is None:
+            lo, hi = mask_words(keys_mask(keys))
+            did = self._db.execute(
+                "INSERT INTO decks (cards, lo, hi) VALUES (?, ?, ?)", (sig, _s64(lo), _s64(hi))
+            ).lastrowid
+        else:
+            did = row[0]
+        pending[sig] = did
+        return did
+
+    # ---- Schreiben ----
+    def latest_battle_time(self, player_tag: str) -> str:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(battle_time) FROM battles WHERE player_tag = ?", (_norm_tag(player_tag),)
+            ).fetchone()
+        return row[0] or ""
+
+    def ingest_battlelog(self, player_tag: str, battles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Übernimmt einen Battlelog. Nur Kämpfe, die neuer als der letzte gespeicherte sind,
+        werden eingefügt. Rückgabe: die neu gespeicherten Kämpfe (älteste zuerst).
+        """
+        pt = _norm_tag(player_tag)
+        latest = self.latest_battle_time(pt)
+        fresh = [b for b in battles if (b.get("battleTime") or "") > latest]
+        if not fresh:
+            return []
+        fresh.sort(key=lambda b: b.get("battleTime") or "")
+
+        added: List[Dict[str, Any]] = []
+        pending: Dict[str, int] = {}
+        with self._lock:
+            with self._db:
+                for b in fresh:
+                    own, other = _split_sides(b, pt)
+                    if own is None:
+                        continue
+                    me = next(p for p in own if _norm_tag(p.get("tag")) == pt)
+                    gm = b.get("gameMode") or {}
+                    row = (
+                        pt,
+                        b.get("battleTime") or "",
+                        "+".join(sorted(_norm_tag(p.get("tag")) for p in other)),
+                        b.get("type"),
+                        gm.get("id"),
+                        gm.get("name"),
+                        b.get("deckSelection"),
+                        int(me.get("crowns") or 0),
+                        max((int(p.get("crowns") or 0) for p in other), default=0),
+                        me.get("startingTrophies"),
+                        me.get("trophyChange"),
+                        self._deck_id(me.get("cards") or [], pending),
+                        self._deck_id((other[0].get("cards") or []) if other else [], pending),
+                    )
+                    cur = self._db.execute(
+                        f"INSERT OR IGNORE INTO battles ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                        row,
+                    )
+                    if cur.rowcount:
+                        added.append(b)
+            self._deck_ids.update(pending)  # erst nach erfolgreichem Commit
+        if added:
+            for fn in self._listeners:
+                try:
+                    fn(pt, added)
+                except Exception:
+                    metrics.inc("history_listener_error")
+        return added
+
+    # ---- Lesen ----
+    def count(self, player_tag: Optional[str] = None) -> int:
+        with self._lock:
+            if player_tag:
+                row = self._db.execute(
+                    "SELECT COUNT(*) FROM battles WHERE player_tag = ?", (_norm_tag(player_tag),)
+                ).fetchone()
+            else:
+                row = self._db.execute("SELECT COUNT(*) FROM battles").fetchone()
+        return row[0]
+
+    def player_battles(self, player_tag: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Gespeicherte Kämpfe eines Spielers, neueste zuerst, inkl. 'cards'/'opponent_cards' (Keys)."""
+        sql = (
+            "SELECT b.*, d.cards AS cards, o.cards AS opponent_cards FROM battles b "
+            "LEFT JOIN decks d ON d.id = b.deck_id LEFT JOIN decks o ON o.id = b.opponent_deck_id "
+            "WHERE b.player_tag = ? ORDER BY b.battle_time DESC"
+        )
+        params: Tuple[Any, ...] = (_norm_tag(player_tag),)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        out = []
+        for r in rows:
+            d = dict(r)
+            d["cards"] = d["cards"].split(",") if d["cards"] else []
+            d["opponent_cards"] = d["opponent_cards"].split(",") if d["opponent_cards"] else []
+            out.append(d)
+        return out
+
+    def has_battle(self, player_tag: str, battle_time: str, opponent_tag: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM battles WHERE player_tag = ? AND battle_time = ? AND opponent_tag = ?",
+                (_norm_tag(player_tag), battle_time, opponent_tag),
+            ).fetchone()
+        return row is not None
+
+    def iter_battle_decks(
+        self, min_trophies: Optional[int] = None, max_trophies: Optional[int] = None, chunk: int = 100_000
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Beide Decks je Kampf in Blöcken (z. B. für meta_stats):
+        (game_mode_id, game_mode_name, type, deck_selection, opponent_tag, crowns_for, crowns_against,
+         lo, hi, opp_lo, opp_hi) – Masken als signed int64, NULL ohne Deck.
+        Ein Kampf, der aus beiden Perspektiven gespeichert ist, kommt nur einmal vor.
+        Liest über eine eigene Verbindung (WAL) und blockiert so keine Schreiber.
+        """
+        sql = (
+            "SELECT b.game_mode_id, b.game_mode_name, b.type, b.deck_selection, b.opponent_tag, "
+            "b.crowns_for, b.crowns_against, d.lo, d.hi, o.lo, o.hi FROM battles b "
+            "LEFT JOIN decks d ON d.id = b.deck_id LEFT JOIN decks o ON o.id = b.opponent_deck_id "
+            "WHERE NOT EXISTS (SELECT 1 FROM battles m WHERE m.player_tag = b.opponent_tag "
+            "AND m.battle_time = b.battle_time AND m.opponent_tag = b.player_tag AND m.player_tag < b.player_tag)"
+        )
+        params: Tuple[Any, ...] = ()
+        if min_trophies is not None:
+            sql += " AND b.starting_trophies >= ?"
+            params += (int(min_trophies),)
+        if max_trophies is not None:
+            sql += " AND b.starting_trophies <= ?"
+            params += (int(max_trophies),)
+        if self.path == ":memory:":
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            for s in range(0, len(rows), chunk):
+                yield [tuple(r) for r in rows[s : s + chunk]]
+            return
+        con = sqlite3.connect(self.path)
+        try:
+            cur = con.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            con.close()
+
+    def iter_decks(self, player_tag: Optional[str] = None) -> Iterator[Tuple[int, str]]:
+        """(Deck-Maske, battle_time) je gespeichertem Kampf – eigene Seite, optional nur ein Spieler."""
+        sql = "SELECT d.lo, d.hi, b.battle_time FROM battles b JOIN decks d ON d.id = b.deck_id"
+        params: Tuple[Any, ...] = ()
+        if player_tag:
+            sql += " WHERE b.player_tag = ?"
+            params = (_norm_tag(player_tag),)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        for lo, hi, bt in rows:
+            yield words_mask(_u64(lo), _u64(hi)), bt
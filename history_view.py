@@ -0,0 +1,159 @@
+# history_view.py
+"""
+Virtualisierte Deck-Historie für Tk.
+Es existieren nur so viele Zeilen-Widgets, wie in den sichtbaren Canvas-Ausschnitt passen
+(+2 Puffer). Beim Scrollen werden Zeilen recycelt: Zeile idx nutzt immer das Widget
+pool[idx % len(pool)], sichtbar bleibende Zeilen werden also nicht neu befüllt.
+Icons werden erst angefragt, wenn eine Zeile sichtbar wird – 500 Decks kosten damit
+praktisch so viel wie 10.
+
+Einträge: {'title': str, 'pct': float (0–1), 'cards': [Kartenobjekte]}
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROW_HEIGHT = 96  # 86 px Icon + Abstand
+ICON_SIZE = (72, 86)
+CARDS_PER_ROW = 8
+
+ShowIcon = Callable[[Any, Optional[str], Tuple[int, int], str], None]
+IconUrl = Callable[[Dict[str, Any]], Optional[str]]
+
+
+class VirtualDeckList(ttk.Frame):
+    """
+    show_icon(label, url, size, fallback): setzt ein Icon (asynchron, z. B. App._show_icon)
+    icon_url(card): Icon-URL eines Kartenobjekts
+    """
+
+    def __init__(
+        self,
+        master,
+        show_icon: ShowIcon,
+        icon_url: IconUrl,
+        title: str = "Deck-Historie",
+        height: int = 300,
+        row_height: int = ROW_HEIGHT,
+    ):
+        super().__init__(master)
+        self.show_icon = show_icon
+        self.icon_url = icon_url
+        self.row_height = row_height
+        self.items: List[Dict[str, Any]] = []
+        self._pool: List[Dict[str, Any]] = []
+        self._title = title
+
+        self.header = ttk.Label(self, text=title, font=(None, 12, "bold"))
+        self.header.pack(anchor="w", padx=6, pady=(0, 4))
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(body, height=height, highlightthickness=0, yscrollincrement=row_height // 3)
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda e: self._refresh())
+        self._bind_wheel(self.canvas)
+
+    # ---- öffentliche API ----
+    def set_items(self, items: List[Dict[str, Any]]) -> None:
+        self.items = list(items)
+        self.canvas.yview_moveto(0)
+        self._update_region()
+        self._refresh(force=True)
+
+    def set_title(self, title: str) -> None:
+        self._title = title
+        self.header.configure(text=f"{title} ({len(self.items)})")
+
+    def extend(self, items: List[Dict[str, Any]]) -> None:
+        if not items:
+            return
+        self.items.extend(items)
+        self._update_region()
+        self._refresh()
+
+    # ---- Scrollen ----
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self._refresh()
+
+    def _on_wheel(self, e):
+        if getattr(e, "num", None) == 4:
+            step = -1
+        elif getattr(e, "num", None) == 5:
+            step = 1
+        else:
+            step = -1 if e.delta > 0 else 1
+        self.canvas.yview_scroll(step, "units")
+        self._refresh()
+        return "break"
+
+    def _bind_wheel(self, widget) -> None:
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(seq, self._on_wheel)
+
+    # ---- Virtualisierung ----
+    def _update_region(self) -> None:
+        width = max(1, self.canvas.winfo_width())
+        self.canvas.configure(scrollregion=(0, 0, width, max(1, len(self.items) * self.row_height)))
+        self.header.configure(text=f"{self._title} ({len(self.items)})")
+
+    def _make_row(self) -> Dict[str, Any]:
+        frame = ttk.Frame(self.canvas)
+        text = ttk.Label(frame, text="", width=16, anchor="w")
+        text.grid(row=0, column=0, sticky="w", padx=(6, 8))
+        pb = ttk.Progressbar(frame, mode="determinate", length=180, maximum=100)
+        pb.grid(row=0, column=1, sticky="w")
+        icons = []
+        for c in range(CARDS_PER_ROW):
+            lbl = ttk.Label(frame, text="", width=10, anchor="center")
+            lbl.grid(row=0, column=2 + c, padx=4)
+            icons.append(lbl)
+        for w in (frame, text, pb, *icons):
+            self._bind_wheel(w)
+        win = self.canvas.create_window(0, 0, window=frame, anchor="nw", state="hidden")
+        return {"frame": frame, "win": win, "text": text, "pb": pb, "icons": icons, "index": None}
+
+    def _refresh(self, force: bool = False) -> None:
+        height = self.canvas.winfo_height()
+        if height <= 1:
+            height = int(self.canvas.cget("height"))
+        need = height // self.row_height + 2
+        while len(self._pool) < need:
+            self._pool.append(self._make_row())
+        if force:
+            for row in self._pool:
+                row["index"] = None
+
+        first = max(0, int(self.canvas.canvasy(0)) // self.row_height)
+        visible = range(first, min(len(self.items), first + len(self._pool)))
+        used = set()
+        for idx in visible:
+            row = self._pool[idx % len(self._pool)]
+            used.add(id(row))
+            if row["index"] != idx:
+                self._fill(row, idx)
+                self.canvas.coords(row["win"], 0, idx * self.row_height)
+                self.canvas.itemconfigure(row["win"], state="normal")
+        for row in self._pool:
+            if id(row) not in used and row["index"] is not None:
+                row["index"] = None
+                self.canvas.itemconfigure(row["win"], state="hidden")
+
+    def _fill(self, row: Dict[str, Any], idx: int) -> None:
+        item = self.items[idx]
+        row["index"] = idx
+        row["text"].configure(text=item.get("title", ""))
+        row["pb"]["value"] = int(round(item.get("pct", 0.0) * 100))
+        cards = item.get("cards") or []
+        for c, lbl in enumerate(row["icons"]):
+            if c < len(cards):
+                card = cards[c] or {}
+                self.show_icon(lbl, self.icon_url(card), ICON_SIZE, card.get("name", f"K{c+1}"))
+            else:
+                lbl.configure(image="", text="")
+                lbl.icon_url = None
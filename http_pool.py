@@ -0,0 +1,111 @@
+# http_pool.py
+"""
+Ein gemeinsamer HTTP-Transport für den ganzen Prozess.
+- alle httpx.Clients (ClashAPI, Scanner, Prewarming, Icon-Downloads) hängen am selben
+  Verbindungspool – eine Verbindung pro Host statt einer pro Komponente
+- HTTP/2 (Multiplexing: parallele Anfragen über eine TLS-Verbindung), sofern `h2`
+  installiert ist (`pip install httpx[http2]`); sonst HTTP/1.1 mit Keep-Alive
+- Keep-Alive deutlich länger als httpx' Standard (5 s), damit Verbindungen zwischen zwei
+  Gegnern nicht abreißen; eine inzwischen vom Server geschlossene wird einmal neu aufgebaut
+- warm(origins): baut die Verbindungen im Hintergrund vorab auf (DNS + TCP + TLS),
+  damit der erste Lookup keinen Handshake mehr bezahlt
+Clients aus dem Pool nie selbst schließen – close() schlösse den geteilten Transport;
+das übernimmt HttpPool.close() beim Beenden.
+"""
+import importlib.util
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+import metrics
+
+CLASH_ORIGIN = "https://api.clashroyale.com"
+ICON_ORIGIN = "https://api-assets.clashroyale.com"  # iconUrls der Karten
+
+HAVE_H2 = importlib.util.find_spec("h2") is not None
+MAX_CONNECTIONS = int(os.getenv("DECKFINDER_HTTP_MAX_CONNECTIONS", "64"))
+MAX_KEEPALIVE = int(os.getenv("DECKFINDER_HTTP_MAX_KEEPALIVE", "16"))
+KEEPALIVE_EXPIRY_S = float(os.getenv("DECKFINDER_HTTP_KEEPALIVE_S", "120"))
+
+
+def origin(url: str) -> str:
+    """scheme://host[:port] einer URL (eine Verbindung je Origin)."""
+    u = httpx.URL(str(url))
+    return f"{u.scheme}://{u.netloc.decode('ascii')}"
+
+
+class HttpPool:
+    """Geteilter httpx.HTTPTransport (lazy, thread-sicher) + Fabrik für leichte Clients darauf."""
+
+    def __init__(
+        self,
+        http2: Optional[bool] = None,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive: int = MAX_KEEPALIVE,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY_S,
+    ):
+        self.http2 = HAVE_H2 if http2 is None else (http2 and HAVE_H2)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._transport: Optional[httpx.HTTPTransport] = None
+        self._warmed: Dict[str, float] = {}  # Origin → Dauer des Aufbaus (s)
+
+    @property
+    def transport(self) -> httpx.HTTPTransport:
+        with self._lock:
+            if self._transport is None:
+                # retries=1: Verbindungsfehler (z. B. abgelaufenes Keep-Alive) einmal neu versuchen
+                self._transport = httpx.HTTPTransport(http2=self.http2, limits=self.limits, retries=1)
+            return self._transport
+
+    def client(
+        self,
+        base_url: str = "",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 15.0,
+    ) -> httpx.Client:
+        """Eigene base_url/Header/Timeout, aber Verbindungen aus dem geteilten Pool."""
+        return httpx.Client(base_url=base_url, headers=headers, timeout=timeout, transport=self.transport)
+
+    def warm(self, urls: Iterable[str], timeout: float = 5.0, background: bool = True) -> Optional[threading.Thread]:
+        """Verbindungen zu den Hosts der URLs vorab öffnen (HEAD /, Status egal)."""
+        todo = list(dict.fromkeys(origin(u) for u in urls if u))
+        if not todo:
+            return None
+        if not background:
+            self._warm(todo, timeout)
+            return None
+        t = threading.Thread(target=self._warm, args=(todo, timeout), name="http-warmup", daemon=True)
+        t.start()
+        return t
+
+    def _warm(self, origins: List[str], timeout: float) -> None:
+        client = self.client(timeout=timeout)
+        for origin in origins:
+            t0 = time.perf_counter()
+            try:
+                client.head(origin + "/")
+            except httpx.HTTPError:
+                metrics.inc("http.warmup.failed")  # offline o. Ä. – der erste echte Request baut neu auf
+                continue
+            self._warmed[origin] = time.perf_counter() - t0
+            metrics.observe("http.warmup", self._warmed[origin] * 1000.0)
+
+    def warmed(self) -> Dict[str, float]:
+        return dict(self._warmed)
+
+    def close(self) -> None:
+        with self._lock:
+            transport, self._transport = self._transport, None
+        if transport is not None:
+            transport.close()
+
+
+POOL = HttpPool()
@@ -0,0 +1,180 @@
+# icon_loader.py
+"""
+Asynchroner Karten-Icon-Loader.
+- Download + Dekodieren + Skalieren in einem Worker-Pool (nie im Tk-Hauptthread)
+- Original-Bilder in einem inhaltsadressierten Platten-Cache (icon_cache/<sha256>.png,
+  URL → Hash in index.json) – nach einem Neustart wird nichts erneut geladen
+- skalierte PIL-Bilder in einem nach Bytes begrenzten LRU; Bilder aus dem Icon-Atlas
+  (card_catalog.py) werden fest gehalten und nie verdrängt
+Der Aufrufer bekommt ein PIL.Image über einen Callback (im Worker-Thread) und erzeugt
+daraus im Tk-Thread nur noch das PhotoImage (z. B. via UI-Queue).
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from PIL import Image
+
+import http_pool
+import metrics
+
+ICON_CACHE_DIR = "icon_cache"
+ICON_WORKERS = 4
+ICON_LRU_BYTES = 32 * 1024 * 1024  # skalierte RGBA-Bilder (~70 KB je großer Karte)
+
+Size = Tuple[int, int]
+Callback = Callable[[Optional[Image.Image]], None]
+
+
+class IconLoader:
+    """
+    http: geteilter httpx.Client (optional; sonst einer auf dem Verbindungspool aus http_pool)
+    request(url, size, cb): lädt asynchron, cb(PIL.Image | None) läuft im Worker-Thread
+    peek(url, size): sofortiger Treffer (Atlas/LRU) oder None
+    pin(url, size, im): Bild dauerhaft halten (Atlas)
+    """
+
+    def __init__(
+        self,
+        http: Optional[httpx.Client] = None,
+        cache_dir: str = ICON_CACHE_DIR,
+        workers: int = ICON_WORKERS,
+        max_bytes: int = ICON_LRU_BYTES,
+    ):
+        self.http = http or http_pool.POOL.client(timeout=10.0)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="icons")
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple[str, Size], Image.Image]" = OrderedDict()
+        self._lru_bytes = 0
+        self._pinned: Dict[Tuple[str, Size], Image.Image] = {}
+        self._pending: Dict[Tuple[str, Size], List[Callback]] = {}
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index: Dict[str, str] = {}
+        self._index_dirty = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    # ---- öffentliche API ----
+    def peek(self, url: str, size: Size) -> Optional[Image.Image]:
+        key = (url, tuple(size))
+        with self._lock:
+            im = self._pinned.get(key)
+            if im is not None:
+                metrics.inc("icon_atlas_hit")
+                return im
+            im = self._lru.get(key)
+            if im is not None:
+                self._lru.move_to_end(key)
+                metrics.inc("icon_mem_hit")
+            return im
+
+    def pin(self, url: str, size: Size, im: Image.Image) -> None:
+        with self._lock:
+            self._pinned[(url, tuple(size))] = im
+
+    def request(self, url: str, size: Size, cb: Callback) -> None:
+        key = (url, tuple(size))
+        with self._lock:
+            im = self._pinned.get(key)
+            if im is None:
+                im = self._lru.get(key)
+            if im is None:
+                waiting = self._pending.get(key)
+                if waiting is not None:  # läuft schon → nur Callback anhängen
+                    waiting.append(cb)
+                    return
+                self._pending[key] = [cb]
+        if im is not None:
+            cb(im)
+            return
+        self._pool.submit(self._load, key)
+
+    def original_bytes(self, url: str) -> bytes:
+        """Originalbild (Platte, sonst Download + Ablage); blockierend – nur aus Workern aufrufen."""
+        digest = self._index.get(url)
+        if digest:
+            try:
+                with open(self._blob_path(digest), "rb") as f:
+                    metrics.inc("icon_disk_hit")
+                    return f.read()
+            except OSError:
+                pass
+        with metrics.span("icon.download"):
+            resp = self.http.get(url)
+            resp.raise_for_status()
+        data = resp.content
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with self._lock:
+            self._index[url] = digest
+            self._index_dirty += 1
+            flush = self._index_dirty >= 20
+        if flush:
+            self.save_index()
+        return data
+
+    def save_index(self) -> None:
+        with self._lock:
+            if not self._index_dirty:
+                return
+            snapshot = dict(self._index)
+            self._index_dirty = 0
+        tmp = f"{self._index_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self._index_path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.save_index()
+
+    # ---- intern ----
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _load(self, key: Tuple[str, Size]) -> None:
+        url, size = key
+        im: Optional[Image.Image] = None
+        try:
+            data = self.original_bytes(url)
+            with metrics.span("icon.decode"):
+                im = Image.open(io.BytesIO(data)).convert("RGBA").resize(size, Image.LANCZOS)
+        except Exception:
+            metrics.inc("icon_error")
+        with self._lock:
+            if im is not None:
+                self._put(key, im)
+            callbacks = self._pending.pop(key, [])
+        for cb in callbacks:
+            try:
+                cb(im)
+            except Exception:
+                pass
+
+    def _put(self, key: Tuple[str, Size], im: Image.Image) -> None:
+        """LRU einfügen und bis max_bytes verdrängen (Lock muss gehalten werden)."""
+        self._lru[key] = im
+        self._lru_bytes += im.width * im.height * 4
+        while self._lru_bytes > self.max_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self._lru_bytes -= old.width * old.height * 4
@@ -0,0 +1,390 @@
+# meta_stats.py – Meta-Statistik über gespeicherte Kämpfe (NumPy)
+"""
+Was spielt die Meta in unserem Trophäenbereich? Grundlage sind die Decks beider Seiten jedes
+gespeicherten Kampfes (history.sqlite3, gefiltert nach game_modes-Kategorien und Trophäen).
+- Karte × Karte Ko-Vorkommen: Präsenzmatrix (N, 128) blockweise, Xᵀ·X per BLAS
+- Nutzung und Winrate je Karte, Häufigkeit/Winrate je Deck und je Archetyp (Win-Conditions)
+- inkrementell: MetaStats(store) rechnet über den HistoryStore-Listener jeden neu gespeicherten
+  Kampf ein; ein Kampf aus beiden Perspektiven zählt nur einmal
+- Export als CSV (Karten, Ko-Vorkommen, Decks, Archetypen) oder NPZ (Rohdaten)
+
+Aufruf:
+    python meta_stats.py                                   # Top-Karten/Archetypen (Ladder+Ranked)
+    python meta_stats.py --min-trophies 7000 --max-trophies 8000 --csv meta/ --npz meta.npz
+    python meta_stats.py --modes ladder,ranked,2v2 --names  # Kartennamen aus dem Katalog (API)
+"""
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import game_modes
+from cr_api import _norm_tag
+from deck_bits import CARD_REGISTRY, DECK_BITS, CardRegistry, card_key, deck_mask, mask_words
+from deck_matrix import words_to_presence
+from history_store import _split_sides
+
+# Blockgröße für die Präsenzmatrix; float32-Matmul bleibt so exakt (< 2^24 je Block)
+_CHUNK = 1 << 16
+# so viele Deck-Zeilen dürfen sich ansammeln, bevor sie zusammengefasst werden
+_DECK_PENDING_MAX = 1 << 22
+
+# Win-Conditions für die Archetyp-Einteilung (Kartennamen wie im Katalog)
+WIN_CONDITIONS = frozenset({
+    "Hog Rider", "Golem", "Giant", "Royal Giant", "Goblin Giant", "Electro Giant", "Elixir Golem",
+    "Lava Hound", "Balloon", "X-Bow", "Mortar", "Graveyard", "Miner", "Goblin Barrel", "Ram Rider",
+    "Battle Ram", "Royal Hogs", "Three Musketeers", "Wall Breakers", "Skeleton Barrel", "Goblin Drill",
+    "Giant Skeleton", "P.E.K.K.A", "Mega Knight", "Sparky", "Royal Recruits", "Goblin Hut", "Furnace",
+})
+
+
+class MetaStats:
+    """
+    Laufende Zählwerte (alle Arrays über die 128 Bit-Indizes aus deck_bits):
+    cooc[i, j] Decks mit Karte i und j (Diagonale = Nutzung), uses/wins/decided je Karte,
+    dazu Anzahl und Siege je Deck (gepackte Maske).
+    """
+
+    def __init__(
+        self,
+        store: Any = None,
+        categories: FrozenSet[str] = game_modes.LADDER_CATEGORIES,
+        min_trophies: Optional[int] = None,
+        max_trophies: Optional[int] = None,
+        registry: CardRegistry = CARD_REGISTRY,
+    ):
+        self.store = store
+        self.categories = frozenset(categories)
+        self.min_trophies = min_trophies
+        self.max_trophies = max_trophies
+        self.registry = registry
+        self._lock = threading.Lock()
+        self.reset()
+        if store is not None:
+            store.add_listener(self._on_ingest)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.cooc = np.zeros((DECK_BITS, DECK_BITS), dtype=np.int64)
+            self.uses = np.zeros(DECK_BITS, dtype=np.int64)
+            self.wins = np.zeros(DECK_BITS, dtype=np.int64)
+            self.decided = np.zeros(DECK_BITS, dtype=np.int64)
+            self.decks_total = 0
+            self.battles = 0
+            # Decks: Blöcke (words (M, 2), [Anzahl, Siege, entschieden] (M, 3)), beim Lesen zusammengefasst
+            self._deck_parts: List[Tuple[np.ndarray, np.ndarray]] = []
+            self._deck_pending = 0
+
+    # ---- Einrechnen ----
+    def add_words(self, words: np.ndarray, won: np.ndarray, decided: np.ndarray) -> None:
+        """Block von Decks einrechnen: words (N, 2) uint64, won/decided (N,) bool – vektorisiert."""
+        words = np.ascontiguousarray(words, dtype=np.uint64).reshape(-1, 2)
+        won = np.asarray(won, dtype=bool)
+        decided = np.asarray(decided, dtype=bool)
+        if not len(words):
+            return
+        cooc = np.zeros_like(self.cooc)
+        uses = np.zeros_like(self.uses)
+        wins = np.zeros_like(self.wins)
+        dec = np.zeros_like(self.decided)
+        for s in range(0, len(words), _CHUNK):
+            x = words_to_presence(words[s : s + _CHUNK])
+            xf = x.astype(np.float32)
+            cooc += (xf.T @ xf).astype(np.int64)
+            uses += x.sum(axis=0, dtype=np.int64)
+            wins += x[won[s : s + _CHUNK]].sum(axis=0, dtype=np.int64)
+            dec += x[decided[s : s + _CHUNK]].sum(axis=0, dtype=np.int64)
+        vals = np.stack([np.ones(len(words), dtype=np.int64), won, decided], axis=1).astype(np.int64)
+        with self._lock:
+            self.cooc += cooc
+            self.uses += uses
+            self.wins += wins
+            self.decided += dec
+            self.decks_total += len(words)
+            self._deck_parts.append((words.copy(), vals))
+            self._deck_pending += len(words)
+            if self._deck_pending > _DECK_PENDING_MAX:
+                self._merge_decks()
+
+    def _merge_decks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Deck-Blöcke zu je einer Zeile pro Deck zusammenfassen (unter self._lock)."""
+        if len(self._deck_parts) == 1 and not self._deck_pending:
+            return self._deck_parts[0]
+        if not self._deck_parts:
+            return np.zeros((0, 2), dtype=np.uint64), np.zeros((0, 3), dtype=np.int64)
+        words = np.ascontiguousarray(np.concatenate([w for w, _ in self._deck_parts]))
+        vals = np.concatenate([v for _, v in self._deck_parts])
+        # 16 Byte je Deck als ein Wert → 1-D-unique statt des langsamen axis=0
+        uniq, inv = np.unique(words.view(np.dtype((np.void, 16))).ravel(), return_inverse=True)
+        inv = inv.reshape(-1)
+        merged = np.stack([np.bincount(inv, weights=vals[:, c], minlength=len(uniq)) for c in range(3)], axis=1)
+        self._deck_parts = [(uniq.view(np.uint64).reshape(-1, 2), merged.astype(np.int64))]
+        self._deck_pending = 0
+        return self._deck_parts[0]
+
+    def _add_rows(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        """Zeilen aus HistoryStore.iter_battle_decks (Kategorie-Filter hier, Trophäen schon per SQL)."""
+        classify = game_modes.GAME_MODES.classify_fields
+        keep = []
+        for r in rows:
+            n_opp = (r[4] or "").count("+") + 1
+            if classify(r[0], r[1] or "", r[2] or "", r[3] or "", n_opp, n_opp) in self.categories:
+                keep.append((r[5] or 0, r[6] or 0, r[7] or 0, r[8] or 0, r[9] or 0, r[10] or 0, r[7] is not None, r[9] is not None))
+        if not keep:
+            return
+        a = np.array(keep, dtype=np.int64)
+        cf, ca = a[:, 0], a[:, 1]
+        own, opp = a[:, 6].astype(bool), a[:, 7].astype(bool)
+        words = np.concatenate([a[own, 2:4], a[opp, 4:6]]).view(np.uint64)  # signed int64 → uint64
+        won = np.concatenate([(cf > ca)[own], (ca > cf)[opp]])
+        decided = np.concatenate([(cf != ca)[own], (cf != ca)[opp]])
+        self.add_words(words, won, decided)
+        with self._lock:
+            self.battles += len(keep)
+
+    def load(self, store: Any = None, chunk: int = 100_000) -> int:
+        """Alle passenden Kämpfe aus dem Store einrechnen; Rückgabe: Anzahl Kämpfe."""
+        store = store or self.store
+        before = self.battles
+        for rows in store.iter_battle_decks(self.min_trophies, self.max_trophies, chunk=chunk):
+            self._add_rows(rows)
+        return self.battles - before
+
+    def add_battles(self, player_tag: str, battles: Iterable[Dict[str, Any]]) -> int:
+        """Battlelog-Einträge (aus Sicht von player_tag) einrechnen; Rückgabe: Anzahl Kämpfe."""
+        pt = _norm_tag(player_tag)
+        words, won, decided = [], [], []
+        n = 0
+        for b in battles:
+            if game_modes.classify(b) not in self.categories:
+                continue
+            own, other = _split_sides(b, pt)
+            if own is None:
+                continue
+            me = next(p for p in own if _norm_tag(p.get("tag")) == pt)
+            trophies = me.get("startingTrophies")
+            if self.min_trophies is not None and (trophies is None or trophies < self.min_trophies):
+                continue
+            if self.max_trophies is not None and (trophies is None or trophies > self.max_trophies):
+                continue
+            opp_tag = "+".join(sorted(_norm_tag(p.get("tag")) for p in other))
+            if self.store is not None and self.store.has_battle(opp_tag, b.get("battleTime") or "", pt):
+                continue  # schon aus Sicht des Gegners gezählt
+            cf = int(me.get("crowns") or 0)
+            ca = max((int(p.get("crowns") or 0) for p in other), default=0)
+            for cards, w in ((me.get("cards"), cf > ca), ((other[0].get("cards") if other else None), ca > cf)):
+                if cards:
+                    words.append(mask_words(deck_mask(cards, self.registry)))
+                    won.append(w)
+                    decided.append(cf != ca)
+            n += 1
+        if words:
+            self.add_words(np.array(words, dtype=np.uint64), np.array(won), np.array(decided))
+        with self._lock:
+            self.battles += n
+        return n
+
+    def _on_ingest(self, pt: str, added: List[Dict[str, Any]]) -> None:
+        self.add_battles(pt, added)
+
+    # ---- Abfragen ----
+    def _keys(self) -> List[str]:
+        return [self.registry.key(i) for i in range(min(len(self.registry), DECK_BITS))]
+
+    def card_stats(self, names: Optional[Dict[str, str]] = None, min_uses: int = 1) -> List[Dict[str, Any]]:
+        """Je Karte: Nutzung (Anteil der Decks) und Winrate, absteigend nach Nutzung."""
+        names = names or {}
+        with self._lock:
+            uses, wins, dec, total = self.uses.copy(), self.wins.copy(), self.decided.copy(), self.decks_total
+        out = []
+        for i, key in enumerate(self._keys()):
+            if uses[i] < min_uses:
+                continue
+            out.append({
+                "key": key,
+                "name": names.get(key, key),
+                "uses": int(uses[i]),
+                "usage_rate": uses[i] / total if total else 0.0,
+                "wins": int(wins[i]),
+                "win_rate": wins[i] / dec[i] if dec[i] else 0.0,
+            })
+        out.sort(key=lambda r: -r["uses"])
+        return out
+
+    def pairs(self, key: str, k: int = 10, names: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
+        """Karten, die am häufigsten mit `key` zusammen gespielt werden: (Name/Key, Anteil der Decks mit key)."""
+        names = names or {}
+        i = self.registry.find(key)
+        if i is None or i >= DECK_BITS:  # Karten jenseits von 128 (Registry-Überlauf) fehlen hier
+            return []
+        with self._lock:
+            row = self.cooc[i].astype(np.float64)
+        if not row[i]:
+            return []
+        row /= row[i]
+        row[i] = -1.0
+        keys = self._keys()
+        top = [j for j in np.argsort(-row)[:k] if j < len(keys) and row[j] > 0]
+        return [(names.get(keys[j], keys[j]), float(row[j])) for j in top]
+
+    def _deck_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(Deck-Masken (M, 2), [Anzahl, Siege, entschieden] (M, 3)) – eine Zeile je Deck."""
+        with self._lock:
+            return self._merge_decks()
+
+    def top_decks(self, k: int = 20, names: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        names = names or {}
+        words, vals = self._deck_arrays()
+        keys = self._keys()
+        out = []
+        for i in np.argsort(-vals[:, 0], kind="stable")[:k]:
+            bits = np.flatnonzero(words_to_presence(words[i : i + 1])[0])
+            n, w, d = vals[i].tolist()
+            out.append({
+                "cards": [names.get(keys[b], keys[b]) for b in bits if b < len(keys)],
+                "count": n,
+                "win_rate": w / d if d else 0.0,
+            })
+        return out
+
+    def archetypes(self, names: Dict[str, str], k: int = 20) -> List[Dict[str, Any]]:
+        """Decks nach ihren Win-Conditions gruppiert (braucht Kartennamen, z. B. aus /cards)."""
+        words, vals = self._deck_arrays()
+        if not len(words):
+            return []
+        keys = self._keys()
+        wc = np.zeros(DECK_BITS, dtype=bool)
+        for i, key in enumerate(keys):
+            wc[i] = names.get(key) in WIN_CONDITIONS
+        x = words_to_presence(words).astype(bool) & wc
+        packed = np.packbits(x, axis=1)
+        uniq, inv = np.unique(packed, axis=0, return_inverse=True)
+        inv = inv.reshape(-1)
+        n = np.bincount(inv, weights=vals[:, 0], minlength=len(uniq))
+        w = np.bincount(inv, weights=vals[:, 1], minlength=len(uniq))
+        d = np.bincount(inv, weights=vals[:, 2], minlength=len(uniq))
+        out = []
+        for g in np.argsort(-n, kind="stable")[:k]:
+            bits = np.flatnonzero(np.unpackbits(uniq[g])[:DECK_BITS])
+            label = " + ".join(sorted(names.get(keys[b], keys[b]) for b in bits)) or "ohne Win-Condition"
+            out.append({"archetype": label, "count": int(n[g]), "win_rate": float(w[g] / d[g]) if d[g] else 0.0})
+        return out
+
+    # ---- Export ----
+    def export_npz(self, path: str) -> None:
+        words, vals = self._deck_arrays()
+        with self._lock:
+            np.savez_compressed(
+                path,
+                keys=np.array(self._keys()),
+                cooc=self.cooc,
+                uses=self.uses,
+                wins=self.wins,
+                decided=self.decided,
+                deck_words=words,
+                deck_counts=vals,
+                decks_total=self.decks_total,
+                battles=self.battles,
+            )
+
+    def export_csv(self, out_dir: str, names: Optional[Dict[str, str]] = None) -> List[str]:
+        """cards.csv, cooccurrence.csv, decks.csv (+ archetypes.csv mit names); Rückgabe: Dateipfade."""
+        os.makedirs(out_dir, exist_ok=True)
+        names = names or {}
+        keys = self._keys()
+        paths = []
+
+        def write(name: str, header: List[str], rows: Iterable[Sequence[Any]]) -> None:
+            path = os.path.join(out_dir, name)
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                wr = csv.writer(f)
+                wr.writerow(header)
+                wr.writerows(rows)
+            paths.append(path)
+
+        cards = self.card_stats(names)
+        write("cards.csv", ["key", "name", "uses", "usage_rate", "wins", "win_rate"],
+              ([c["key"], c["name"], c["uses"], f"{c['usage_rate']:.4f}", c["wins"], f"{c['win_rate']:.4f}"] for c in cards))
+        with self._lock:
+            cooc = self.cooc[: len(keys), : len(keys)].copy()
+        labels = [names.get(k, k) for k in keys]
+        write("cooccurrence.csv", ["card", *labels], ([labels[i], *cooc[i].tolist()] for i in range(len(keys))))
+        write("decks.csv", ["count", "win_rate", "cards"],
+              ([d["count"], f"{d['win_rate']:.4f}", " | ".join(d["cards"])] for d in self.top_decks(k=len(self._deck_arrays()[0]), names=names)))
+        if names:
+            write("archetypes.csv", ["archetype", "count", "win_rate"],
+                  ([a["archetype"], a["count"], f"{a['win_rate']:.4f}"] for a in self.archetypes(names, k=10_000)))
+        return paths
+
+
+def _catalog_names() -> Dict[str, str]:
+    """Kartennamen aus /cards (CLASH_TOKEN bzw. DECKFINDER_SERVICE aus .env)."""
+    from dotenv import load_dotenv
+
+    from cr_api import ClashAPI
+
+    load_dotenv()
+    service = os.getenv("DECKFINDER_SERVICE")
+    if service:
+        api = ClashAPI(os.getenv("DECKFINDER_SERVICE_TOKEN") or "", base_url=service)
+    else:
+        api = ClashAPI(os.getenv("CLASH_TOKEN") or "")
+    try:
+        return {card_key(c): c.get("name", "") for c in api.get_cards().get("items", [])}
+    finally:
+        api.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="DeckFinder Meta-Statistik")
+    ap.add_argument("--db", default="history.sqlite3", help="HistoryStore-Datei")
+    ap.add_argument("--modes", default="ladder,ranked", help=f"Kategorien, kommagetrennt ({', '.join(game_modes.CATEGORIES)})")
+    ap.add_argument("--min-trophies", type=int, default=None)
+    ap.add_argument("--max-trophies", type=int, default=None)
+    ap.add_argument("--top", type=int, default=15, help="Zeilen je Tabelle")
+    ap.add_argument("--names", action="store_true", help="Kartennamen aus dem Katalog laden (API)")
+    ap.add_argument("--csv", default="", help="Ordner für CSV-Export")
+    ap.add_argument("--npz", default="", help="Datei für NPZ-Export")
+    args = ap.parse_args(argv)
+
+    from history_store import HistoryStore
+
+    if not os.path.exists(args.db):
+        print(f"Keine Historie gefunden: {args.db}", file=sys.stderr)
+        return 1
+    modes = frozenset(m.strip() for m in args.modes.split(",") if m.strip())
+    names = _catalog_names() if args.names else {}
+
+    store = HistoryStore(args.db)
+    try:
+        meta = MetaStats(categories=modes, min_trophies=args.min_trophies, max_trophies=args.max_trophies)
+        t0 = time.perf_counter()
+        meta.load(store)
+        print(f"{meta.battles} Kämpfe / {meta.decks_total} Decks in {time.perf_counter() - t0:.2f} s", file=sys.stderr)
+    finally:
+        store.close()
+
+    print(f"{'Karte':<24} {'Nutzung':>8} {'Winrate':>8}")
+    for c in meta.card_stats(names)[: args.top]:
+        print(f"{c['name'][:24]:<24} {c['usage_rate']*100:>7.1f}% {c['win_rate']*100:>7.1f}%")
+    if names:
+        print()
+        for a in meta.archetypes(names, k=args.top):
+            print(f"{a['archetype'][:48]:<48} {a['count']:>7} {a['win_rate']*100:>6.1f}%")
+
+    if args.csv:
+        for p in meta.export_csv(args.csv, names):
+            print("geschrieben:", p, file=sys.stderr)
+    if args.npz:
+        meta.export_npz(args.npz)
+        print("geschrieben:", args.npz, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# metrics.py
+"""
+Leichte Latenz-Messung pro Stufe (Capture → OCR → API → Rendering).
+- span("name"): Context-Manager, misst Wanddauer in ms in ein Histogramm
+- inc("name"): Zähler (OCR-Skips, Cache-Treffer, Retries, …)
+- summary(): kurze Textzeilen für UI-Log; dump(path): Prometheus-Textformat (.prom) oder JSON
+Aktiv nur mit DECKFINDER_METRICS=1 (oder enable()); sonst liefern span/inc sofort
+einen No-op zurück – Overhead ein Attribut-Lookup + Funktionsaufruf.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List
+
+# Bucket-Grenzen in ms (Prometheus 'le'); +Inf kommt implizit dazu
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRICS_ENV = "DECKFINDER_METRICS"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        i = 0
+        for b in BUCKETS_MS:
+            if ms <= b:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        """Näherung: Obergrenze des Buckets, in dem das q-Quantil liegt (letzter Bucket → max)."""
+        if not self.count:
+            return 0.0
+        need = math.ceil(q * self.count)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= need:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("reg", "name", "t0")
+
+    def __init__(self, reg: "Metrics", name: str):
+        self.reg = reg
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.reg.observe(self.name, (time.perf_counter() - self.t0) * 1000.0)
+        return False
+
+
+class Metrics:
+    """Thread-sichere Sammlung von Histogrammen (ms) und Zählern."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hist: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self.started = time.time()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name: str, ms: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = Histogram()
+            h.observe(ms)
+
+    def inc(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    # ---- Ausgabe ----
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            hist = {
+                k: {
+                    "count": h.count,
+                    "sum_ms": round(h.total, 3),
+                    "avg_ms": round(h.total / h.count, 3) if h.count else 0.0,
+                    "p50_ms": h.quantile(0.5),
+                    "p95_ms": h.quantile(0.95),
+                    "max_ms": round(h.max, 3),
+                    "buckets": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], h.counts)),
+                }
+                for k, h in sorted(self._hist.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"since": self.started, "spans": hist, "counters": counters}
+
+    def summary(self) -> List[str]:
+        """Eine Zeile pro Stufe (avg/p95/max) plus eine Zeile mit allen Zählern."""
+        snap = self.snapshot()
+        lines = [
+            f"{k}: n={s['count']} avg={s['avg_ms']:.1f}ms p95≤{s['p95_ms']:.0f}ms max={s['max_ms']:.0f}ms"
+            for k, s in snap["spans"].items()
+        ]
+        if snap["counters"]:
+            lines.append(" | ".join(f"{k}={v}" for k, v in snap["counters"].items()))
+        return lines
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        out: List[str] = []
+        for k, s in snap["spans"].items():
+            m = f"deckfinder_{_metric_name(k)}_ms"
+            out.append(f"# TYPE {m} histogram")
+            cum = 0
+            for le, c in s["buckets"].items():
+                cum += c
+                out.append(f'{m}_bucket{{le="{le}"}} {cum}')
+            out.append(f"{m}_sum {s['sum_ms']}")
+            out.append(f"{m}_count {s['count']}")
+        for k, v in snap["counters"].items():
+            m = f"deckfinder_{_metric_name(k)}_total"
+            out.append(f"# TYPE {m} counter")
+            out.append(f"{m} {v}")
+        return "\n".join(out) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Schreibt atomar nach path; Endung .prom/.txt → Prometheus-Text, sonst JSON."""
+        if path.endswith((".prom", ".txt")):
+            data = self.to_prometheus()
+        else:
+            data = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _env_enabled() -> bool:
+    return os.getenv(METRICS_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Prozessweite Instanz; Module nutzen metrics.span(...) / metrics.inc(...)
+METRICS = Metrics(enabled=_env_enabled())
+span = METRICS.span
+inc = METRICS.inc
+observe = METRICS.observe
+
+
+def enable(on: bool = True) -> None:
+    METRICS.enabled = on
+
+
+def enable_from_env() -> bool:
+    """Nach load_dotenv() aufrufen – .env wird beim Import noch nicht gelesen sein."""
+    if _env_enabled():
+        METRICS.enabled = True
+    return METRICS.enabled
@@ -0,0 +1,108 @@
+# prewarm.py
+"""
+Hintergrund-Job: Clans einer Watch-List vorab laden.
+Für jeden Clan: Clan-Info + Namenssuche (füllt den Such-Cache), Roster inkl. NameIndex,
+danach der Battlelog jedes Mitglieds (→ ResponseCache + HistoryStore). Profile lädt der
+Vordergrund immer frisch (currentDeck), sie vorzuladen kostet also nur Rate-Limit.
+Läuft mit wenigen Workern und Hintergrund-Priorität im RateLimiter, damit
+Live-Lookups nie auf das Prewarming warten müssen. Vorgeladene Einträge bekommen eine
+Lebensdauer über das Intervall hinaus (prewarm_ttl), sonst wären sie den Großteil eines
+Zyklus schon abgelaufen.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from cr_api import CACHE_TTL, ClashAPI
+
+PREWARM_INTERVAL = 600.0  # Sekunden zwischen zwei Durchläufen
+PREWARM_WORKERS = 3
+PREWARM_TTL_MARGIN = 300.0  # Reserve für die Dauer eines Durchlaufs
+PREWARM_KINDS = ("search", "clan", "members", "roster", "battlelog")
+
+
+def prewarm_ttl(interval: float = PREWARM_INTERVAL) -> Dict[str, float]:
+    """cache_ttl für die ClashAPI des Prewarmers: Einträge halten bis nach dem nächsten Durchlauf."""
+    return {k: max(CACHE_TTL[k], interval + PREWARM_TTL_MARGIN) for k in PREWARM_KINDS}
+
+
+class RosterPrewarmer(threading.Thread):
+    """
+    api: ClashAPI mit background=True, geteiltem ResponseCache/RateLimiter und
+         cache_ttl=prewarm_ttl(interval)
+    store: optionaler HistoryStore, in den alle Battlelogs einfließen
+    on_progress: Callback(text) für Status/Log (z. B. UI-Queue)
+    """
+
+    def __init__(
+        self,
+        api: ClashAPI,
+        clan_tags: List[str],
+        store: Any = None,
+        workers: int = PREWARM_WORKERS,
+        interval: float = PREWARM_INTERVAL,
+        stop_ev: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        super().__init__(daemon=True)
+        self.api = api
+        self.clan_tags = [t.lstrip("#").upper() for t in clan_tags if t]
+        self.store = store
+        self.workers = max(1, workers)
+        self.interval = interval
+        self.stop_ev = stop_ev or threading.Event()
+        self.on_progress = on_progress or (lambda s: None)
+
+    def stop(self) -> None:
+        self.stop_ev.set()
+
+    def run(self):
+        while not self.stop_ev.is_set():
+            stats = self.warm_once()
+            self.on_progress(
+                f"Prewarm fertig: {stats['clans']} Clans, {stats['players']} Spieler, "
+                f"{stats['battles']} neue Kämpfe, {stats['errors']} Fehler"
+            )
+            self.stop_ev.wait(self.interval)
+
+    def warm_once(self) -> Dict[str, int]:
+        stats = {"clans": 0, "players": 0, "battles": 0, "errors": 0}
+        for i, ctag in enumerate(self.clan_tags, start=1):
+            if self.stop_ev.is_set():
+                break
+            try:
+                clan = self.api.get_clan(ctag, refresh=True)
+                if clan.get("name"):
+                    self.api.search_clans(clan["name"], 20, refresh=True)
+                items, _ = self.api.get_clan_roster(ctag, refresh=True)
+            except Exception as e:
+                stats["errors"] += 1
+                self.on_progress(f"Prewarm: Clan #{ctag} fehlgeschlagen: {e}")
+                continue
+            stats["clans"] += 1
+            self.on_progress(f"Prewarm {i}/{len(self.clan_tags)}: #{ctag} ({len(items)} Mitglieder)")
+
+            tags = [(m.get("tag") or "").lstrip("#").upper() for m in items]
+            with ThreadPoolExecutor(max_workers=self.workers) as ex:
+                for added in ex.map(self._warm_player, [t for t in tags if t]):
+                    if added < 0:
+                        stats["errors"] += 1
+                    else:
+                        stats["players"] += 1
+                        stats["battles"] += added
+        return stats
+
+    def _warm_player(self, tag: str) -> int:
+        """Battlelog laden; Rückgabe: neu gespeicherte Kämpfe (−1 bei Fehler)."""
+        if self.stop_ev.is_set():
+            return 0
+        try:
+            battles = self.api.get_battlelog(tag, refresh=True)
+        except Exception:
+            return -1
+        if self.store is None:
+            return 0
+        try:
+            return len(self.store.ingest_battlelog(tag, battles))
+        except Exception:
+            return -1
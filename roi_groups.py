@@ -0,0 +1,121 @@
+# roi_groups.py
+"""
+Mehrere Gegner gleichzeitig (2v2, mehrere Clients/Stream-Fenster): benannte ROI-Gruppen,
+jede mit eigenem Namens- und Clan-Ausschnitt.
+- config.json: "roi_groups": [{"label": "Gegner 1", "roi_name": [x, y, w, h], "roi_clan": [...]}, …];
+  alte Konfigurationen mit nur roi_name/roi_clan werden als eine Gruppe gelesen, und
+  roi_name/roi_clan werden weiter (= erste Gruppe) mitgeschrieben
+- capture_plan: ein gemeinsamer Bildschirmausschnitt für alle ROIs statt des ganzen Desktops;
+  liegen die Gruppen weit auseinander, je ROI ein kleiner Ausschnitt
+- Stabilizer: Entprellung je Gruppe – nachgeschlagen wird erst nach stable_need gleichen
+  Lesungen und pro Paar (Name, Clan) nur einmal
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+Roi = Tuple[int, int, int, int]  # x, y, w, h (Koordinaten im Screenshot des virtuellen Desktops)
+
+DEFAULT_LABEL = "Gegner"
+CAPTURE_WASTE_MAX = 4.0  # gemeinsamer Ausschnitt höchstens so viel größer als die ROIs zusammen
+
+
+@dataclass(slots=True)
+class RoiGroup:
+    label: str
+    roi_name: Roi
+    roi_clan: Roi
+
+
+def _roi(v: Any) -> Roi:
+    x, y, w, h = (int(n) for n in v)
+    if w <= 0 or h <= 0:
+        raise ValueError(f"ungültige ROI: {v}")
+    return x, y, w, h
+
+
+def default_label(i: int) -> str:
+    return f"{DEFAULT_LABEL} {i + 1}"
+
+
+def groups_from_config(cfg: Dict[str, Any]) -> List[RoiGroup]:
+    """ROI-Gruppen aus config.json; ohne roi_groups eine Gruppe aus roi_name/roi_clan."""
+    raw = cfg.get("roi_groups")
+    if raw:
+        groups = []
+        for i, g in enumerate(raw):
+            label = str(g.get("label") or default_label(i))
+            if any(label == other.label for other in groups):
+                label = f"{label} ({i + 1})"
+            groups.append(RoiGroup(label, _roi(g["roi_name"]), _roi(g["roi_clan"])))
+        return groups
+    if "roi_name" in cfg and "roi_clan" in cfg:
+        return [RoiGroup(DEFAULT_LABEL, _roi(cfg["roi_name"]), _roi(cfg["roi_clan"]))]
+    return []
+
+
+def groups_to_config(groups: List[RoiGroup], cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Gruppen in cfg eintragen (übrige Schlüssel bleiben); roi_name/roi_clan = erste Gruppe."""
+    cfg["roi_groups"] = [
+        {"label": g.label, "roi_name": list(g.roi_name), "roi_clan": list(g.roi_clan)} for g in groups
+    ]
+    if groups:
+        cfg["roi_name"] = list(groups[0].roi_name)
+        cfg["roi_clan"] = list(groups[0].roi_clan)
+    return cfg
+
+
+def _area(r: Roi) -> int:
+    return r[2] * r[3]
+
+
+def bbox(rois: List[Roi]) -> Roi:
+    x0 = min(r[0] for r in rois)
+    y0 = min(r[1] for r in rois)
+    x1 = max(r[0] + r[2] for r in rois)
+    y1 = max(r[1] + r[3] for r in rois)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def capture_plan(rois: List[Roi], max_waste: float = CAPTURE_WASTE_MAX) -> Tuple[List[Roi], List[Tuple[int, Roi]]]:
+    """
+    (Aufnahme-Regionen, je ROI (Index der Region, ROI relativ zur Region)).
+    Eine Region um alle ROIs, solange sie nicht mehr als max_waste-mal so groß ist wie die
+    ROIs zusammen – sonst je ROI eine eigene.
+    """
+    union = bbox(rois)
+    if _area(union) <= max_waste * sum(_area(r) for r in rois):
+        regions = [union]
+    else:
+        regions = list(dict.fromkeys(rois))
+    where = []
+    for r in rois:
+        k = next(
+            i for i, (x, y, w, h) in enumerate(regions)
+            if x <= r[0] and y <= r[1] and r[0] + r[2] <= x + w and r[1] + r[3] <= y + h
+        )
+        where.append((k, (r[0] - regions[k][0], r[1] - regions[k][1], r[2], r[3])))
+    return regions, where
+
+
+class Stabilizer:
+    """Entprellung der OCR-Lesungen einer Gruppe."""
+
+    __slots__ = ("stable_need", "last_pair", "stable", "last_resolved")
+
+    def __init__(self, stable_need: int = 1):
+        self.stable_need = stable_need
+        self.last_pair: Tuple[str, str] = ("", "")
+        self.stable = 0
+        self.last_resolved: Optional[Tuple[str, str]] = None
+
+    def feed(self, pair: Optional[Tuple[str, str]]) -> bool:
+        """Neue Lesung (None = unplausibel); True, wenn das Paar jetzt nachgeschlagen werden soll."""
+        if pair is None:
+            self.stable = 0
+            return False
+        self.stable = self.stable + 1 if pair == self.last_pair else 1
+        self.last_pair = pair
+        if self.stable < self.stable_need or self.last_resolved == pair:
+            return False
+        self.last_resolved = pair
+        return True
@@ -0,0 +1,192 @@
+# server.py – lokaler DeckFinder-Dienst (HTTP/JSON)
+"""
+Ein Prozess mit EINEM API-Client, Antwort-Cache, Rate-Limit und HistoryStore,
+den mehrere UIs / Batch-Läufe (auch auf anderen Rechnern im LAN) gemeinsam nutzen.
+
+Endpunkte:
+    GET /lookup?name=<Spieler>&clan=<Clan>   Lookup wie im UI (Deck, Match-Quote, Ladder-Stats)
+    GET /lookup?tag=<TAG>                    dasselbe direkt per Tag
+    GET /player/<TAG>                        Spielerprofil
+    GET /deck-report/<TAG>                   Deck + Match-Quote + Ladder-Stats per Tag
+    GET /health                              Cache-Treffer, Anzahl gespeicherter Kämpfe
+    GET /metrics                             Stufen-Latenzen/Zähler im Prometheus-Textformat
+
+Zusätzlich werden die Pfade der Clash-API gespiegelt (/clans, /clans/%23TAG[/members],
+/players/%23TAG[/battlelog], /cards) – so kann ClashAPI(base_url="http://host:8787") den Dienst
+ohne weitere Anpassung als Backend verwenden (UI: DECKFINDER_SERVICE in .env).
+
+Zugriff: ist DECKFINDER_SERVICE_TOKEN gesetzt, braucht jede Anfrage
+"Authorization: Bearer <Token>" (ClashAPI schickt das, wenn die Clients denselben Wert haben).
+Ohne Token lauscht der Dienst nur auf Loopback – sonst könnte jeder im LAN Token und Kontingent
+verbrauchen.
+
+Start:  python server.py [--host 127.0.0.1] [--port 8787]
+"""
+import argparse
+import hmac
+import ipaddress
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+import cr_models
+import http_pool
+import metrics
+from batch_lookup import lookup_player
+from cr_api import ClashAPI, RateLimiter, ResponseCache
+from history_store import HistoryStore
+
+DEFAULT_PORT = 8787
+SERVICE_TOKEN_ENV = "DECKFINDER_SERVICE_TOKEN"
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class DeckFinderService:
+    """Geteilter Zustand des Dienstes; die Handler-Methoden liefern (status, payload)."""
+
+    def __init__(self, api: ClashAPI, store: Optional[HistoryStore] = None):
+        self.api = api
+        self.store = store
+
+    def _battlelog(self, tag: str) -> Any:
+        battles = self.api.get_battlelog(tag)
+        if self.store is not None:
+            self.store.ingest_battlelog(tag, battles)
+        return battles
+
+    def handle(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if not parts:
+            return 404, {"error": "unbekannter Pfad"}
+        head, rest = parts[0], parts[1:]
+
+        if head == "health" and not rest:
+            cache = self.api.cache
+            return 200, {
+                "cache_hits": cache.hits if cache else 0,
+                "cache_misses": cache.misses if cache else 0,
+                "stored_battles": self.store.count() if self.store else 0,
+            }
+        if head == "lookup" and not rest:
+            if not query.get("name") and not query.get("tag"):
+                return 400, {"error": "Parameter 'name' oder 'tag' fehlt"}
+            return 200, lookup_player(
+                self.api, name=query.get("name", ""), clan=query.get("clan", ""), tag=query.get("tag", ""), store=self.store
+            )
+        if head == "player" and len(rest) == 1:
+            return 200, self.api.get_player(rest[0])
+        if head == "deck-report" and len(rest) == 1:
+            return 200, lookup_player(self.api, tag=rest[0], store=self.store)
+
+        # ---- Spiegel der Clash-API-Pfade (für ClashAPI(base_url=...)) ----
+        if head == "clans" and not rest:
+            return 200, self.api.search_clans(query.get("name", ""), int(query.get("limit") or 20))
+        if head == "clans" and len(rest) == 1:
+            return 200, self.api.get_clan(rest[0])
+        if head == "clans" and len(rest) == 2 and rest[1] == "members":
+            return 200, self.api.get_clan_members(rest[0])
+        if head == "cards" and not rest:
+            return 200, self.api.get_cards()
+        if head == "players" and len(rest) == 1:
+            return 200, self.api.get_player(rest[0])
+        if head == "players" and len(rest) == 2 and rest[1] == "battlelog":
+            return 200, self._battlelog(rest[0])
+        return 404, {"error": "unbekannter Pfad"}
+
+
+def make_handler(service: DeckFinderService, token: str = "") -> type:
+    """token: gemeinsames Geheimnis – leer = keine Prüfung (nur für Loopback gedacht)."""
+    expected = f"Bearer {token}".encode("utf-8") if token else b""
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "deckfinder/1.0"
+
+        def do_GET(self):
+            if expected and not hmac.compare_digest(
+                (self.headers.get("Authorization") or "").encode("utf-8"), expected
+            ):
+                self._send(401, cr_models.dumps({"error": "Token fehlt oder falsch"}), "application/json; charset=utf-8")
+                return
+            url = urlsplit(self.path)
+            if url.path == "/metrics":
+                self._send(200, metrics.METRICS.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+                return
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                with metrics.span("service.request"):
+                    status, payload = service.handle(url.path, query)
+            except httpx.HTTPStatusError as e:
+                status, payload = e.response.status_code, {"error": str(e)}
+            except LookupError as e:
+                status, payload = 404, {"error": str(e)}
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 502, {"error": f"{type(e).__name__}: {e}"}
+            self._send(status, cr_models.dumps(payload), "application/json; charset=utf-8")
+
+        def _send(self, status: int, body: bytes, ctype: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):  # ruhiger als der Default (kein Log pro Request)
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="DeckFinder-Dienst (geteilter Cache für mehrere Clients)")
+    ap.add_argument("--host", default="127.0.0.1", help=f"Bind-Adresse (außer Loopback nur mit {SERVICE_TOKEN_ENV})")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--no-store", action="store_true", help="keine lokale Historie schreiben")
+    args = ap.parse_args(argv)
+
+    load_dotenv()
+    metrics.enable_from_env()
+    token = os.getenv("CLASH_TOKEN")
+    if not token:
+        print("Fehlt: CLASH_TOKEN in .env", file=sys.stderr)
+        return 1
+
+    service_token = os.getenv(SERVICE_TOKEN_ENV, "")
+    if not service_token and not is_loopback(args.host):
+        print(f"{args.host} ist von außen erreichbar – bitte {SERVICE_TOKEN_ENV} in .env setzen.", file=sys.stderr)
+        return 1
+
+    api = ClashAPI(token, typed=cr_models.HAVE_MSGSPEC, cache=ResponseCache(), limiter=RateLimiter())
+    store = None if args.no_store else HistoryStore()
+    handler = make_handler(DeckFinderService(api, store), service_token)
+    httpd = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"DeckFinder-Dienst läuft auf http://{args.host}:{args.port} – STRG+C zum Beenden.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        api.close()
+        http_pool.POOL.close()
+        if store is not None:
+            store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
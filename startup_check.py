@@ -0,0 +1,84 @@
+# startup_check.py – Startzeit-Budget: Importzeiten von ui.py und den schweren Modulen
+"""
+Aufruf:
+    python startup_check.py                 # Tabelle, Exit 1 wenn "import ui" über Budget
+    python startup_check.py --budget 300    # Budget in ms (Standard: DECKFINDER_IMPORT_BUDGET_MS bzw. 400)
+    python startup_check.py --repeat 5
+
+Jeder Import läuft in einem frischen Interpreter mit "python -X importtime"; gemessen wird
+die kumulative Zeit des Top-Level-Moduls (bester von --repeat Läufen). ui.py lädt den
+OCR/Capture-Stack (cv2, numpy, mss, pytesseract) erst beim ersten Scan – taucht er hier
+wieder in "import ui" auf, reißt das Budget.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+HEAVY_MODULES = ("cv2", "numpy", "mss", "pytesseract", "PIL.ImageTk", "httpx")
+LAZY_MODULES = ("cv2", "numpy", "mss", "pytesseract")  # dürfen von "import ui" nicht geladen werden
+IMPORT_BUDGET_MS = float(os.getenv("DECKFINDER_IMPORT_BUDGET_MS", "400"))
+
+_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+
+
+def import_profile(module: str) -> Optional[Dict[str, float]]:
+    """Modul → kumulative ms für alle Importe von `import module`; None wenn der Import scheitert."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        return None
+    out: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            out[m.group(4)] = int(m.group(2)) / 1000.0
+    return out
+
+
+def measure(module: str, repeat: int) -> Optional[float]:
+    best = None
+    for _ in range(max(1, repeat)):
+        prof = import_profile(module)
+        if prof is None or module not in prof:
+            return None
+        best = prof[module] if best is None else min(best, prof[module])
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="DeckFinder Startzeit-Budget")
+    ap.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="Budget für 'import ui' in ms")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    width = max(len(m) for m in ("ui", *HEAVY_MODULES))
+    for mod in HEAVY_MODULES:
+        ms = measure(mod, args.repeat)
+        print(f"{mod:<{width}} {'nicht installiert' if ms is None else f'{ms:>8.1f} ms'}")
+
+    ui_ms = measure("ui", args.repeat)
+    if ui_ms is None:
+        print("import ui fehlgeschlagen", file=sys.stderr)
+        return 1
+    print(f"{'ui':<{width}} {ui_ms:>8.1f} ms  (Budget {args.budget:.0f} ms)")
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if m in (import_profile("ui") or {})]
+    if eager:
+        print(f"OCR-Stack wird beim Start geladen: {', '.join(eager)}", file=sys.stderr)
+        failed = True
+    if ui_ms > args.budget:
+        print(f"import ui über Budget: {ui_ms:.0f} ms > {args.budget:.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,109 @@
+import time
+
+_T_START = time.perf_counter()  # für die Startzeit-Messung (Fenster bereit)
+
 import os
-import sys
 import json
-import time
 import threading
-import queue
-import io
 import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-
-import numpy as np
-import cv2
-import mss
-import pytesseract
-from PIL import Image, ImageTk
-import httpx
+from tkinter import ttk, messagebox, simpledialog
+
+from PIL import ImageTk
 from dotenv import load_dotenv
 
-# --- Tesseract suchen (einfach & robust) -------------------------------------
-TESS = os.getenv("TESSERACT_CMD")
-if TESS:
-    pytesseract.pytesseract.tesseract_cmd = TESS
-elif os.name == "nt":
-    for cand in (
-        r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-        r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-    ):
-        if os.path.exists(cand):
-            pytesseract.pytesseract.tesseract_cmd = cand
-            break
+# --- OCR/Capture-Stack: erst beim ersten Scan laden ---------------------------
+# cv2/numpy/mss/pytesseract kosten zusammen einige 100 ms Import – wer nur manuell
+# sucht, braucht sie nie. load_ocr_stack() füllt die Modul-Globals beim ersten Bedarf.
+np = cv2 = mss = pytesseract = None
+_OCR_LOCK = threading.Lock()
+IMPORT_TIMINGS: dict[str, float] = {}  # Modul → ms (für den Startzeit-Report)
+
+
+def _configure_tesseract():
+    """Tesseract suchen (einfach & robust) – nach load_dotenv, damit TESSERACT_CMD aus .env greift."""
+    tess = os.getenv("TESSERACT_CMD")
+    if tess:
+        pytesseract.pytesseract.tesseract_cmd = tess
+    elif os.name == "nt":
+        for cand in (
+            r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+            r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+        ):
+            if os.path.exists(cand):
+                pytesseract.pytesseract.tesseract_cmd = cand
+                break
+
+
+def load_ocr_stack():
+    """Importiert numpy/cv2/mss/pytesseract einmalig (thread-sicher) und konfiguriert Tesseract."""
+    global np, cv2, mss, pytesseract
+    if pytesseract is not None:
+        return
+    import importlib
+
+    with _OCR_LOCK:
+        if pytesseract is not None:
+            return
+        mods = {}
+        for name in ("numpy", "cv2", "mss", "pytesseract"):
+            t0 = time.perf_counter()
+            mods[name] = importlib.import_module(name)
+            IMPORT_TIMINGS[name] = (time.perf_counter() - t0) * 1000.0
+        load_dotenv()
+        np, cv2, mss = mods["numpy"], mods["cv2"], mods["mss"]
+        pytesseract = mods["pytesseract"]
+        _configure_tesseract()
 # ------------------------------------------------------------------------------
 
 # --- Clash Royale API Helpers -------------------------------------------------
 from cr_api import (
     ClashAPI,
+    RateLimiter,
+    ResponseCache,
     resolve_clan_tag_by_name,
     resolve_player_tag_in_clan,
+    resolve_player_across_clans,
+    ladder_report,  # Ladder-Filter, Stats und Match-Quote aus dem Battlelog
+    battle_time_epoch,
     extract_player_cards_from_battle,  # für History-Decks aus Battlelog
+    _avg_elixir,
+    _four_card_cycle,
+    _favorite_card,
+    _find_icon_url,
 )
+import http_pool
+import metrics
+from cr_models import HAVE_MSGSPEC
+from deck_bits import card_key, deck_mask, keys_mask
+from history_store import HistoryStore
+from icon_loader import IconLoader
+from card_catalog import CatalogWarmup
+from ui_events import EventQueue
+from history_view import VirtualDeckList
+from prewarm import RosterPrewarmer, prewarm_ttl
+import game_modes
+from aggregates import ALL, RollingAggregates, group_for
+from view_cache import PlayerView, ViewCache, battle_signature, deck_signature
+from roi_groups import Stabilizer, capture_plan, groups_from_config
 
 CONF_PATH = "config.json"
+METRICS_SUMMARY_INTERVAL_MS = 60_000  # Metrik-Zusammenfassung ins Log (nur mit DECKFINDER_METRICS=1)
+METRICS_FILE_DEFAULT = "metrics.prom"  # .prom → Prometheus-Text, sonst JSON
+QUEUE_POLL_MS = 250  # Rückfall-Poll; wichtige Ereignisse wecken die UI sofort (ui_events)
+LOG_MAX_LINES = 500  # Log als Ringpuffer – Speicher/CPU bleiben über lange Sessions flach
+LOG_TRIM_CHUNK = 100
+HISTORY_MAX_ROWS = 500  # Decks in der Historienliste (Battlelog + lokale Historie)
+# Auswahl für Historie/Statistik (game_modes-Kategorien); erster Eintrag = Standard
+MODE_FILTERS = (
+    ("Ladder + Ranked", game_modes.LADDER_CATEGORIES),
+    *((game_modes.CATEGORY_LABELS[c], frozenset({c})) for c in game_modes.CATEGORIES if c != game_modes.OTHER),
+    ("Alle", frozenset(game_modes.CATEGORIES)),
+)
+STARTUP_BUDGET_MS = float(os.getenv("DECKFINDER_STARTUP_BUDGET_MS", "1500"))  # bis Fenster bedienbar
 
 
 # --------------------------- OCR: Name/Clan getrennt --------------------------
@@ -74,11 +137,22 @@ def preprocess_clan(img):
     return bw
 
 
-def _ocr_psm(img, psm):
+def _ocr_data(img, psm, span=None):
     cfg = f"--oem 3 --psm {psm}"
-    data = pytesseract.image_to_data(
-        img, output_type=pytesseract.Output.DICT, config=cfg, lang="eng"
-    )
+    with metrics.span(span or f"ocr.tesseract.psm{psm}"):
+        return pytesseract.image_to_data(
+            img, output_type=pytesseract.Output.DICT, config=cfg, lang="eng"
+        )
+
+
+def _join_words(words, confs):
+    text = re.sub(r"\s+", " ", " ".join(words).strip())
+    conf = float(np.mean(confs)) if confs else 0.0
+    return text, conf
+
+
+def _ocr_psm(img, psm):
+    data = _ocr_data(img, psm)
     words, confs = [], []
     for i, txt in enumerate(data["text"]):
         t = (txt or "").strip()
@@ -88,9 +162,47 @@ def _ocr_psm(img, psm):
                 confs.append(float(data["conf"][i]))
             except Exception:
                 pass
-    text = re.sub(r"\s+", " ", " ".join(words).strip())
-    conf = float(np.mean(confs)) if confs else 0.0
-    return text, conf
+    return _join_words(words, confs)
+
+
+OCR_BATCH_GAP = 32  # weißer Abstand zwischen gestapelten Ausschnitten (px, nach dem Hochskalieren)
+
+
+def ocr_batch(imgs, psm=6):
+    """
+    Mehrere vorverarbeitete Ausschnitte (schwarz auf weiß) in EINEM Tesseract-Aufruf:
+    untereinander gestapelt, Wörter danach per y-Position zurück verteilt.
+    Ein Aufruf kostet vor allem Prozessstart + Layoutanalyse – pro Gruppe kommt fast nichts dazu.
+    """
+    if not imgs:
+        return []
+    gap = OCR_BATCH_GAP
+    width = max(im.shape[1] for im in imgs)
+    parts, spans, y = [], [], gap
+    for im in imgs:
+        parts.append(np.full((gap, width), 255, dtype=np.uint8))
+        parts.append(cv2.copyMakeBorder(im, 0, 0, 0, width - im.shape[1], cv2.BORDER_CONSTANT, value=255))
+        spans.append((y - gap / 2, y + im.shape[0] + gap / 2))
+        y += im.shape[0] + gap
+    parts.append(np.full((gap, width), 255, dtype=np.uint8))
+    data = _ocr_data(np.vstack(parts), psm, span=f"ocr.tesseract.batch{len(imgs)}")
+
+    words = [[] for _ in imgs]
+    confs = [[] for _ in imgs]
+    for i, txt in enumerate(data["text"]):
+        t = (txt or "").strip()
+        if not t:
+            continue
+        cy = data["top"][i] + data["height"][i] / 2
+        k = next((k for k, (a, b) in enumerate(spans) if a <= cy < b), None)
+        if k is None:
+            continue
+        words[k].append(t)
+        try:
+            confs[k].append(float(data["conf"][i]))
+        except Exception:
+            pass
+    return [_join_words(w, c) for w, c in zip(words, confs)]
 
 
 def ocr_name(img):  # einzelnes Wort
@@ -108,106 +220,78 @@ def plausible(s: str, minlen=3):
     return bool(s) and len(s) >= minlen and re.search(r"[A-Za-z0-9]", s) is not None
 
 
-# ------------------- Ladder/Ranked PvP Filter + Stats -------------------------
-def _is_ranked_or_trophy_pvp_1v1(b: dict) -> bool:
+# ------------------------------- Deck-Historie ---------------------------------
+def _history_row(n: int, battle_time: str, cards: list, mask: int, cur_mask: int) -> dict:
+    """Eintrag für die Historienliste (history_view): Titel, Match-Anteil, Karten."""
+    inter = (cur_mask & mask).bit_count()
+    ts = battle_time_epoch(battle_time)
+    when = time.strftime("%d.%m. %H:%M", time.localtime(ts)) if ts else ""
+    return {"title": f"D{n}  {inter/8*100:.0f}% ({inter}/8)\n{when}", "pct": inter / 8.0, "cards": cards}
+
+
+def _rolling_texts(rolling: dict, names: dict) -> tuple[str, str]:
+    """Anzeige der rollenden Statistik (aggregates): Winrate je Fenster + Trend, Top-Karten."""
+    if not rolling:
+        return "—", "—"
+    windows = [w for w in rolling if w != ALL] + [ALL]
+    wr = " · ".join(f"{rolling[w]['winrate']*100:.0f}%" for w in windows)
+    last = rolling[windows[-2]] if len(windows) > 1 else rolling[ALL]
+    trend = f"{wr}  |  Trophäen ({last['battles']}): {last['trophy_change']:+d}, Deckwechsel: {last['deck_changes']}"
+    mid = rolling.get(25) or rolling[ALL]
+    top = ", ".join(names.get(k, k) for k, _ in mid["top_cards"][:4]) or "—"
+    return trend, top
+
+
+# --------------------------------- API-Backend --------------------------------
+def make_api(
+    cache: ResponseCache | None = None,
+    limiter: RateLimiter | None = None,
+    background: bool = False,
+    cache_ttl: dict[str, float] | None = None,
+) -> ClashAPI:
     """
-    True für Trophäenpfad/Ranked 1v1:
-    - type == 'PvP'
-    - kein Draft/Megadraft
-    - keine Friendlies, keine Challenges, kein Clanwar
+    ClashAPI direkt (CLASH_TOKEN) oder über einen DeckFinder-Dienst (DECKFINDER_SERVICE=http://…);
+    beim Dienst übernimmt dieser Token, Rate-Limit und Historie.
     """
-    if (b.get("type") or "").lower() != "pvp":
-        return False
-    if len(b.get("team") or []) != 1 or len(b.get("opponent") or []) != 1:
-        return False
-
-    gm = ((b.get("gameMode") or {}).get("name") or "").lower()
-    ds = (b.get("deckSelection") or "").lower()
-
-    if "draft" in ds:
-        return False
-    if b.get("challengeId") or b.get("challengeTitle") or b.get("isFriendly"):
-        return False
-    if any(k in gm for k in ("river", "boat", "clan war")):
-        return False
-
-    allowed = ("ranked", "path of legends", "ladder", "trophy road", "league")
-    return any(k in gm for k in allowed)
-
-
-def _avg_elixir(deck: list[dict]) -> float:
-    costs = []
-    for c in deck or []:
-        v = c.get("elixirCost", c.get("elixir"))
-        if isinstance(v, (int, float)):
-            costs.append(float(v))
-    return round(sum(costs) / len(costs), 1) if costs else 0.0
-
-
-def _four_card_cycle(deck: list[dict]) -> int:
-    costs = []
-    for c in deck or []:
-        v = c.get("elixirCost", c.get("elixir"))
-        if isinstance(v, (int, float)):
-            costs.append(float(v))
-    costs.sort()
-    return int(round(sum(costs[:4]))) if len(costs) >= 4 else 0
-
-
-def _favorite_card(player: dict) -> dict | None:
-    fav = player.get("currentFavouriteCard")
-    if fav:
-        return fav
-    deck = player.get("currentDeck") or []
-    return deck[0] if deck else None
-
-
-def _find_icon_url(card_obj: dict) -> str | None:
-    icon = (card_obj or {}).get("iconUrls") or {}
-    for k in ("medium", "evolutionMedium", "evolutionSmall", "large", "small"):
-        if icon.get(k):
-            return icon[k]
-    return None
-
-
-def _pvp_stats_last_n(battles: list[dict], n: int = 10) -> tuple[int, int, float, int, int]:
-    """Gibt (wins, losses, wr, crowns_for, crowns_against) über die letzten n Ladder-PvP zurück."""
-    wins = losses = crowns_for = crowns_against = 0
-    for b in battles[:n]:
-        t = (b.get("team") or [{}])[0]
-        o = (b.get("opponent") or [{}])[0]
-        cf = int(t.get("crowns", 0))
-        ca = int(o.get("crowns", 0))
-        crowns_for += cf
-        crowns_against += ca
-        if cf > ca:
-            wins += 1
-        elif cf < ca:
-            losses += 1
-    total = wins + losses
-    wr = (wins / total) if total else 0.0
-    return wins, losses, wr, crowns_for, crowns_against
+    load_dotenv()
+    service = os.getenv("DECKFINDER_SERVICE")
+    if service:
+        return ClashAPI(
+            os.getenv("DECKFINDER_SERVICE_TOKEN", ""),  # gemeinsames Geheimnis des Dienstes (server.py)
+            typed=HAVE_MSGSPEC, cache=cache, background=background, base_url=service, cache_ttl=cache_ttl,
+        )
+    token = os.getenv("CLASH_TOKEN")
+    if not token:
+        raise RuntimeError("Fehlt: CLASH_TOKEN (oder DECKFINDER_SERVICE) in .env")
+    return ClashAPI(
+        token, typed=HAVE_MSGSPEC, cache=cache, limiter=limiter, background=background, cache_ttl=cache_ttl
+    )
 
 
 # ------------------------------- Scanner-Thread -------------------------------
 class Scanner(threading.Thread):
+    """
+    Liest pro Frame alle ROI-Gruppen (config.json "roi_groups", siehe roi_groups.py):
+    eine Aufnahme, Namen und Clans jeweils in einem Tesseract-Aufruf, Gruppen mit
+    unveränderten Pixeln ohne OCR. Entprellung je Gruppe; Lookups laufen parallel im Pool.
+    """
+
     def __init__(
         self,
-        q_out: queue.Queue,
+        q_out: EventQueue,
         stop_ev: threading.Event,
         conf_min=35.0,
         interval=0.4,
         stable_need=1,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        api: ClashAPI | None = None,
     ):
         super().__init__(daemon=True)
         self.q_out = q_out
         self.stop_ev = stop_ev
         self.conf_min = conf_min
         self.interval = interval
-        self.stable_need = stable_need
-        self.last_pair = ("", "")
-        self.stable = 0
-        self.last_resolved = None
 
         # load cfg
         if not os.path.exists(CONF_PATH):
@@ -216,90 +300,149 @@ class Scanner(threading.Thread):
             )
         with open(CONF_PATH, "r", encoding="utf-8") as f:
             cfg = json.load(f)
-        self.roi_name = cfg["roi_name"]
-        self.roi_clan = cfg["roi_clan"]
-
-        load_dotenv()
-        token = os.getenv("CLASH_TOKEN")
-        if not token:
-            raise RuntimeError("Fehlt: CLASH_TOKEN in .env")
-        self.api = ClashAPI(token)
+        self.groups = groups_from_config(cfg)
+        if not self.groups:
+            raise ValueError("config.json enthält keine ROIs. Bitte neu kalibrieren.")
+        self.stabilizers = {g.label: Stabilizer(stable_need) for g in self.groups}
+        self._ocr_memo: dict[str, tuple] = {}  # Gruppe → (Pixel-Prüfsummen, OCR-Ergebnis)
+        self._lookup_seq = {g.label: 0 for g in self.groups}  # verspätete Lookups einer Gruppe verwerfen
+        self._inflight = 0  # laufende Lookups aller Gruppen – Ladebalken erst aus, wenn keiner mehr läuft
+        self._inflight_lock = threading.Lock()
+        self._lookups = ThreadPoolExecutor(max_workers=len(self.groups), thread_name_prefix="scan-lookup")
+
+        # API der App mitbenutzen – ihre Verbindungen sind schon offen (http_pool)
+        self.api = api if api is not None else make_api(cache, limiter)
+        load_ocr_stack()
 
     @staticmethod
     def crop(img, roi):
         x, y, w, h = map(int, roi)
         return img[y : y + h, x : x + w]
 
+    def _who(self, label: str) -> str:
+        return f" ({label})" if len(self.groups) > 1 else ""
+
+    def _read_groups(self, crops):
+        """crops: [(Name-Ausschnitt, Clan-Ausschnitt)] je Gruppe → [(n_txt, n_conf, c_txt, c_conf)]."""
+        results: dict[str, tuple] = {}
+        todo = []
+        for g, (raw_n, raw_c) in zip(self.groups, crops):
+            sig = (zlib.crc32(raw_n.tobytes()), zlib.crc32(raw_c.tobytes()))
+            memo = self._ocr_memo.get(g.label)
+            if memo is not None and memo[0] == sig:
+                metrics.inc("ocr_skip.same_pixels")
+                results[g.label] = memo[1]
+            else:
+                todo.append((g, sig, raw_n, raw_c))
+        if todo:
+            with metrics.span("preprocess.name"):
+                names = [preprocess_name(t[2]) for t in todo]
+            with metrics.span("preprocess.clan"):
+                clans = [preprocess_clan(t[3]) for t in todo]
+            if len(todo) == 1:
+                n_res, c_res = [ocr_name(names[0])], [ocr_clan(clans[0])]
+            else:
+                n_res, c_res = ocr_batch(names), ocr_batch(clans)
+            for (g, sig, _, _), n, c in zip(todo, n_res, c_res):
+                res = (*n, *c)
+                self._ocr_memo[g.label] = (sig, res)
+                results[g.label] = res
+        return [results[g.label] for g in self.groups]
+
     def run(self):
+        rois = [r for g in self.groups for r in (g.roi_name, g.roi_clan)]
+        regions, where = capture_plan(rois)
         with mss.mss() as sct:
-            mon = sct.monitors[0]  # gesamter virtueller Desktop
-            self.q_out.put(("status", "Scan gestartet."))
+            mon = sct.monitors[0]  # gesamter virtueller Desktop; ROIs sind relativ dazu
+            boxes = [
+                {"left": mon["left"] + x, "top": mon["top"] + y, "width": w, "height": h}
+                for x, y, w, h in regions
+            ]
+            self.q_out.put(("status", "Scan gestartet." + (f" {len(self.groups)} Gegner-Bereiche." if len(self.groups) > 1 else "")))
             while not self.stop_ev.is_set():
                 try:
-                    frame = np.array(sct.grab(mon))[:, :, :3]
-                    name_img_raw = self.crop(frame, self.roi_name)
-                    clan_img_raw = self.crop(frame, self.roi_clan)
-
-                    name_img = preprocess_name(name_img_raw)
-                    clan_img = preprocess_clan(clan_img_raw)
-
-                    n_txt, n_conf = ocr_name(name_img)
-                    c_txt, c_conf = ocr_clan(clan_img)
-
-                    self.q_out.put(
-                        ("ocr", f"[{n_conf:.0f}/{c_conf:.0f}] name='{n_txt}' clan='{c_txt}'")
-                    )
-
-                    if (
-                        plausible(n_txt)
-                        and plausible(c_txt)
-                        and n_conf >= self.conf_min
-                        and c_conf >= self.conf_min
-                    ):
-                        pair = (n_txt, c_txt)
-                        self.stable = self.stable + 1 if pair == self.last_pair else 1
-                        self.last_pair = pair
-
-                        if self.stable >= self.stable_need and self.last_resolved != pair:
-                            self.last_resolved = pair
-                            # „Loading“ an
-                            self.q_out.put(("loading", True))
-                            self.q_out.put(("resolved", {"name": n_txt, "clan": c_txt}))
-                            self.q_out.put(
-                                ("status", f"Erkannt: Gegner='{n_txt}' | Clan='{c_txt}'")
-                            )
-                            # Lookup
-                            try:
-                                ctag, csugg, cdisp = resolve_clan_tag_by_name(self.api, c_txt)
-                                if not ctag:
-                                    self.q_out.put(
-                                        ("status", f"Clan nicht eindeutig. Vorschläge: {csugg[:5]}")
-                                    )
-                                else:
-                                    ptag, nsugg, pname = resolve_player_tag_in_clan(
-                                        self.api, ctag, n_txt
-                                    )
-                                    if not ptag:
-                                        self.q_out.put(
-                                            ("status", f"Spieler nicht im Clan. Mitglieder (Auszug): {nsugg[:10]}")
-                                        )
-                                    else:
-                                        pdata = self.api.get_player(ptag)
-                                        self.q_out.put(("deck", pdata))
-                            except Exception as e:
-                                self.q_out.put(("status", f"API-Fehler: {e}"))
-                            finally:
-                                # „Loading“ aus
-                                self.q_out.put(("loading", False))
-                    else:
-                        self.stable = 0
+                    with metrics.span("capture"):
+                        shots = [np.array(sct.grab(box))[:, :, :3] for box in boxes]
+                    cut = [self.crop(shots[k], roi) for k, roi in where]
+                    reads = self._read_groups(list(zip(cut[0::2], cut[1::2])))
+
+                    multi = len(self.groups) > 1
+                    self.q_out.put((
+                        "ocr",
+                        " | ".join(
+                            (f"{g.label} " if multi else "") + f"[{n_conf:.0f}/{c_conf:.0f}] name='{n_txt}' clan='{c_txt}'"
+                            for g, (n_txt, n_conf, c_txt, c_conf) in zip(self.groups, reads)
+                        ),
+                    ))
+
+                    for g, (n_txt, n_conf, c_txt, c_conf) in zip(self.groups, reads):
+                        ok = (
+                            plausible(n_txt)
+                            and plausible(c_txt)
+                            and n_conf >= self.conf_min
+                            and c_conf >= self.conf_min
+                        )
+                        if not ok:
+                            metrics.inc("ocr_skip.low_conf")
+                            self.stabilizers[g.label].feed(None)
+                        elif not self.stabilizers[g.label].feed((n_txt, c_txt)):
+                            metrics.inc("ocr_skip.unchanged")
+                        else:
+                            self._dispatch(g.label, n_txt, c_txt)
 
                     time.sleep(self.interval)
                 except Exception as e:
                     self.q_out.put(("status", f"Fehler: {e}"))
                     time.sleep(self.interval)
+            self._lookups.shutdown(wait=False, cancel_futures=True)
             self.q_out.put(("status", "Scan gestoppt."))
 
+    def _dispatch(self, label: str, n_txt: str, c_txt: str):
+        self._lookup_seq[label] += 1
+        with self._inflight_lock:
+            self._inflight += 1
+            first = self._inflight == 1
+        if first:
+            # „Loading“ an
+            self.q_out.put(("loading", ("scan", True)))
+        self.q_out.put(("resolved", {"name": n_txt, "clan": c_txt, "group": label}))
+        self.q_out.put(
+            ("status", f"Erkannt{self._who(label)}: Gegner='{n_txt}' | Clan='{c_txt}'")
+        )
+        fut = self._lookups.submit(self._lookup, label, self._lookup_seq[label], n_txt, c_txt)
+        fut.add_done_callback(self._lookup_done)  # läuft auch für beim Stop verworfene Lookups
+
+    def _lookup(self, label: str, seq: int, n_txt: str, c_txt: str):
+        try:
+            # OCR-Text ist verrauscht → Top-k Clans + OCR-Varianten parallel prüfen
+            with metrics.span("lookup.resolve"):
+                ptag, ctag, pname, cdisp, csugg = resolve_player_across_clans(
+                    self.api, c_txt, n_txt
+                )
+            if seq != self._lookup_seq[label]:
+                metrics.inc("lookup.superseded")  # inzwischen steht ein anderer Gegner in der Gruppe
+            elif not ctag:
+                self.q_out.put(
+                    ("status", f"Clan nicht eindeutig{self._who(label)}. Vorschläge: {csugg[:5]}")
+                )
+            elif not ptag:
+                self.q_out.put(
+                    ("status", f"Spieler in keinem passenden Clan gefunden{self._who(label)}. Clans: {csugg[:5]}")
+                )
+            else:
+                # Profil/Battlelog lädt die UI selbst (sofort aus dem View-Cache, falls bekannt)
+                self.q_out.put(("opponent", (label, ptag, pname or n_txt)))
+        except Exception as e:
+            self.q_out.put(("status", f"API-Fehler{self._who(label)}: {e}"))
+
+    def _lookup_done(self, _fut) -> None:
+        with self._inflight_lock:
+            self._inflight -= 1
+            last = self._inflight == 0
+        if last:
+            # „Loading“ aus – eine geöffnete Analyse hält den Balken selbst
+            self.q_out.put(("loading", ("scan", False)))
+
 
 # ----------------------------------- UI --------------------------------------
 class App(tk.Tk):
@@ -309,18 +452,53 @@ class App(tk.Tk):
         self.geometry("1100x820")
         self.minsize(1100, 820)
 
-        self.q = queue.Queue()
+        self._wake_ok = False  # erst in mainloop() – vorher gibt es niemanden, der geweckt werden kann
+        self.q = EventQueue(wake=self._wake_queue)
         self.stop_ev = threading.Event()
         self.scanner = None
-        self.http = httpx.Client(timeout=10.0)
-
-        load_dotenv()
-        token = os.getenv("CLASH_TOKEN")
-        if not token:
-            messagebox.showerror("Fehlt", "CLASH_TOKEN in .env nicht gesetzt.")
+        # alle HTTP-Clients (API, Scanner, Prewarming, Icons) teilen einen Verbindungspool (HTTP/2)
+        self.http = http_pool.POOL.client(timeout=10.0)
+        # Karten-Icons: Download/Skalierung im Worker-Pool, PhotoImage erst hier im Tk-Thread
+        self.icons = IconLoader(self.http)
+        self._view_gen = 0  # pro angezeigtem Deck; verwirft verspätete Icons/Analysen des vorigen
+        self._current_tag = ""
+        self.views = ViewCache()  # letzte Gegner-Ansichten: sofort anzeigen, im Hintergrund revalidieren
+
+        # Ein Cache + Rate-Limit für UI, Scanner und Prewarming
+        self.cache = ResponseCache()
+        self.limiter = RateLimiter()
+        try:
+            self.api = make_api(self.cache, self.limiter)
+        except RuntimeError as e:
+            messagebox.showerror("Fehlt", str(e))
             self.destroy()
             return
-        self.api = ClashAPI(token)
+        # TLS-Handshakes zu API und Icon-Host jetzt erledigen, nicht im ersten Lookup
+        http_pool.POOL.warm([str(self.api.client.base_url), http_pool.ICON_ORIGIN])
+        # Stufen-Latenzen (DECKFINDER_METRICS=1): periodisch ins Log + Datei
+        self.metrics_file = os.getenv("DECKFINDER_METRICS_FILE", METRICS_FILE_DEFAULT)
+        if metrics.enable_from_env():
+            self.after(METRICS_SUMMARY_INTERVAL_MS, self._metrics_tick)
+        try:
+            self.store = HistoryStore()  # lokale Battle-Historie (history.sqlite3)
+        except Exception:
+            self.store = None
+        # Rollende Spielerstatistik (10/25/100/gesamt), wächst mit jedem gespeicherten Kampf
+        self.aggregates = RollingAggregates(self.store)
+
+        # Watch-List aus config.json ("watch_clans") im Hintergrund vorladen
+        self.prewarmer = None
+        watch = self._load_cfg().get("watch_clans") or []
+        if watch:
+            bg_api = make_api(self.cache, self.limiter, background=True, cache_ttl=prewarm_ttl())
+            self.prewarmer = RosterPrewarmer(
+                bg_api, watch, store=self.store, on_progress=lambda s: self.q.put(("log", s))
+            )
+            self.prewarmer.start()
+
+        # Kartenkatalog + Icon-Atlas im Hintergrund – danach blockiert kein Deck mehr auf Bildern
+        self.warmup = CatalogWarmup(self.api, self.icons, on_progress=lambda *p: self.q.put(("warmup", p)))
+        self.warmup.start()
 
         self.last_clan_detected = ""  # vom Scanner erkannt (für manuellen Fallback)
 
@@ -354,8 +532,27 @@ class App(tk.Tk):
         self.btn_lookup = ttk.Button(top, text="Deck suchen", command=self.manual_lookup)
         self.btn_lookup.pack(side="left", padx=(0, 8))
 
+        # Modus-Filter für Historie + Statistik
+        self.modes = MODE_FILTERS[0][1]
+        self.mode_var = tk.StringVar(value=MODE_FILTERS[0][0])
+        cb_modes = ttk.Combobox(
+            top, textvariable=self.mode_var, values=[label for label, _ in MODE_FILTERS],
+            state="readonly", width=15,
+        )
+        cb_modes.pack(side="left", padx=(0, 8))
+        cb_modes.bind("<<ComboboxSelected>>", lambda e: self._on_modes_changed())
+        self.cb_modes = cb_modes
+
+        # Gegner-Auswahl bei mehreren ROI-Gruppen (nur eingeblendet, wenn der Scanner > 1 hat)
+        self.opponents: dict[str, tuple[str, str]] = {}  # Gruppe → (Tag, Name)
+        self._shown_group: str | None = None  # Gruppe, deren Gegner gerade angezeigt wird
+        self.opp_var = tk.StringVar(value="")
+        self.cb_opp = ttk.Combobox(top, textvariable=self.opp_var, state="readonly", width=24)
+        self.cb_opp.bind("<<ComboboxSelected>>", lambda e: self._on_opponent_selected())
+
         # Loading-Bar (indeterminate), wird bei Bedarf eingeblendet
         self.loading = ttk.Progressbar(top, mode="indeterminate", length=120)
+        self._loading_by: set[str] = set()
 
         # Status
         self.status = tk.StringVar(value="Bereit.")
@@ -372,6 +569,8 @@ class App(tk.Tk):
         self.p_deck   = tk.StringVar(value="—")
         self.p_wr     = tk.StringVar(value="—")
         self.p_crowns = tk.StringVar(value="—")
+        self.p_trend  = tk.StringVar(value="—")
+        self.p_top    = tk.StringVar(value="—")
 
         row = ttk.Frame(self.profile); row.pack(fill="x", padx=8, pady=4)
         ttk.Label(row, text="Name/Tag:", width=14).grid(row=0, column=0, sticky="w")
@@ -391,8 +590,13 @@ class App(tk.Tk):
         ttk.Label(row2, text="Kronen (F/A):", width=14).grid(row=0, column=6, sticky="w")
         ttk.Label(row2, textvariable=self.p_crowns).grid(row=0, column=7, sticky="w")
 
+        row3 = ttk.Frame(self.profile); row3.pack(fill="x", padx=8, pady=(0,6))
+        ttk.Label(row3, text="WR 10/25/100/alle:", width=18).grid(row=0, column=0, sticky="w")
+        ttk.Label(row3, textvariable=self.p_trend).grid(row=0, column=1, sticky="w", padx=(0,16))
+        ttk.Label(row3, text="Top-Karten (25):", width=16).grid(row=0, column=2, sticky="w")
+        ttk.Label(row3, textvariable=self.p_top).grid(row=0, column=3, sticky="w")
+
         right = ttk.Frame(self.profile); right.pack(anchor="e", padx=8, pady=(0,6))
-        self.p_fav_icon_img = None
         self.p_fav_icon = ttk.Label(right, text="Lieblingskarte")
         self.p_fav_icon.pack(side="right")
 
@@ -401,7 +605,6 @@ class App(tk.Tk):
         grid.pack(fill="both", expand=True)
 
         self.card_labels = []
-        self.card_images = [None] * 8
         self.card_name_labels = []
         for i in range(8):
             frame = ttk.Frame(grid)
@@ -423,27 +626,107 @@ class App(tk.Tk):
         self.txt = tk.Text(bottom, height=7)
         self.txt.pack(fill="both", expand=True)
         self.txt.configure(state="disabled")
+        self._log_lines = 0
 
-        # „Letzte 10 Decks“ – UI wird lazy aufgebaut
-        self.hist_frame = None
-        self.hist_rows = None
+        # Deck-Historie (virtualisierte Liste) – wird lazy aufgebaut
+        self.hist_view = None
 
-        # Queue poller
-        self.after(100, self.process_queue)
+        # Queue: sofort per virtuellem Event, dazu ein langsamer Poll für zusammengefasste Meldungen
+        self.bind("<<UiEvents>>", lambda e: self.process_queue())
+        self.after(QUEUE_POLL_MS, self._poll_queue)
+        self.after_idle(self._report_startup)
 
     # --------------------------- kleine Helfer --------------------------------
     def log(self, msg: str):
+        msg = msg.strip()
         self.txt.configure(state="normal")
-        self.txt.insert("end", msg.strip() + "\n")
+        self.txt.insert("end", msg + "\n")
+        self._log_lines += msg.count("\n") + 1
+        if self._log_lines > LOG_MAX_LINES + LOG_TRIM_CHUNK:
+            # blockweise kürzen statt bei jeder Zeile – Text-Widget bleibt billig
+            drop = self._log_lines - LOG_MAX_LINES
+            self.txt.delete("1.0", f"{drop + 1}.0")
+            self._log_lines -= drop
         self.txt.see("end")
         self.txt.configure(state="disabled")
 
+    @staticmethod
+    def _load_cfg() -> dict:
+        if not os.path.exists(CONF_PATH):
+            return {}
+        try:
+            with open(CONF_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _on_analysis(self, what: str, data: tuple):
+        if what == "deck":
+            with metrics.span("render.show_deck"):
+                self.show_deck(*data)
+        elif what == "analysis":
+            with metrics.span("render.analysis"):
+                self._show_analysis(*data)
+        elif what == "history":
+            rows, append = data
+            if append:
+                self.hist_view.extend(rows)
+            else:
+                self.hist_view.set_items(rows)
+        elif what == "analysis_done":
+            player, n, changed = data
+            self._set_loading(False)
+            note = ""
+            if changed is not None:  # Revalidierung eines angezeigten Snapshots
+                note = f" – aktualisiert: {', '.join(changed)}" if changed else " – unverändert"
+            self.set_status(
+                f"Deck geladen: {player.get('name', 'Unbekannt')} {player.get('tag', '')} "
+                f"(Letzte {n} Decks: {self.mode_var.get()}){note}"
+            )
+        else:
+            self._set_loading(False)
+            self.set_status(data[0])
+
+    def _on_warmup(self, done: int, total: int, phase: str):
+        if phase == "icons":
+            self.status.set(f"Lade Karten-Icons … {done}/{total}")
+        elif phase == "fertig":
+            self.set_status(f"Karten-Icons bereit ({done}/{total}).")
+        elif phase not in ("katalog", "atlas"):
+            self.log(f"Icon-Warmup {phase}")
+
+    def _report_startup(self):
+        """Zeit vom Modul-Import bis zum ersten bedienbaren Fenster (nach dem ersten Idle)."""
+        ms = (time.perf_counter() - _T_START) * 1000.0
+        metrics.observe("startup.window", ms)
+        if ms > STARTUP_BUDGET_MS:
+            self.log(f"Start: Fenster nach {ms:.0f} ms – über Budget ({STARTUP_BUDGET_MS:.0f} ms)")
+        else:
+            self.log(f"Start: Fenster nach {ms:.0f} ms")
+
+    def _metrics_tick(self):
+        lines = metrics.METRICS.summary()
+        if lines:
+            self.log("— Metriken —")
+            for line in lines:
+                self.log("· " + line)
+        try:
+            metrics.METRICS.dump(self.metrics_file)
+        except OSError as e:
+            self.log(f"Metriken konnten nicht geschrieben werden: {e}")
+        self.after(METRICS_SUMMARY_INTERVAL_MS, self._metrics_tick)
+
     def set_status(self, s: str):
         self.status.set(s)
         self.log(s)
 
-    def _set_loading(self, on: bool):
+    def _set_loading(self, on: bool, who: str = "analysis"):
+        """Ladebalken mit mehreren Haltern (Analyse, Scanner-Lookups, manuelle Suche)."""
         if on:
+            self._loading_by.add(who)
+        else:
+            self._loading_by.discard(who)
+        if self._loading_by:
             if not self.loading.winfo_ismapped():
                 self.loading.pack(side="left", padx=8)
             self.loading.start(12)
@@ -453,68 +736,35 @@ class App(tk.Tk):
                 self.loading.pack_forget()
 
     def _ensure_history_ui(self):
-        if self.hist_frame is not None:
+        if self.hist_view is not None:
             return
-        # Äußerer Frame für den scrollbaren Bereich
-        outer_frame = ttk.Frame(self)
-        outer_frame.pack(fill="both", expand=True, padx=10, pady=6)
-
-        ttk.Label(outer_frame, text="Letzte 10 Decks", font=(None, 12, "bold")).pack(
-            anchor="w", padx=6, pady=(0, 4)
-        )
-
-        canvas = tk.Canvas(outer_frame, height=300)
-        scrollbar = ttk.Scrollbar(outer_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        self.hist_view = VirtualDeckList(
+            self, show_icon=self._show_icon, icon_url=self._find_card_icon_url,
+            title=f"Deck-Historie ({self.mode_var.get()})",
         )
+        self.hist_view.pack(fill="both", expand=True, padx=10, pady=6)
 
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.bind("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), "units"))
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        self.hist_frame = scrollable_frame
-
-        self.hist_rows = []
-        for r in range(10):
-            row = {}
-            row_frame = ttk.Frame(self.hist_frame)
-            row_frame.pack(fill="x", padx=6, pady=4)
-
-            row["text"] = ttk.Label(row_frame, text=f"D{r+1}", width=16, anchor="w")
-            row["text"].grid(row=0, column=0, sticky="w", padx=(0, 8))
-
-            row["pb"] = ttk.Progressbar(row_frame, mode="determinate", length=180, maximum=100)
-            row["pb"].grid(row=0, column=1, sticky="w")
-
-            row["icons"] = []
-            row["images"] = [None] * 8
-            for c in range(8):
-                lbl = ttk.Label(row_frame, text="", width=10, anchor="center")
-                lbl.grid(row=0, column=2 + c, padx=4)
-                row["icons"].append(lbl)
-
-            self.hist_rows.append(row)
+    def _show_icon(self, lbl, url: str | None, size: tuple[int, int], fallback: str):
+        """Icon in lbl setzen – sofort aus dem LRU, sonst asynchron über die Queue."""
+        lbl.icon_url = url  # recycelte Labels (Historie) verwerfen so verspätete Icons
+        if not url:
+            lbl.configure(image="", text=fallback)
+            return
+        im = self.icons.peek(url, size)
+        if im is not None:
+            self._apply_icon(lbl, im, fallback)
+            return
+        gen = self._view_gen
+        self.icons.request(url, size, lambda im: self.q.put(("icon", (gen, lbl, url, im, fallback))))
 
-    def _get_tkimg(self, url: str, size: tuple[int, int]):
-        if not hasattr(self, "_icon_cache"):
-            self._icon_cache = {}
-        key = f"{url}|{size[0]}x{size[1]}"
-        if key in self._icon_cache:
-            return self._icon_cache[key]
-        resp = self.http.get(url)
-        resp.raise_for_status()
-        im = Image.open(io.BytesIO(resp.content)).convert("RGBA")
-        im = im.resize(size, Image.LANCZOS)
+    @staticmethod
+    def _apply_icon(lbl, im, fallback: str):
+        if im is None:
+            lbl.configure(image="", text=fallback)
+            return
         tkimg = ImageTk.PhotoImage(im)
-        self._icon_cache[key] = tkimg
-        return tkimg
+        lbl.configure(image=tkimg, text="")
+        lbl.image = tkimg  # Referenz halten, sonst räumt Tk das Bild weg
 
     # ----------------------------- Scan-Buttons -------------------------------
     def start_scan(self):
@@ -523,7 +773,20 @@ class App(tk.Tk):
             return
         try:
             self.stop_ev.clear()
-            self.scanner = Scanner(self.q, self.stop_ev, conf_min=35.0, interval=0.4, stable_need=1)
+            self.scanner = Scanner(
+                self.q, self.stop_ev, conf_min=35.0, interval=0.4, stable_need=1,
+                cache=self.cache, limiter=self.limiter, api=self.api,
+            )
+            http_pool.POOL.warm([str(self.api.client.base_url)])  # nach langer Pause neu aufbauen
+            self.opponents.clear()
+            self._shown_group = None
+            self.cb_opp.configure(values=[])
+            self.opp_var.set("")
+            if len(self.scanner.groups) > 1:
+                if not self.cb_opp.winfo_ismapped():
+                    self.cb_opp.pack(side="left", padx=(0, 8), after=self.cb_modes)
+            elif self.cb_opp.winfo_ismapped():
+                self.cb_opp.pack_forget()
             self.scanner.start()
             self.btn_start.configure(state="disabled")
             self.btn_stop.configure(state="normal")
@@ -534,20 +797,68 @@ class App(tk.Tk):
     def stop_scan(self):
         if self.scanner and self.scanner.is_alive():
             self.stop_ev.set()
-            self.scanner.join(timeout=2.0)
+            wake, self._wake_ok = self._wake_ok, False  # Scanner darf in put() nicht auf uns warten
+            try:
+                self.scanner.join(timeout=2.0)
+            finally:
+                self._wake_ok = wake
+        self._set_loading(False, "scan")  # verworfene Lookups melden sich nicht mehr
         self.btn_start.configure(state="normal")
         self.btn_stop.configure(state="disabled")
         self.set_status("Scanner gestoppt.")
 
     def run_calibrate(self):
-        import subprocess
-
+        # in-process statt eigenem Python-Prozess; cv2/mss werden erst hier geladen
+        self.set_status("Kalibrierung läuft…")
         try:
-            subprocess.run([sys.executable, "calibrate_roi.py"], check=True)
-            self.set_status("Kalibrierung abgeschlossen.")
-        except subprocess.CalledProcessError as e:
+            load_ocr_stack()
+            import calibrate_roi
+        except Exception as e:
+            messagebox.showerror("Kalibrierung fehlgeschlagen", str(e))
+            return
+        current = len(groups_from_config(self._load_cfg())) or 1
+        n = simpledialog.askinteger(
+            "Kalibrieren", "Wie viele Gegner-Bereiche (je Name + Clan)?",
+            parent=self, initialvalue=current, minvalue=1, maxvalue=8,
+        )
+        if n is None:
+            self.set_status("Kalibrierung abgebrochen.")
+            return
+        try:
+            calibrate_roi.calibrate(CONF_PATH, groups=n)
+            self.set_status("Kalibrierung abgeschlossen." + (f" {n} Gegner-Bereiche." if n > 1 else ""))
+        except calibrate_roi.CalibrationCancelled as e:
+            self.set_status(f"Kalibrierung abgebrochen: {e}")
+        except Exception as e:
             messagebox.showerror("Kalibrierung fehlgeschlagen", str(e))
 
+    # ----------------------------- Mehrere Gegner -----------------------------
+    @staticmethod
+    def _opponent_label(group: str, name: str) -> str:
+        return f"{group}: {name}"
+
+    def _on_opponent(self, group: str, tag: str, name: str):
+        """
+        Scanner hat in einer ROI-Gruppe einen Gegner aufgelöst → in der Auswahl merken.
+        Geöffnet wird er nur, solange noch nichts angezeigt wird oder es die angezeigte Gruppe
+        ist – sonst würden sich mehrere Gruppen gegenseitig die Ansicht wegnehmen.
+        """
+        self.opponents[group] = (tag, name)
+        self.cb_opp.configure(values=[self._opponent_label(g, n) for g, (_, n) in self.opponents.items()])
+        if self._shown_group is not None and self._shown_group != group:
+            self.set_status(f"Gegner erkannt ({group}): {name} – Auswahl oben")
+            return
+        self._shown_group = group
+        self.opp_var.set(self._opponent_label(group, name))
+        self.open_player(tag)
+
+    def _on_opponent_selected(self):
+        for group, (tag, name) in self.opponents.items():
+            if self._opponent_label(group, name) == self.opp_var.get():
+                self._shown_group = group
+                self.open_player(tag)  # bekannte Gegner kommen sofort aus dem View-Cache
+                return
+
     # ----------------------------- Manuelle Suche -----------------------------
     def manual_lookup(self):
         player = self.ent_player.get().strip()
@@ -575,45 +886,82 @@ class App(tk.Tk):
     def _manual_lookup_worker(self, player: str, clan: str):
         try:
             self.q.put(("status", f"Suche Deck: Spieler='{player}', Clan='{clan}' …"))
-            self.q.put(("loading", True))
+            self.q.put(("loading", ("manual", True)))
             ctag, csugg, cdisp = resolve_clan_tag_by_name(self.api, clan)
             if not ctag:
                 self.q.put(("status", f"Clan nicht eindeutig. Vorschläge: {csugg[:5]}"))
                 return
-            ptag, nsugg, pname = resolve_player_tag_in_clan(self.api, ctag, player)
+            ptag, _, pname = resolve_player_tag_in_clan(self.api, ctag, player)
+            if not ptag:
+                # Namensgleiche Clans / Tippfehler: Top-k Kandidaten parallel durchsuchen
+                ptag, ctag, pname, cdisp, csugg = resolve_player_across_clans(self.api, clan, player)
             if not ptag:
-                self.q.put(("status", f"Spieler nicht im Clan gefunden. Mitglieder (Auszug): {nsugg[:10]}"))
+                self.q.put(
+                    ("status", f"Spieler in keinem der {len(csugg)} passendsten Clans gefunden. Clans: {csugg[:5]}")
+                )
                 return
-            pdata = self.api.get_player(ptag)
-            self.q.put(("deck", pdata))
-            self.q.put(("status", f"Deck geladen: {pname} {ptag} (Clan: {cdisp or clan})"))
+            self.q.put(("status", f"Gefunden: {pname} {ptag} (Clan: {cdisp or clan})"))
+            self.q.put(("player", ptag))
         except Exception as e:
             self.q.put(("status", f"Fehler bei manueller Suche: {e}"))
         finally:
-            self.q.put(("loading", False))
+            # die Analyse hält den Balken ab "player" selbst
+            self.q.put(("loading", ("manual", False)))
             self.after(0, lambda: self.btn_lookup.configure(state="normal"))
 
     # ----------------------------- Queue-Events -------------------------------
-    def process_queue(self):
+    def mainloop(self, n: int = 0):
+        self.after_idle(self._enable_wake)  # läuft erst, wenn die Schleife Events verarbeitet
         try:
-            while True:
-                what, payload = self.q.get_nowait()
-                if what == "status":
-                    self.set_status(str(payload))
-                elif what == "ocr":
-                    self.log(str(payload))
-                elif what == "resolved":
-                    self.last_clan_detected = (payload.get("clan") or "").strip()
-                elif what == "loading":
-                    self._set_loading(bool(payload))
-                elif what == "deck":
-                    self.show_deck(payload)
-        except queue.Empty:
-            pass
-        self.after(100, self.process_queue)
+            super().mainloop(n)
+        finally:
+            self._wake_ok = False
+
+    def _enable_wake(self):
+        self._wake_ok = True
+
+    def _wake_queue(self):
+        """
+        Aus Worker-Threads: Tk-Thread sofort wecken. event_generate aus einem fremden Thread
+        wartet, bis der Tk-Thread den Aufruf ausführt – daher nur, solange mainloop() läuft
+        und nicht blockiert (z. B. stop_scan im join). Sonst bleibt es beim Rückfall-Poll
+        (QUEUE_POLL_MS).
+        """
+        if self._wake_ok:
+            self.event_generate("<<UiEvents>>", when="tail")
+
+    def _poll_queue(self):
+        self.process_queue()
+        self.after(QUEUE_POLL_MS, self._poll_queue)
+
+    def process_queue(self):
+        for what, payload in self.q.drain():
+            if what == "status":
+                self.set_status(str(payload))
+            elif what in ("ocr", "log"):
+                self.log(str(payload))
+            elif what == "resolved":
+                self.last_clan_detected = (payload.get("clan") or "").strip()
+            elif what == "loading":
+                who, on = payload
+                self._set_loading(bool(on), who)
+            elif what == "player":
+                self.open_player(payload)
+            elif what == "opponent":
+                self._on_opponent(*payload)
+            elif what == "warmup":
+                self._on_warmup(*payload)
+            elif what == "icon":
+                gen, lbl, url, im, fallback = payload
+                if gen == self._view_gen and getattr(lbl, "icon_url", None) == url:
+                    self._apply_icon(lbl, im, fallback)
+            elif what in ("deck", "analysis", "history", "analysis_done", "analysis_error"):
+                if payload[0] == self._view_gen:
+                    self._on_analysis(what, payload[1:])
 
     # ------------------------ Player-Info Aktualisierung ----------------------
-    def update_player_info(self, player: dict, ladder_battles: list[dict], current_deck: list[dict]):
+    def update_player_info(self, player: dict, report: dict | None = None):
+        """Profil sofort; Winrate/Kronen erst, wenn der ladder_report aus dem Worker da ist."""
         name = player.get("name", "Unbekannt")
         tag  = player.get("tag", "")
         lvl  = player.get("expLevel") or "?"
@@ -629,13 +977,17 @@ class App(tk.Tk):
             ctag  = clan.get("tag", "")
             clan_txt = f"{cname} {ctag}" + (f" · {role}" if role else "")
 
+        current_deck = player.get("currentDeck") or []
         avg_elix = _avg_elixir(current_deck)
         cycle4   = _four_card_cycle(current_deck)
         deck_txt = f"Ø {avg_elix} | 4-Cycle {cycle4}"
 
-        wins, losses, wr, cf, ca = _pvp_stats_last_n(ladder_battles, n=10)
-        wr_txt     = f"{wr*100:.0f}% ({wins}-{losses})"
-        crowns_txt = f"{cf}/{ca}"
+        if report is None:
+            wr_txt = crowns_txt = trend_txt = top_txt = "…"
+        else:
+            wr_txt     = f"{report['winrate']*100:.0f}% ({report['wins']}-{report['losses']})"
+            crowns_txt = f"{report['crowns_for']}/{report['crowns_against']}"
+            trend_txt, top_txt = _rolling_texts(report.get("rolling") or {}, report.get("card_names") or {})
 
         self.p_name.set(f"{name} {tag}")
         self.p_king.set(f"{lvl}")
@@ -644,21 +996,16 @@ class App(tk.Tk):
         self.p_deck.set(deck_txt)
         self.p_wr.set(wr_txt)
         self.p_crowns.set(crowns_txt)
+        self.p_trend.set(trend_txt)
+        self.p_top.set(top_txt)
+        if report is not None:
+            return
 
         fav = _favorite_card(player)
         if fav:
-            url = _find_icon_url(fav)
-            if url:
-                try:
-                    tkimg = self._get_tkimg(url, (54, 64))
-                    self.p_fav_icon_img = tkimg
-                    self.p_fav_icon.configure(image=tkimg, text="")
-                except Exception:
-                    self.p_fav_icon.configure(text=fav.get("name", "Fav"))
-            else:
-                self.p_fav_icon.configure(text=fav.get("name", "Fav"))
+            self._show_icon(self.p_fav_icon, _find_icon_url(fav), (54, 64), fav.get("name", "Fav"))
         else:
-            self.p_fav_icon.configure(text="Lieblingskarte")
+            self.p_fav_icon.configure(image="", text="Lieblingskarte")
 
     # ----------------------------- Deck-Anzeige -------------------------------
     def _find_card_icon_url(self, card_obj: dict) -> str | None:
@@ -668,13 +1015,52 @@ class App(tk.Tk):
                 return icon[k]
         return None
 
+    def open_player(self, tag: str):
+        """
+        Gegner anzeigen: bekannter Stand sofort aus dem View-Cache, dann Revalidierung im Worker
+        (nur geänderte Teile werden neu gezeichnet). Unbekannt: Profil/Deck laden wie bisher.
+        """
+        self._view_gen += 1
+        gen = self._view_gen
+        self._current_tag = tag
+        view = self.views.get(tag)
+        if view is not None and view.modes != self.modes:
+            view = None  # anderer Modus-Filter → Historie/Statistik passen nicht
+        if view is None:
+            self._set_loading(True)
+            self.status.set(f"Lade Spieler {tag} …")
+        else:
+            self._set_loading(False)
+            metrics.inc("view_cache_hit")
+            with metrics.span("render.cached_view"):
+                self._show_view(view)
+            if self.views.is_fresh(view):
+                self.set_status(
+                    f"Deck geladen: {view.player.get('name', 'Unbekannt')} {view.player.get('tag', '')} (aktuell)"
+                )
+                return
+            self.status.set(f"Stand von vor {view.age():.0f} s – aktualisiere …")
+        threading.Thread(target=self._analyse_worker, args=(tag, gen, view, self.modes), daemon=True).start()
+
+    def _on_modes_changed(self):
+        self.modes = dict(MODE_FILTERS).get(self.mode_var.get(), MODE_FILTERS[0][1])
+        if self.hist_view is not None:
+            self.hist_view.set_title(f"Deck-Historie ({self.mode_var.get()})")
+        if self._current_tag:
+            self.open_player(self._current_tag)
+
+    def _show_view(self, view: PlayerView):
+        self.show_deck(view.player)
+        if view.report is not None:
+            self._show_analysis(view.player, view.report)
+        self.hist_view.set_items(view.rows)
+        self.hist_view.extend(view.older)
+
     def show_deck(self, player_payload: dict):
-        name = player_payload.get("name", "Unbekannt")
-        tag = player_payload.get("tag", "")
+        """Aktuelles Deck + Profil; Battlelog/Analyse kommen aus dem Worker (_analyse_worker)."""
         deck = player_payload.get("currentDeck") or []
 
         # --- aktuelles Deck groß rendern ---
-        self.card_images = [None] * 8
         for i in range(8):
             lbl_img = self.card_labels[i]
             lbl_name = self.card_name_labels[i]
@@ -685,113 +1071,157 @@ class App(tk.Tk):
 
             card = deck[i] or {}
             title = card.get("name", f"Karte {i+1}")
-            url = self._find_card_icon_url(card)
-            try:
-                if url:
-                    tkimg = self._get_tkimg(url, (120, 144))
-                    self.card_images[i] = tkimg
-                    lbl_img.configure(image=tkimg, text="")
-                else:
-                    lbl_img.configure(text=title)
-            except Exception:
-                lbl_img.configure(text=title)
+            self._show_icon(lbl_img, self._find_card_icon_url(card), (120, 144), title)
             lbl_name.configure(text=title)
 
-        # --- Battlelog holen & nur Ladder/Ranked-PvP verwenden ---
-        self._set_loading(True)
+        self.update_player_info(player_payload)
+
+        self._ensure_history_ui()
+        self.hist_view.set_items([])
+
+    def _analyse_worker(
+        self, tag: str, gen: int, view: PlayerView | None = None, modes=game_modes.LADDER_CATEGORIES
+    ):
+        """
+        Profil + Battlelog laden, speichern, Ladder-Filter/Stats/Ähnlichkeit berechnen (ohne Tk-Zugriff).
+        Mit view (bereits angezeigter Snapshot) wird frisch geladen und nur Geändertes gemeldet.
+        """
         try:
-            battles = self.api.get_battlelog(tag)
+            # Profil immer frisch (currentDeck!) – der Cache dient nur Rostern, Suche und Battlelogs
+            player = self.api.get_player(tag, refresh=True)
         except Exception as e:
-            self._set_loading(False)
-            self.set_status(f"Battlelog konnte nicht geladen werden: {e}")
+            self.q.put(("analysis_error", (gen, f"Spieler konnte nicht geladen werden: {e}")))
             return
+        try:
+            self._analyse_player(tag, gen, view, modes, player)
+        except Exception as e:
+            # sonst stirbt der Thread still und der Ladebalken läuft endlos
+            self.q.put(("analysis_error", (gen, f"Analyse fehlgeschlagen: {e}")))
+
+    def _analyse_player(self, tag: str, gen: int, view: PlayerView | None, modes, player: dict):
+        """Rest von _analyse_worker nach dem Profil: Battlelog, Speichern, Statistik, Historie."""
+        refresh = view is not None
+        changed = []
+        deck_changed = view is None or deck_signature(player) != view.deck_sig
+        if deck_changed:
+            self.q.put(("deck", (gen, player)))  # Deck sofort, Battlelog kommt hinterher
+            if view is not None:
+                changed.append("Deck")
 
-        recent_cards: list[list[dict]] = []
-        ladder_battles: list[dict] = []
-        for b in battles:
-            if not _is_ranked_or_trophy_pvp_1v1(b):
+        try:
+            battles = self.api.get_battlelog(tag, refresh=refresh)
+        except Exception as e:
+            self.q.put(("analysis_error", (gen, f"Battlelog konnte nicht geladen werden: {e}")))
+            return
+        sig = battle_signature(battles)
+        battles_changed = view is None or sig != view.battle_sig
+        if battles_changed and self.store is not None:
+            try:
+                self.store.ingest_battlelog(tag, battles)  # aktualisiert auch self.aggregates
+            except Exception as e:
+                self.q.put(("log", f"Historie nicht gespeichert: {e}"))
+        elif battles_changed:
+            self.aggregates.add(tag, battles)
+
+        with metrics.span("analysis.ladder_report"):
+            rep = ladder_report(player, battles, n=10, categories=modes)
+        with metrics.span("analysis.rolling"):
+            rep["rolling"] = self.aggregates.get(tag, group_for(modes))
+            rep["card_names"] = self._card_names()
+        if view is None or deck_changed or player != view.player or rep != view.report:
+            self.q.put(("analysis", (gen, player, rep)))
+            if view is not None and not deck_changed:
+                changed.append("Profil" if player != view.player else "Statistik")
+
+        if not (battles_changed or deck_changed):
+            # gleiche Kämpfe, gleiches Deck → Historie samt Ähnlichkeiten unverändert
+            rows, older = view.rows, view.older
+        else:
+            with metrics.span("analysis.history_rows"):
+                cur_mask = deck_mask(player.get("currentDeck") or [])
+                rows = []
+                for b in battles:
+                    if game_modes.classify(b) not in modes:
+                        continue
+                    cards = extract_player_cards_from_battle(b, tag)
+                    if cards:
+                        rows.append(_history_row(len(rows) + 1, b.get("battleTime") or "", cards, deck_mask(cards), cur_mask))
+            self.q.put(("history", (gen, rows, False)))
+
+            # Ältere Decks aus der lokalen Historie anhängen (alles vor dem ältesten Battlelog-Eintrag)
+            oldest = min((b.get("battleTime") or "" for b in battles), default="")
+            with metrics.span("analysis.stored_history"):
+                older = self._stored_history(tag, oldest, cur_mask, len(rows) + 1, modes)
+            if older:
+                self.q.put(("history", (gen, older, True)))
+            if view is not None and battles_changed:
+                changed.append("Historie")
+
+        self.views.put(PlayerView(tag, player, rep, rows, older, sig, modes))
+        self.q.put(("analysis_done", (gen, player, len(rep["recent_cards"]), changed if view is not None else None)))
+
+    def _card_names(self) -> dict:
+        """Karten-Key → Name aus dem (gecachten) Katalog; leer, wenn er nicht verfügbar ist."""
+        try:
+            return {card_key(c): c.get("name", "") for c in self.api.get_cards().get("items", [])}
+        except Exception:
+            return {}
+
+    def _stored_history(
+        self, tag: str, before: str, cur_mask: int, start: int, modes=game_modes.LADDER_CATEGORIES
+    ) -> list[dict]:
+        if self.store is None or start > HISTORY_MAX_ROWS:
+            return []
+        try:
+            by_key = {card_key(c): c for c in self.api.get_cards().get("items", [])}
+        except Exception:
+            by_key = {}  # ohne Katalog: Kartennamen statt Icons
+        out = []
+        try:
+            stored = self.store.player_battles(tag, limit=HISTORY_MAX_ROWS * 2)
+        except Exception:
+            return []
+        for r in stored:
+            if before and r["battle_time"] >= before:
+                continue
+            if not r["cards"] or game_modes.classify_row(r) not in modes:
                 continue
-            ladder_battles.append(b)
-            cards = extract_player_cards_from_battle(b, tag)
-            if cards:
-                recent_cards.append(cards)
-            if len(recent_cards) >= 10:
+            cards = [by_key.get(k) or {"name": k} for k in r["cards"]]
+            out.append(_history_row(start + len(out), r["battle_time"], cards, keys_mask(r["cards"]), cur_mask))
+            if start + len(out) > HISTORY_MAX_ROWS:
                 break
+        return out
 
-        # --- Player-Info Panel updaten (nutzt Ladder-Battles) ---
-        self.update_player_info(player_payload, ladder_battles, deck)
-
-        def card_key_set(cards: list[dict]) -> set[str]:
-            keys = []
-            for c in cards or []:
-                cid = c.get("id") or c.get("key") or c.get("name")
-                if cid is not None:
-                    keys.append(str(cid).lower())
-            return set(keys)
-
-        cur_keys = card_key_set(deck)
-        sims: list[tuple[float, int]] = []
-        for rc in recent_cards:
-            hk = card_key_set(rc)
-            inter = len(cur_keys & hk)
-            pct = inter / 8.0
-            sims.append((pct, inter))
-
-        if sims:
-            avg = sum(s for s, _ in sims) / len(sims)
-            best = max(s for s, _ in sims)
-            exact = sum(1 for s, _ in sims if s >= 0.999)
+    def _show_analysis(self, player: dict, rep: dict):
+        self.update_player_info(player, rep)
+        m = rep["match"]
+        if m["count"]:
             self.set_status(
-                f"Übereinstimmung (letzte {len(sims)} Ladder-PvP): Ø {avg*100:.0f}% | Best {best*100:.0f}% | exakt {exact}/{len(sims)}"
+                f"Übereinstimmung (letzte {m['count']} {self.mode_var.get()}): Ø {m['avg']*100:.0f}% | "
+                f"Best {m['best']*100:.0f}% | exakt {m['exact']}/{m['count']}"
             )
         else:
-            self.set_status("Keine letzten Ladder-PvP-Kämpfe im Battlelog gefunden.")
-
-        self._ensure_history_ui()
-
-        # Reset History
-        for r in range(10):
-            self.hist_rows[r]["text"].configure(text=f"D{r+1}")
-            self.hist_rows[r]["pb"]["value"] = 0
-            for c in range(8):
-                self.hist_rows[r]["icons"][c].configure(image="", text="")
-                self.hist_rows[r]["images"][c] = None
-
-        # Füllen
-        for r, rcards in enumerate(recent_cards[:10]):
-            pct, inter = sims[r]
-            self.hist_rows[r]["text"].configure(text=f"D{r+1}  {pct*100:.0f}% ({inter}/8)")
-            self.hist_rows[r]["pb"]["value"] = int(round(pct * 100))
-
-            for c in range(min(8, len(rcards))):
-                card = rcards[c] or {}
-                url = self._find_card_icon_url(card)
-                title = card.get("name", f"K{c+1}")
-                lbl = self.hist_rows[r]["icons"][c]
-                try:
-                    if url:
-                        tkimg = self._get_tkimg(url, (72, 86))
-                        self.hist_rows[r]["images"][c] = tkimg
-                        lbl.configure(image=tkimg, text="")
-                    else:
-                        lbl.configure(text=title)
-                except Exception:
-                    lbl.configure(text=title)
-
-        self._set_loading(False)
-        self.set_status(f"Deck geladen: {name} {tag} (Letzte {len(recent_cards)} Ladder-PvP Decks)")
+            self.set_status(f"Keine letzten Kämpfe ({self.mode_var.get()}) im Battlelog gefunden.")
 
     # ------------------------------ Schließen ---------------------------------
     def on_close(self):
         self.stop_scan()
-        try:
-            self.http.close()
-        except Exception:
-            pass
+        if metrics.METRICS.enabled:
+            try:
+                metrics.METRICS.dump(self.metrics_file)
+            except OSError:
+                pass
+        if self.prewarmer is not None:
+            self.prewarmer.stop()
+        self.warmup.stop()
+        self.icons.close()
         try:
             self.api.close()  # harmless wenn nicht vorhanden
         except Exception:
             pass
+        http_pool.POOL.close()  # geteilter Transport (self.http, API-Clients)
+        if self.store is not None:
+            self.store.close()
         self.destroy()
 
 
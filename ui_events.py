@@ -0,0 +1,73 @@
+# ui_events.py
+"""
+Ereignis-Queue zwischen Worker-Threads (Scanner, Lookups, Icons …) und dem Tk-Thread.
+- nur wichtige Ereignisse (URGENT_KINDS: Deck, Loading, Analyse, Icons …) wecken den
+  Tk-Thread sofort per virtuellem Event; alles andere (Log, Status, Warmup) holt der Poll
+- hochfrequente Meldungen werden zusammengefasst: von "ocr" und "status" zählt nur die
+  jeweils letzte, höchstens alle OCR_LOG_INTERVAL Sekunden (bei "ocr" mit Anzahl der
+  übersprungenen)
+Produzenten rufen wie bei queue.Queue nur put((art, payload)) auf.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+Event = Tuple[str, Any]
+
+URGENT_KINDS = frozenset(
+    {"player", "opponent", "deck", "loading", "resolved", "analysis", "history", "analysis_done", "analysis_error", "icon"}
+)
+COALESCE_KINDS = frozenset({"ocr", "status"})
+COUNT_SKIPPED_KINDS = frozenset({"ocr"})  # zusammengefasste Meldung nennt die übersprungenen
+OCR_LOG_INTERVAL = 0.5  # Sekunden
+
+
+class EventQueue:
+    """
+    wake: Callback, der den Tk-Thread weckt (z. B. root.event_generate("<<UiEvents>>", when="tail"));
+    wird pro Schub nur einmal aufgerufen, bis der Tk-Thread wieder drain() aufruft.
+    """
+
+    def __init__(self, wake: Optional[Callable[[], None]] = None, coalesce_interval: float = OCR_LOG_INTERVAL):
+        self.wake = wake
+        self.coalesce_interval = coalesce_interval
+        self._lock = threading.Lock()
+        self._items: Deque[Event] = deque()
+        self._latest: dict = {}  # art → (payload, anzahl zusammengefasster Meldungen)
+        self._last_flush = 0.0
+        self._wake_pending = False
+
+    def put(self, item: Event) -> None:
+        what, payload = item
+        with self._lock:
+            if what in COALESCE_KINDS:
+                _, n = self._latest.get(what, (None, 0))
+                self._latest[what] = (payload, n + 1)
+                return  # kein Wecken – kommt mit dem nächsten Schub oder Poll
+            self._items.append(item)
+            if what not in URGENT_KINDS:
+                return  # kommt mit dem nächsten Schub oder Poll
+            need_wake = not self._wake_pending
+            self._wake_pending = True
+        if need_wake and self.wake is not None:
+            try:
+                self.wake()
+            except Exception:
+                pass  # Fenster evtl. schon zu – der Poll holt den Rest
+
+    def drain(self) -> List[Event]:
+        """Alles Anstehende (Tk-Thread); zusammengefasste Arten höchstens alle coalesce_interval s."""
+        now = time.monotonic()
+        with self._lock:
+            out = list(self._items)
+            self._items.clear()
+            self._wake_pending = False
+            if self._latest and now - self._last_flush >= self.coalesce_interval:
+                for what, (payload, n) in self._latest.items():
+                    if n > 1 and what in COUNT_SKIPPED_KINDS:
+                        payload = f"{payload}  (+{n - 1} übersprungen)"
+                    out.append((what, payload))
+                self._latest.clear()
+                self._last_flush = now
+        return out
@@ -0,0 +1,79 @@
+# view_cache.py
+"""
+Stale-while-revalidate für die Gegner-Ansicht.
+Pro Spieler wird der zuletzt berechnete Stand gehalten (Profil, aktuelles Deck, ladder_report,
+Historienzeilen inkl. Ähnlichkeiten). Taucht derselbe Gegner wieder auf, zeigt die UI diesen
+Stand sofort an und lädt im Hintergrund neu; danach wird nur aktualisiert, was sich geändert
+hat (neues Deck, neue Kämpfe, andere Profilwerte).
+Innerhalb von fresh_for Sekunden gilt ein Stand als aktuell – dann entfällt die Revalidierung.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import game_modes
+from cr_api import _norm_tag
+from deck_bits import card_key
+
+VIEW_CACHE_ENTRIES = 200
+VIEW_FRESH_S = 30.0  # Flackern/erneutes Erkennen innerhalb dieser Zeit: kein Netz
+
+
+def deck_signature(player: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+    """Kartenfolge des aktuellen Decks (Reihenfolge zählt – so wird es auch angezeigt)."""
+    return tuple(card_key(c or {}) for c in (player.get("currentDeck") or []))
+
+
+def battle_signature(battles: List[Dict[str, Any]]) -> Tuple[int, str]:
+    """(Anzahl, neuester battleTime) – ändert sich, sobald neue Kämpfe dazukommen."""
+    return len(battles), max((b.get("battleTime") or "" for b in battles), default="")
+
+
+@dataclass(slots=True)
+class PlayerView:
+    tag: str
+    player: Dict[str, Any]
+    report: Optional[Dict[str, Any]] = None
+    rows: List[Dict[str, Any]] = field(default_factory=list)   # Battlelog-Decks
+    older: List[Dict[str, Any]] = field(default_factory=list)  # aus der lokalen Historie
+    battle_sig: Tuple[int, str] = (0, "")
+    modes: FrozenSet[str] = game_modes.LADDER_CATEGORIES  # Modus-Filter, mit dem rows/report entstanden
+    stamp: float = field(default_factory=time.monotonic)
+
+    @property
+    def deck_sig(self) -> Tuple[Optional[str], ...]:
+        return deck_signature(self.player)
+
+    def age(self) -> float:
+        return time.monotonic() - self.stamp
+
+
+class ViewCache:
+    """Thread-sicherer LRU der letzten Gegner-Ansichten (Schlüssel: normalisierter Spieler-Tag)."""
+
+    def __init__(self, max_entries: int = VIEW_CACHE_ENTRIES, fresh_for: float = VIEW_FRESH_S):
+        self.max_entries = max_entries
+        self.fresh_for = fresh_for
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, PlayerView]" = OrderedDict()
+
+    def get(self, tag: str) -> Optional[PlayerView]:
+        key = _norm_tag(tag)
+        with self._lock:
+            view = self._data.get(key)
+            if view is not None:
+                self._data.move_to_end(key)
+            return view
+
+    def put(self, view: PlayerView) -> None:
+        key = _norm_tag(view.tag)
+        with self._lock:
+            self._data[key] = view
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def is_fresh(self, view: PlayerView) -> bool:
+        return view.age() < self.fresh_for